@@ -0,0 +1,75 @@
+"""Carga de CSV completos por fuente, parseados en streaming.
+
+Usa los mismos mapeos fila -> Indicador que los scripts de ``etl/internal`` y
+``etl/external`` (``csv_mappings.py``) para que un archivo de origen se pueda
+subir en un solo request (``POST /ingesta/csv/{fuente}``) en lugar de un POST
+por fila.
+
+El cuerpo se procesa por trozos a medida que llega: los bytes se decodifican
+de forma incremental, se cortan en registros CSV (respetando saltos de línea
+dentro de comillas) y cada bloque de filas se valida y se escribe en los
+segmentos RAW antes de leer el siguiente. Nunca se carga el archivo completo
+en memoria.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+from typing import AsyncIterator, List, Optional
+
+CSV_BLOCK_ROWS = 5000
+
+
+async def iter_csv_blocks(
+    chunks: AsyncIterator[bytes],
+    block_rows: int = CSV_BLOCK_ROWS,
+    encoding: str = "utf-8",
+) -> AsyncIterator[List[Optional[dict]]]:
+    """
+    Convierte un flujo de bytes CSV en bloques de filas (dicts por encabezado).
+
+    Las filas con una cantidad de columnas distinta al encabezado se entregan
+    como None para que el llamador las cuente como rechazadas.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    header: Optional[List[str]] = None
+    block: List[Optional[dict]] = []
+    pending = ""
+    partial: List[str] = []
+
+    def parse(records: List[str]) -> None:
+        nonlocal header
+        for fields in csv.reader(records):
+            if header is None:
+                header = [name.lstrip("\ufeff").strip() for name in fields]
+                continue
+            if not fields:
+                continue
+            if len(fields) != len(header):
+                block.append(None)
+            else:
+                block.append(dict(zip(header, fields)))
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        records: List[str] = []
+        for line in lines:
+            partial.append(line)
+            # Un número impar de comillas deja abierto un campo multilínea
+            if sum(part.count('"') for part in partial) % 2 == 1:
+                continue
+            records.append("\n".join(partial))
+            partial = []
+        parse(records)
+        if len(block) >= block_rows:
+            yield block
+            block = []
+
+    pending += decoder.decode(b"", final=True)
+    if pending or partial:
+        partial.append(pending)
+        parse(["\n".join(partial)])
+    if block:
+        yield block
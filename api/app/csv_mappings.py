@@ -0,0 +1,69 @@
+"""Mapeos fila de un CSV de origen -> payload ``Indicador``, por fuente.
+
+Única definición de cómo se lee cada CSV de origen: la usan la carga de CSV
+completos de la API (``POST /ingesta/csv/{fuente}``, ver ``csv_ingest.py``) y
+los scripts de ``etl/internal`` y ``etl/external``. Un valor que no es
+numérico levanta ``ValueError`` y una columna faltante ``KeyError``; cada
+llamador lo informa como fila rechazada.
+
+Solo stdlib.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict
+
+
+def _viajes_validados(row: dict) -> dict:
+    return {
+        "fecha": row["fecha"],
+        "filial_code": row["filial_code"],
+        "servicio_code": row["servicio_code"],
+        "tipo_indicador": "viajes_validados",
+        "valor": float(row["viajes_validados"]),
+        "fuente": "interno_viajes",
+    }
+
+
+def _densidad(row: dict) -> dict:
+    return {
+        "fecha": row["fecha"],                  # "2025-11-01"
+        "filial_code": row["filial_code"],      # "VA"
+        "servicio_code": row["servicio_code"],  # "01"
+        "tramo_id": row.get("tramo_id"),        # "TRAMO_01"
+        "tipo_indicador": "densidad",
+        "valor": float(row["densidad"]),
+        "fuente": "interno_densidad",
+    }
+
+
+def _temperatura(row: dict) -> dict:
+    return {
+        "fecha": row["fecha"],
+        "filial_code": row["filial_code"],
+        "servicio_code": row["servicio_code"],
+        "tramo_id": row.get("tramo_id"),
+        "tipo_indicador": "temperatura",
+        "valor": float(row["temperatura"]),
+        "fuente": "interno_temperatura",
+    }
+
+
+def _externo_csv(row: dict) -> dict:
+    return {
+        "fecha": row["fecha"],
+        "filial_code": row["filial_code"],
+        "servicio_code": row["servicio_code"],
+        "tipo_indicador": row["tipo_indicador"],
+        "valor": float(row["valor"]),
+        "fuente": "externo_csv",
+    }
+
+
+# Mapeos fila CSV -> payload Indicador por nombre de fuente
+SOURCE_MAPPINGS: Dict[str, Callable[[dict], dict]] = {
+    "viajes_validados": _viajes_validados,
+    "densidad": _densidad,
+    "temperatura": _temperatura,
+    "externo_csv": _externo_csv,
+}
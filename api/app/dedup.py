@@ -0,0 +1,191 @@
+"""Índice de deduplicación para una ingesta idempotente.
+
+Los scripts de ingesta reintentan ``requests.post`` tras un timeout; si el
+primer intento sí se había escrito, el reintento duplicaba la lectura en RAW.
+Cada lectura se identifica por su clave natural
+(fuente, tipo_indicador, fecha, filial_code, servicio_code, tramo_id) más un
+discriminador: la ``Idempotency-Key`` que envía el cliente o, si no hay, un
+hash del payload completo.
+
+Las claves vistas se guardan en SQLite (persistente, compartido entre
+procesos) y un filtro de Bloom en memoria responde el caso común "lectura
+nueva" sin leer disco: solo las claves que el filtro marca como posiblemente
+vistas se consultan en SQLite. Los duplicados se confirman al cliente pero no
+se escriben.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+NATURAL_KEY_FIELDS = (
+    "fuente",
+    "tipo_indicador",
+    "fecha",
+    "filial_code",
+    "servicio_code",
+    "tramo_id",
+)
+
+SQLITE_IN_CHUNK = 500
+
+
+def dedup_key(payload: dict, idempotency_key: Optional[str] = None) -> bytes:
+    """Clave de 16 bytes: clave natural + idempotency key o hash del payload."""
+    natural = "\x1f".join(str(payload.get(f) or "") for f in NATURAL_KEY_FIELDS)
+    if idempotency_key:
+        discriminator = f"idem:{idempotency_key}"
+    else:
+        discriminator = "hash:" + json.dumps(
+            payload, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+        )
+    return hashlib.blake2b(
+        f"{natural}\x1e{discriminator}".encode("utf-8"), digest_size=16
+    ).digest()
+
+
+class BloomFilter:
+    """Filtro de Bloom sobre claves ya hasheadas (double hashing)."""
+
+    def __init__(self, expected_items: int, fp_rate: float = 0.01):
+        expected_items = max(1, expected_items)
+        self.size = max(
+            8, int(-expected_items * math.log(fp_rate) / (math.log(2) ** 2))
+        )
+        self.hashes = max(1, round(self.size / expected_items * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: bytes) -> Iterator[int]:
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(
+            self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+
+class DedupIndex:
+    """Índice persistente de claves ingeridas con un filtro de Bloom delante."""
+
+    def __init__(
+        self,
+        db_path: Path,
+        expected_items: int = 10_000_000,
+        fp_rate: float = 0.01,
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.db_path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (key BLOB PRIMARY KEY) WITHOUT ROWID"
+        )
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(expected_items, fp_rate)
+
+        loaded = 0
+        for (key,) in self._conn.execute("SELECT key FROM seen"):
+            self._bloom.add(key)
+            loaded += 1
+        logging.info("Índice de deduplicación %s: %s claves", self.db_path, loaded)
+
+    @contextmanager
+    def claim(self, keys: Sequence[bytes]) -> Iterator[List[bool]]:
+        """
+        Reserva las claves nuevas y entrega una lista ``es_nueva`` por clave.
+
+        La reserva se confirma al salir del bloque (después de escribir las
+        lecturas nuevas) y se revierte si el bloque lanza una excepción, para
+        que un fallo de escritura no marque lecturas como ya ingeridas.
+        """
+        with self._lock:
+            is_new = [True] * len(keys)
+
+            # Duplicados dentro del mismo lote
+            first_seen = {}
+            for idx, key in enumerate(keys):
+                if key in first_seen:
+                    is_new[idx] = False
+                else:
+                    first_seen[key] = idx
+
+            # Solo lo que el Bloom marca como "posible" se consulta en disco
+            maybe = [k for k, idx in first_seen.items() if k in self._bloom]
+            for start in range(0, len(maybe), SQLITE_IN_CHUNK):
+                chunk = maybe[start : start + SQLITE_IN_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for (key,) in self._conn.execute(
+                    f"SELECT key FROM seen WHERE key IN ({placeholders})", chunk
+                ):
+                    is_new[first_seen[key]] = False
+
+            candidates = [keys[idx] for idx in first_seen.values() if is_new[idx]]
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO seen (key) VALUES (?)",
+                    ((k,) for k in candidates),
+                )
+                if self._conn.total_changes - before != len(candidates):
+                    # Otro proceso insertó alguna de estas claves: revisar una a una
+                    self._conn.execute("ROLLBACK")
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    for key in candidates:
+                        cur = self._conn.execute(
+                            "INSERT OR IGNORE INTO seen (key) VALUES (?)", (key,)
+                        )
+                        if cur.rowcount == 0:
+                            is_new[first_seen[key]] = False
+
+                yield is_new
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._conn.execute("COMMIT")
+            for key in candidates:
+                self._bloom.add(key)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def append_new(
+    writer,
+    index: Optional[DedupIndex],
+    payloads: List[dict],
+    keys: Optional[Sequence[bytes]],
+):
+    """
+    Escribe con ``writer.append`` solo las lecturas que no se habían ingerido.
+
+    Devuelve ({segmento: filas escritas}, lista ``es_nueva`` por payload).
+    Sin índice (deduplicación desactivada) todas las lecturas son nuevas.
+    """
+    if index is None or keys is None:
+        return (writer.append(payloads) if payloads else {}), [True] * len(payloads)
+
+    with index.claim(keys) as is_new:
+        fresh = [payload for payload, new in zip(payloads, is_new) if new]
+        written = writer.append(fresh) if fresh else {}
+    return written, is_new
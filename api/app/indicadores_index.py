@@ -0,0 +1,239 @@
+"""Índice columnar en memoria sobre la versión actual de los indicadores MCP.
+
+``GET /indicadores`` responde filtros por rango de fecha, tramo_id,
+servicio_code, id_indicador y status sin releer el dataset silver
+(``data/silver/mcp_indicadores/``, leído con ``silver_reader.py``; lo escribe
+``etl/silver_store.py``) en cada request:
+
+- las particiones de la versión actual se leen una sola vez a columnas (una
+  lista por campo), ordenadas
+  por fecha, de modo que un rango de fechas es un ``bisect``;
+- tramo_id, servicio_code, id_indicador y status tienen listas de
+  posiciones por valor (ordenadas), y la consulta parte de la más chica y
+  verifica el resto de filtros sobre las columnas;
+- ``CurrentIndicadoresIndex`` vigila la firma (mtime + tamaño) del puntero
+  ``_current.json`` que publica ``register_dataset_version`` y, cuando cambia,
+  construye un índice nuevo aparte y lo reemplaza con una sola asignación:
+  las consultas en curso siguen usando el índice anterior completo.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .silver_reader import SilverReader
+
+CURRENT_INDICADORES_PATH = Path("data/silver/mcp_indicadores/_current.json")
+
+FIELDS = (
+    "id_indicador",
+    "tramo_id",
+    "servicio_code",
+    "fecha",
+    "valor_calculado",
+    "muestras",
+    "valor_referencia",
+    "delta",
+    "status",
+)
+FLOAT_FIELDS = ("valor_calculado", "valor_referencia", "delta")
+INT_FIELDS = ("muestras",)
+POSTING_FIELDS = ("tramo_id", "servicio_code", "id_indicador", "status")
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    # NaN/inf no son JSON válido: en la respuesta de /indicadores van como null
+    return number if math.isfinite(number) else None
+
+
+def _to_int(value: Optional[str]) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+class IndicadoresIndex:
+    """Columnas inmutables de una versión de indicadores + listas de posiciones."""
+
+    def __init__(self, rows: Sequence[dict], source: Optional[Path] = None):
+        self.source = source
+        self.loaded_at = datetime.now()
+        ordered = sorted(
+            rows,
+            key=lambda r: (
+                r.get("fecha") or "",
+                r.get("id_indicador") or "",
+                r.get("tramo_id") or "",
+                r.get("servicio_code") or "",
+            ),
+        )
+        self.size = len(ordered)
+        self.columns: Dict[str, list] = {}
+        for field in FIELDS:
+            values = [row.get(field) for row in ordered]
+            if field in FLOAT_FIELDS:
+                values = [_to_float(v) for v in values]
+            elif field in INT_FIELDS:
+                values = [_to_int(v) for v in values]
+            else:
+                values = [v or "" for v in values]
+            self.columns[field] = values
+
+        self.postings: Dict[str, Dict[str, array]] = {}
+        for field in POSTING_FIELDS:
+            posting: Dict[str, array] = {}
+            for pos, value in enumerate(self.columns[field]):
+                posting.setdefault(value, array("I")).append(pos)
+            self.postings[field] = posting
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "IndicadoresIndex":
+        with path.open(newline="", encoding="utf-8") as fh:
+            rows = list(csv.DictReader(fh))
+        index = cls(rows, source=path)
+        logging.info("Índice de indicadores construido: %s filas de %s", index.size, path)
+        return index
+
+    @classmethod
+    def from_store(cls, manifest_path: Path) -> "IndicadoresIndex":
+        """Índice de la versión a la que apunta ``_current.json`` del silver."""
+        reader = SilverReader(manifest_path.parent)
+        manifest = reader.load_manifest()
+        index = cls(list(reader.iter_rows(manifest or {"partitions": {}})), source=manifest_path)
+        logging.info(
+            "Índice de indicadores construido: %s filas de la versión %s",
+            index.size,
+            manifest["version_id"] if manifest else "-",
+        )
+        return index
+
+    @classmethod
+    def empty(cls) -> "IndicadoresIndex":
+        return cls([])
+
+    def query(
+        self,
+        fecha_desde: Optional[str] = None,
+        fecha_hasta: Optional[str] = None,
+        tramo_id: Optional[str] = None,
+        id_indicador: Optional[str] = None,
+        status: Optional[str] = None,
+        servicio_code: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> Tuple[int, List[dict]]:
+        """Devuelve (total de coincidencias, filas de la página pedida)."""
+        fechas = self.columns["fecha"]
+        lo = bisect_left(fechas, fecha_desde) if fecha_desde else 0
+        hi = bisect_right(fechas, fecha_hasta) if fecha_hasta else self.size
+        if lo >= hi:
+            return 0, []
+
+        filters = [
+            (field, value)
+            for field, value in (
+                ("tramo_id", tramo_id),
+                ("servicio_code", servicio_code),
+                ("id_indicador", id_indicador),
+                ("status", status),
+            )
+            if value is not None
+        ]
+
+        if not filters:
+            matches: Sequence[int] = range(lo, hi)
+        else:
+            postings = []
+            for field, value in filters:
+                posting = self.postings[field].get(value)
+                if posting is None:
+                    return 0, []
+                postings.append((posting, field, value))
+            postings.sort(key=lambda item: len(item[0]))
+            driver = postings[0][0]
+            rest = [(self.columns[field], value) for _, field, value in postings[1:]]
+
+            # Las posiciones están ordenadas: el rango de fechas también es un bisect
+            start, end = bisect_left(driver, lo), bisect_left(driver, hi)
+            if not rest:
+                matches = driver[start:end]
+            else:
+                matches = [
+                    pos
+                    for pos in driver[start:end]
+                    if all(column[pos] == value for column, value in rest)
+                ]
+
+        page = matches[offset : offset + limit]
+        return len(matches), [self.row(pos) for pos in page]
+
+    def row(self, pos: int) -> dict:
+        return {field: self.columns[field][pos] for field in FIELDS}
+
+
+class CurrentIndicadoresIndex:
+    """
+    Índice de la versión current con reemplazo atómico.
+
+    ``path`` puede ser el puntero ``_current.json`` del dataset silver o un
+    CSV plano exportado. ``refresh()`` compara la firma del archivo y solo reconstruye si cambió;
+    se llama al arrancar la API y periódicamente desde un loop de fondo.
+    """
+
+    def __init__(self, path: Path = CURRENT_INDICADORES_PATH):
+        self.path = Path(path)
+        self._index = IndicadoresIndex.empty()
+        self._signature: Optional[Tuple[int, int]] = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def index(self) -> IndicadoresIndex:
+        return self._index
+
+    def _current_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self) -> bool:
+        """Reconstruye el índice si el archivo current cambió; True si se reemplazó."""
+        with self._refresh_lock:
+            signature = self._current_signature()
+            if signature == self._signature:
+                return False
+
+            if signature is None:
+                new_index = IndicadoresIndex.empty()
+            else:
+                try:
+                    if self.path.suffix == ".json":
+                        new_index = IndicadoresIndex.from_store(self.path)
+                    else:
+                        new_index = IndicadoresIndex.from_csv(self.path)
+                except (OSError, ValueError, KeyError, csv.Error) as exc:
+                    logging.error("No se pudo indexar %s: %s", self.path, exc)
+                    return False
+
+            # Asignación única: las consultas ven el índice viejo o el nuevo
+            self._index = new_index
+            self._signature = signature
+            return True
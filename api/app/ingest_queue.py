@@ -0,0 +1,207 @@
+"""Ingesta asíncrona con group commit hacia los segmentos RAW.
+
+Los endpoints encolan lecturas ya validadas en una cola acotada en memoria.
+Un único flusher en segundo plano las agrupa y las escribe con una sola
+llamada a ``SegmentWriter.append`` cada ``max_records`` lecturas o
+``max_delay_ms`` milisegundos (lo que ocurra primero), con fsync opcional por
+grupo.
+
+Modos de durabilidad:
+
+- ``queued``: la respuesta vuelve apenas la lectura entra en la cola (menor
+  latencia; una caída del proceso puede perder lo encolado).
+- ``flushed``: la respuesta espera a que el grupo que la contiene se escriba
+  (y se sincronice a disco si ``fsync`` está activo).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from .dedup import DedupIndex, append_new
+from .raw_store import SegmentWriter, partition_path
+
+DURABILITY_QUEUED = "queued"
+DURABILITY_FLUSHED = "flushed"
+DURABILITY_MODES = (DURABILITY_QUEUED, DURABILITY_FLUSHED)
+
+_STOP = object()
+
+
+class GroupCommitQueue:
+    """Cola acotada + flusher que escribe lecturas en grupos."""
+
+    def __init__(
+        self,
+        writer: SegmentWriter,
+        max_records: int = 1000,
+        max_delay_ms: float = 50.0,
+        max_queue: int = 10_000,
+        fsync: bool = False,
+        durability: str = DURABILITY_FLUSHED,
+        dedup: Optional[DedupIndex] = None,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(
+                f"Modo de durabilidad inválido '{durability}'. "
+                f"Opciones: {', '.join(DURABILITY_MODES)}"
+            )
+        self.writer = writer
+        self.max_records = max_records
+        self.max_delay = max_delay_ms / 1000
+        self.fsync = fsync
+        self.durability = durability
+        self.dedup = dedup
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_queue = max_queue
+        self._flusher: Optional[asyncio.Task] = None
+
+    @property
+    def depth(self) -> int:
+        """Lecturas en cola esperando su grupo (0 si la cola no está iniciada)."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._flusher = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Vacía la cola pendiente y detiene el flusher."""
+        if self._flusher is None:
+            return
+        await self._queue.put((_STOP, None, None))
+        await self._flusher
+        self._flusher = None
+
+    async def submit(
+        self, payloads: List[dict], keys: Optional[Sequence[bytes]] = None
+    ) -> Optional[Tuple[Dict[Path, int], List[bool]]]:
+        """
+        Encola lecturas (dicts ya serializados) con sus claves de deduplicación.
+
+        En modo ``flushed`` espera al commit de su grupo y devuelve
+        ({segmento: filas de este envío}, ``es_nueva`` por cada lectura
+        enviada): los segmentos y filas de otros envíos del mismo grupo no
+        aparecen;
+        en modo ``queued`` devuelve None apenas las lecturas quedan encoladas.
+        Si la cola está llena, espera (backpressure hacia el cliente).
+        """
+        if self._flusher is None:
+            raise RuntimeError("La cola de ingesta no está iniciada")
+
+        if self.durability == DURABILITY_QUEUED:
+            await self._queue.put((payloads, keys, None))
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payloads, keys, future))
+        return await future
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item[0] is _STOP:
+                break
+
+            items = [item]
+            count = len(item[0])
+            deadline = time.monotonic() + self.max_delay
+
+            while count < self.max_records:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item[0] is _STOP:
+                    stopping = True
+                    break
+                items.append(item)
+                count += len(item[0])
+
+            if stopping:
+                # Drenar lo que quedó detrás de la señal de stop
+                while not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item[0] is not _STOP:
+                        items.append(item)
+
+            await self._commit(items)
+
+    async def _commit(self, items: List[tuple]) -> None:
+        try:
+            shares, is_new = await run_in_threadpool(self._write_group, items)
+        except Exception as exc:
+            count = sum(len(payloads) for payloads, _, _ in items)
+            logging.error("Falló el group commit de %s lecturas: %s", count, exc)
+            for _, _, waiter in items:
+                if waiter is not None and not waiter.done():
+                    waiter.set_exception(exc)
+            return
+
+        offset = 0
+        for (payloads, _, waiter), share in zip(items, shares):
+            end = offset + len(payloads)
+            if waiter is not None and not waiter.done():
+                waiter.set_result((share, is_new[offset:end]))
+            offset = end
+
+    def _write_group(self, items: List[tuple]) -> Tuple[List[Dict[Path, int]], List[bool]]:
+        group: List[dict] = []
+        keys: Optional[List[bytes]] = [] if self.dedup is not None else None
+        for payloads, item_keys, _ in items:
+            group.extend(payloads)
+            if keys is not None:
+                keys.extend(item_keys)
+
+        written, is_new = append_new(self.writer, self.dedup, group, keys)
+        if self.fsync and written:
+            self.writer.flush(fsync=True)
+        return _split_written(self.writer.base_path, written, items, is_new), is_new
+
+
+def _split_written(
+    base_path: Path, written: Dict[Path, int], items: List[tuple], is_new: List[bool]
+) -> List[Dict[Path, int]]:
+    """
+    Reparte el resultado de la escritura del grupo entre sus envíos: cada uno
+    recibe {segmento: filas} contando solo sus lecturas nuevas. Un
+    ``append`` escribe cada partición en un único segmento.
+    """
+    by_folder = {path.parent: path for path in written}
+    shares: List[Dict[Path, int]] = []
+    offset = 0
+    for payloads, _, _ in items:
+        share: Dict[Path, int] = {}
+        for payload, new in zip(payloads, is_new[offset : offset + len(payloads)]):
+            if not new:
+                continue
+            folder = partition_path(
+                base_path,
+                payload.get("fuente"),
+                payload.get("tipo_indicador"),
+                date.fromisoformat(payload["fecha"]),
+            )
+            path = by_folder[folder]
+            share[path] = share.get(path, 0) + 1
+        shares.append(share)
+        offset += len(payloads)
+    return shares
+
+
+def segment_for_partition(written: Dict[Path, int], folder: Path) -> Optional[Path]:
+    """Segmento del grupo escrito que corresponde a la partición ``folder``."""
+    for path in written:
+        if path.parent == folder:
+            return path
+    return None
@@ -0,0 +1,172 @@
+"""Registro de jobs del pipeline lanzados desde la API.
+
+``POST /jobs/etl/run-all`` ya no lanza un ``subprocess.Popen`` y lo olvida:
+
+- cada ejecución es un job con id, estado (queued, running, succeeded,
+  failed), tiempos y returncode;
+- single-flight: si ya hay un job activo (en cola o corriendo) del mismo tipo,
+  un nuevo disparo se acopla a ese job en vez de lanzar otro pipeline que
+  pelee por los mismos archivos RAW y silver;
+- un pool acotado de workers garantiza que nunca corran más de
+  ``max_concurrent`` pipelines a la vez;
+- el progreso por etapa se lee del ``--status-file`` que publica
+  ``etl/run_all_etl.py``.
+
+El registro vive en memoria (se pierde al reiniciar la API) y conserva los
+últimos ``max_history`` jobs.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import subprocess
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+STATE_QUEUED = "queued"
+STATE_RUNNING = "running"
+STATE_SUCCEEDED = "succeeded"
+STATE_FAILED = "failed"
+ACTIVE_STATES = (STATE_QUEUED, STATE_RUNNING)
+
+
+class Job:
+    def __init__(self, job_type: str, status_dir: Path):
+        self.id = uuid.uuid4().hex
+        self.job_type = job_type
+        self.state = STATE_QUEUED
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.returncode: Optional[int] = None
+        self.error: Optional[str] = None
+        self.attached = 0
+        self.status_file = status_dir / f"{self.id}.json"
+
+    def to_dict(self) -> dict:
+        progress = self._read_progress()
+        duration = None
+        if self.started_at:
+            end = self.finished_at or datetime.now()
+            duration = round((end - self.started_at).total_seconds(), 3)
+
+        stages = progress.get("stages", {})
+        return {
+            "job_id": self.id,
+            "job": self.job_type,
+            "state": self.state,
+            "created_at": self.created_at.isoformat(timespec="seconds"),
+            "started_at": self.started_at.isoformat(timespec="seconds")
+            if self.started_at
+            else None,
+            "finished_at": self.finished_at.isoformat(timespec="seconds")
+            if self.finished_at
+            else None,
+            "duration_seg": duration,
+            "returncode": self.returncode,
+            "error": self.error,
+            "attached_triggers": self.attached,
+            "progress": {
+                "stages_total": len(stages),
+                "stages_done": sum(
+                    1
+                    for stage in stages.values()
+                    if stage.get("status") not in ("pending", "running")
+                ),
+            },
+            "stages": stages,
+            "log_file": progress.get("log_file"),
+        }
+
+    def _read_progress(self) -> dict:
+        try:
+            return json.loads(self.status_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+
+class JobRegistry:
+    """Registro en memoria con single-flight por tipo y workers acotados."""
+
+    def __init__(
+        self,
+        command_factory: Callable[[Path], List[str]],
+        cwd: Path,
+        status_dir: Path,
+        max_concurrent: int = 1,
+        max_history: int = 100,
+    ):
+        self.command_factory = command_factory
+        self.cwd = cwd
+        self.status_dir = status_dir
+        self.max_history = max_history
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrent), thread_name_prefix="mcp-job"
+        )
+
+    def trigger(self, job_type: str) -> Tuple[Job, bool]:
+        """
+        Encola un job o se acopla al activo del mismo tipo.
+
+        Devuelve (job, creado) donde ``creado`` es False si se reutilizó un
+        job que ya estaba en cola o corriendo.
+        """
+        with self._lock:
+            active = self._active.get(job_type)
+            if active is not None and active.state in ACTIVE_STATES:
+                active.attached += 1
+                return active, False
+
+            job = Job(job_type, self.status_dir)
+            self._jobs[job.id] = job
+            self._active[job_type] = job
+            self._trim_history()
+
+        self._pool.submit(self._execute, job)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _trim_history(self) -> None:
+        while len(self._jobs) > self.max_history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.state in ACTIVE_STATES:
+                break
+            self._jobs.pop(oldest_id)
+
+    def _execute(self, job: Job) -> None:
+        self.status_dir.mkdir(parents=True, exist_ok=True)
+        job.state = STATE_RUNNING
+        job.started_at = datetime.now()
+        logging.info("Job %s (%s) iniciado", job.id, job.job_type)
+
+        try:
+            result = subprocess.run(
+                self.command_factory(job.status_file),
+                cwd=str(self.cwd),
+            )
+            job.returncode = result.returncode
+            job.state = STATE_SUCCEEDED if result.returncode == 0 else STATE_FAILED
+        except Exception as exc:
+            job.error = str(exc)
+            job.state = STATE_FAILED
+        finally:
+            job.finished_at = datetime.now()
+            with self._lock:
+                if self._active.get(job.job_type) is job:
+                    del self._active[job.job_type]
+            logging.info("Job %s (%s) terminado: %s", job.id, job.job_type, job.state)
@@ -0,0 +1,179 @@
+"""Validación y aterrizaje particionado en RAW, reutilizable fuera de la API.
+
+Aquí vive la lógica que antes estaba en ``save_raw_file``: validar contra
+``Indicador``, serializar y escribir en los segmentos RAW de
+``<fuente>/<tipo>/YYYY=/MM=/DD=``. La API la usa en sus endpoints y los
+scripts de ingesta la usan en modo ``--direct`` (``DirectLander``) para
+escribir en disco sin pasar por HTTP cuando corren en el mismo host que RAW.
+Ambos caminos usan el mismo ``SegmentWriter``, por lo que el layout y el
+contenido de cada línea RAW son idénticos.
+
+Solo depende de pydantic (no de FastAPI).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from .dedup import DedupIndex, append_new, dedup_key
+from .models import Indicador
+from .raw_store import SegmentWriter
+
+RAW_PATH = Path("data/raw")
+DEDUP_INDEX_PATH = Path("data/metadata/ingest_dedup.sqlite")
+
+DIRECT_BATCH_SIZE = 5000
+
+# (número de fila, payload Indicador)
+Row = Tuple[int, dict]
+
+
+def indicador_to_payload(indicador: Indicador) -> dict:
+    """Convierte el modelo a dict y pasa la fecha a string ISO."""
+    payload = indicador.model_dump()  # en Pydantic v2 (también sirve .dict())
+    payload["fecha"] = indicador.fecha.isoformat()
+    return payload
+
+
+def validate_batch(rows: Sequence[object]) -> Tuple[List[Tuple[int, Indicador]], List[dict]]:
+    """
+    Valida un lote completo contra el modelo Indicador.
+
+    Devuelve las filas aceptadas (con su índice dentro del lote) y el
+    resultado por fila (accepted/rejected + errores de validación).
+    """
+    accepted: List[Tuple[int, Indicador]] = []
+    results: List[dict] = []
+
+    for idx, row in enumerate(rows):
+        try:
+            indicador = Indicador.model_validate(row)
+        except ValidationError as exc:
+            results.append(
+                {
+                    "index": idx,
+                    "status": "rejected",
+                    "errors": exc.errors(include_url=False, include_input=False),
+                }
+            )
+            continue
+
+        accepted.append((idx, indicador))
+        results.append({"index": idx, "status": "accepted"})
+
+    return accepted, results
+
+
+def build_dedup_keys(
+    payloads: Sequence[dict],
+    idempotency_key: Optional[str] = None,
+    positions: Optional[Sequence[int]] = None,
+) -> List[bytes]:
+    """
+    Claves de deduplicación de un lote.
+
+    Con ``Idempotency-Key`` cada fila usa ``<clave>:<posición>`` (índice en el
+    lote o línea del CSV) para que un reintento del mismo envío coincida fila
+    a fila; sin ella se usa el hash del payload.
+    """
+    if idempotency_key is None:
+        return [dedup_key(p) for p in payloads]
+    positions = positions if positions is not None else range(len(payloads))
+    return [
+        dedup_key(p, f"{idempotency_key}:{pos}") for pos, p in zip(positions, payloads)
+    ]
+
+
+class DirectLander:
+    """
+    Aterrizaje en proceso: valida en bloque y escribe las particiones RAW.
+
+    Tiene la misma interfaz ``send`` que ``etl.ingest_client.IngestClient``
+    para que los scripts de ingesta puedan elegir entre HTTP y escritura
+    directa con ``--direct``.
+
+    En proceso no hay reintentos tras timeout, así que la deduplicación es
+    opcional (``dedup=True``); si se activa usa el mismo índice que la API con
+    clave por hash del payload, lo que también descarta lecturas repetidas
+    idénticas dentro del CSV.
+    """
+
+    def __init__(
+        self,
+        raw_path: Path = RAW_PATH,
+        batch_size: int = DIRECT_BATCH_SIZE,
+        dedup: bool = False,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.logger = logger or logging.getLogger(__name__)
+        self.writer = SegmentWriter(raw_path)
+        self.dedup: Optional[DedupIndex] = None
+        if dedup and os.environ.get("MCP_INGEST_DEDUP", "1") == "1":
+            self.dedup = DedupIndex(
+                Path(os.environ.get("MCP_DEDUP_INDEX_PATH", DEDUP_INDEX_PATH))
+            )
+
+    def close(self) -> None:
+        self.writer.close()
+        if self.dedup is not None:
+            self.dedup.close()
+
+    def __enter__(self) -> "DirectLander":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def send(
+        self,
+        rows: Iterable[Row],
+        on_ok: Callable[[int, dict], None],
+        on_error: Callable[[int, dict, str], None],
+    ) -> dict:
+        """
+        Valida y escribe todas las filas; llama ``on_ok``/``on_error`` por
+        fila, en orden. Devuelve {"rows", "ok", "errors", "duplicates"}.
+        """
+        summary = {"rows": 0, "ok": 0, "errors": 0, "duplicates": 0}
+        batch: List[Row] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._land(batch, on_ok, on_error, summary)
+                batch = []
+        if batch:
+            self._land(batch, on_ok, on_error, summary)
+        return summary
+
+    def _land(
+        self,
+        batch: List[Row],
+        on_ok: Callable[[int, dict], None],
+        on_error: Callable[[int, dict, str], None],
+        summary: dict,
+    ) -> None:
+        accepted, results = validate_batch([payload for _, payload in batch])
+        payloads = [indicador_to_payload(ind) for _, ind in accepted]
+        keys = build_dedup_keys(payloads) if self.dedup is not None else None
+        _, is_new = append_new(self.writer, self.dedup, payloads, keys)
+
+        for (pos, _), new in zip(accepted, is_new):
+            if not new:
+                results[pos]["status"] = "duplicate"
+
+        summary["rows"] += len(batch)
+        for (idx, payload), result in zip(batch, results):
+            if result["status"] == "rejected":
+                summary["errors"] += 1
+                on_error(idx, payload, f"rechazada por validación: {result['errors']}")
+                continue
+            if result["status"] == "duplicate":
+                summary["duplicates"] += 1
+            summary["ok"] += 1
+            on_ok(idx, payload)
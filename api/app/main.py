@@ -1,18 +1,139 @@
-from datetime import datetime
+import asyncio
+from datetime import date
+from contextlib import asynccontextmanager
 import json
-import logging
-import subprocess
+import os
 import sys
+import time
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import FastAPI
-from fastapi.background import BackgroundTasks
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 
+from .csv_ingest import iter_csv_blocks
+from .csv_mappings import SOURCE_MAPPINGS
+from .dedup import DedupIndex, append_new
+from .indicadores_index import CURRENT_INDICADORES_PATH, CurrentIndicadoresIndex
+from .ingest_queue import GroupCommitQueue, segment_for_partition
+from .jobs import JobRegistry
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    IngestCounters,
+    MetricFamily,
+    RunHistoryReader,
+    calc_run_families,
+    etl_run_families,
+    render as render_metrics,
+)
+from .landing import (
+    DEDUP_INDEX_PATH as DEFAULT_DEDUP_INDEX_PATH,
+    RAW_PATH,
+    build_dedup_keys,
+    indicador_to_payload,
+    validate_batch,
+)
 from .models import Indicador
+from .raw_store import SegmentWriter, partition_path, recover_open_segments
 
-app = FastAPI(title="MCP API - Practica EFE Trenes")
+# Rotación de segmentos RAW (ver raw_store.py)
+RAW_SEGMENT_MAX_BYTES = int(os.environ.get("MCP_RAW_SEGMENT_MAX_BYTES", 64 * 1024 * 1024))
+RAW_SEGMENT_MAX_AGE_SEC = float(os.environ.get("MCP_RAW_SEGMENT_MAX_AGE_SEC", 300))
 
-RAW_PATH = Path("data/raw")
+# Modo de ingesta: "sync" escribe en el hilo del request; "async" encola y
+# un flusher hace group commit (ver ingest_queue.py)
+INGEST_MODE = os.environ.get("MCP_INGEST_MODE", "sync")
+INGEST_DURABILITY = os.environ.get("MCP_INGEST_DURABILITY", "flushed")
+INGEST_FSYNC = os.environ.get("MCP_INGEST_FSYNC", "0") == "1"
+GROUP_COMMIT_MAX_RECORDS = int(os.environ.get("MCP_GROUP_COMMIT_MAX_RECORDS", 1000))
+GROUP_COMMIT_MAX_DELAY_MS = float(os.environ.get("MCP_GROUP_COMMIT_MAX_DELAY_MS", 50))
+INGEST_QUEUE_MAX = int(os.environ.get("MCP_INGEST_QUEUE_MAX", 10_000))
+
+# Deduplicación de reintentos (ver dedup.py)
+INGEST_DEDUP = os.environ.get("MCP_INGEST_DEDUP", "1") == "1"
+DEDUP_INDEX_PATH = Path(
+    os.environ.get("MCP_DEDUP_INDEX_PATH", DEFAULT_DEDUP_INDEX_PATH)
+)
+DEDUP_EXPECTED_ROWS = int(os.environ.get("MCP_DEDUP_EXPECTED_ROWS", 10_000_000))
+
+# Carga de CSV en streaming (ver csv_ingest.py)
+CSV_UPLOAD_CHUNK_BYTES = 1024 * 1024
+CSV_MAX_ERROR_SAMPLES = 20
+
+# Lectura de indicadores (ver indicadores_index.py)
+INDICADORES_CURRENT_PATH = Path(
+    os.environ.get("MCP_INDICADORES_CURRENT_PATH", CURRENT_INDICADORES_PATH)
+)
+INDICADORES_REFRESH_SEC = float(os.environ.get("MCP_INDICADORES_REFRESH_SEC", 5))
+INDICADORES_MAX_LIMIT = 1000
+
+# Jobs del pipeline (ver jobs.py): pipelines simultáneos como máximo
+MAX_CONCURRENT_PIPELINES = int(os.environ.get("MCP_MAX_CONCURRENT_PIPELINES", 1))
+
+raw_writer = SegmentWriter(
+    RAW_PATH,
+    max_segment_bytes=RAW_SEGMENT_MAX_BYTES,
+    max_segment_age=RAW_SEGMENT_MAX_AGE_SEC,
+    fsync=INGEST_FSYNC,
+)
+
+ingest_queue = GroupCommitQueue(
+    raw_writer,
+    max_records=GROUP_COMMIT_MAX_RECORDS,
+    max_delay_ms=GROUP_COMMIT_MAX_DELAY_MS,
+    max_queue=INGEST_QUEUE_MAX,
+    fsync=INGEST_FSYNC,
+    durability=INGEST_DURABILITY,
+)
+
+indicadores_index = CurrentIndicadoresIndex(INDICADORES_CURRENT_PATH)
+
+# Se abre en el arranque de la app (carga el filtro de Bloom desde SQLite)
+dedup_index: Optional[DedupIndex] = None
+
+
+async def _seal_expired_segments_loop():
+    """Sella periódicamente los segmentos RAW que superaron su antigüedad."""
+    interval = max(1.0, RAW_SEGMENT_MAX_AGE_SEC / 4)
+    while True:
+        await asyncio.sleep(interval)
+        await run_in_threadpool(raw_writer.seal_expired)
+
+
+async def _refresh_indicadores_loop():
+    """Reemplaza el índice de indicadores cuando se publica un nuevo current."""
+    while True:
+        await asyncio.sleep(INDICADORES_REFRESH_SEC)
+        await run_in_threadpool(indicadores_index.refresh)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global dedup_index
+    recover_open_segments(RAW_PATH)
+    if INGEST_DEDUP:
+        dedup_index = await run_in_threadpool(
+            DedupIndex, DEDUP_INDEX_PATH, DEDUP_EXPECTED_ROWS
+        )
+        ingest_queue.dedup = dedup_index
+    if INGEST_MODE == "async":
+        await ingest_queue.start()
+    await run_in_threadpool(indicadores_index.refresh)
+    sealer = asyncio.create_task(_seal_expired_segments_loop())
+    refresher = asyncio.create_task(_refresh_indicadores_loop())
+    try:
+        yield
+    finally:
+        sealer.cancel()
+        refresher.cancel()
+        await ingest_queue.stop()
+        raw_writer.close()
+        if dedup_index is not None:
+            dedup_index.close()
+        job_registry.shutdown()
+
+
+app = FastAPI(title="MCP API - Practica EFE Trenes", lifespan=lifespan)
 
 # Ruta base del proyecto (carpeta raíz, por encima de api/)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -20,53 +141,181 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 # Script ETL que orquesta HU1 + HU2
 RUN_ALL_ETL_SCRIPT = BASE_DIR / "etl" / "run_all_etl.py"
 
-def _run_all_etl_job():
+# Estado por etapa que publica run_all_etl.py (--status-file) para cada job
+JOBS_STATUS_DIR = BASE_DIR / "data" / "metadata" / "jobs"
+
+# Historiales de corridas que se exponen en GET /metrics (ver metrics.py)
+CALC_RUN_HISTORY = RunHistoryReader(BASE_DIR / "logs" / "calc_mcp_runs.csv")
+ETL_RUN_HISTORY = RunHistoryReader(BASE_DIR / "logs" / "etl_runs.csv")
+
+ingest_counters = IngestCounters()
+
+job_registry = JobRegistry(
+    lambda status_file: [
+        sys.executable,
+        str(RUN_ALL_ETL_SCRIPT),
+        "--status-file",
+        str(status_file),
+    ],
+    cwd=BASE_DIR,
+    status_dir=JOBS_STATUS_DIR,
+    max_concurrent=MAX_CONCURRENT_PIPELINES,
+)
+
+
+@app.middleware("http")
+async def _observe_ingest_requests(request: Request, call_next):
+    """Cuenta requests y tiempo de atención de los endpoints de ingesta."""
+    route = request.url.path
+    if not route.startswith("/ingesta/"):
+        return await call_next(request)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # /ingesta/csv/{fuente} se agrupa por fuente conocida para acotar labels
+        endpoint = route
+        if route.startswith("/ingesta/csv/"):
+            fuente = route.rsplit("/", 1)[-1]
+            endpoint = f"/ingesta/csv/{fuente if fuente in SOURCE_MAPPINGS else 'otra'}"
+        ingest_counters.observe_request(endpoint, status_code, time.perf_counter() - start)
+
+
+def dedup_keys(
+    payloads: List[dict],
+    idempotency_key: Optional[str] = None,
+    positions: Optional[List[int]] = None,
+) -> Optional[List[bytes]]:
     """
-    Ejecuta el ETL completo (HU1 + HU2) como un proceso separado.
-    Se usa desde el endpoint /jobs/etl/run-all en background.
+    Claves de deduplicación de un lote (None si la deduplicación está apagada).
+
+    Con ``Idempotency-Key`` cada fila usa ``<clave>:<posición>`` (índice en el
+    lote o línea del CSV) para que un reintento del mismo envío coincida fila
+    a fila.
     """
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
-    )
+    if dedup_index is None:
+        return None
+    return build_dedup_keys(payloads, idempotency_key, positions)
 
-    logging.info(f"Lanzando run_all_etl.py: {RUN_ALL_ETL_SCRIPT}")
 
-    # Lanza el script ETL en un proceso aparte sin bloquear la API
-    subprocess.Popen(
-        [sys.executable, str(RUN_ALL_ETL_SCRIPT)],
-        cwd=str(BASE_DIR),
-    )
+def save_raw_file(indicador: Indicador, idempotency_key: Optional[str] = None):
+    """
+    Persistir cada payload en el segmento RAW de su partición fuente/tipo/fecha.
 
-def save_raw_file(indicador: Indicador):
-    """Persistir cada payload en rutas particionadas por fuente/tipo/fecha."""
+    Si la lectura ya se había ingerido (reintento), no se escribe y el archivo
+    devuelto es None.
+    """
+    payload = indicador_to_payload(indicador)
+    keys = dedup_keys([payload], idempotency_key)
+    written, _ = append_new(raw_writer, dedup_index, [payload], keys)
+    filename = next(iter(written), None)
+    return filename, payload
 
-    fecha = indicador.fecha  # indicador.fecha ya es un `date`
-    fuente = indicador.fuente or "desconocido"
-    tipo = indicador.tipo_indicador or "sin_tipo"
 
-    folder = (
-        RAW_PATH
-        / fuente
-        / tipo
-        / f"YYYY={fecha.year}"
-        / f"MM={fecha.month:02d}"
-        / f"DD={fecha.day:02d}"
-    )
-    folder.mkdir(parents=True, exist_ok=True)
+def save_raw_batch(
+    indicadores: List[Indicador],
+    idempotency_key: Optional[str] = None,
+    positions: Optional[List[int]] = None,
+) -> Tuple[Dict[Path, int], List[bool]]:
+    """
+    Persistir un lote de lecturas con una sola escritura por partición.
 
-    # Nombre del archivo con timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    filename = folder / f"indicadores_{timestamp}.json"
+    Devuelve ({segmento: cantidad de filas escritas}, ``es_nueva`` por
+    lectura); las lecturas ya ingeridas no se escriben.
+    """
+    payloads = [indicador_to_payload(ind) for ind in indicadores]
+    keys = dedup_keys(payloads, idempotency_key, positions)
+    return append_new(raw_writer, dedup_index, payloads, keys)
 
-    # Convertimos el modelo a dict y pasamos fecha a string
-    payload = indicador.model_dump()  # en Pydantic v2 (también sirve .dict())
-    payload["fecha"] = fecha.isoformat()
 
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=4, ensure_ascii=False)
+async def _read_batch_body(request: Request) -> List[object]:
+    """
+    Lee el cuerpo de /ingesta/indicadores/batch.
 
-    return filename, payload
+    - application/x-ndjson (o application/jsonl): se consume en streaming,
+      una lectura por línea. Las líneas que no son JSON válido quedan como
+      None para que se rechacen en la validación con su índice.
+    - cualquier otro content-type: se espera un arreglo JSON.
+    """
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonl" in content_type:
+        rows: List[object] = []
+        pending = b""
+        async for chunk in request.stream():
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            rows.extend(_parse_ndjson_line(line) for line in lines if line.strip())
+        if pending.strip():
+            rows.append(_parse_ndjson_line(pending))
+        return rows
+
+    try:
+        body = json.loads(await request.body())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"JSON inválido: {exc}") from exc
+
+    if not isinstance(body, list):
+        raise HTTPException(
+            status_code=400, detail="Se esperaba un arreglo JSON de indicadores"
+        )
+    return body
+
+
+def _parse_ndjson_line(line: bytes) -> object:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+async def _csv_upload_chunks(request: Request):
+    """
+    Trozos de bytes de un CSV subido como multipart (campo ``file``) o como
+    cuerpo directo (text/csv, admite Transfer-Encoding: chunked).
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(
+                status_code=400, detail="Falta el archivo CSV en el campo 'file'"
+            )
+        while chunk := await upload.read(CSV_UPLOAD_CHUNK_BYTES):
+            yield chunk
+        return
+
+    async for chunk in request.stream():
+        yield chunk
+
+
+def _map_and_validate(
+    rows: List[object], mapping, first_line: int, errors: List[dict]
+) -> Tuple[List[dict], List[int]]:
+    """
+    Aplica el mapeo de la fuente y valida un bloque de filas CSV.
+
+    Devuelve los payloads aceptados y su número de fila de datos; agrega a
+    ``errors`` una muestra de los rechazos (fila y motivo).
+    """
+    payloads: List[dict] = []
+    lines: List[int] = []
+    for offset, row in enumerate(rows):
+        try:
+            if row is None:
+                raise ValueError("cantidad de columnas distinta al encabezado")
+            indicador = Indicador.model_validate(mapping(row))
+        except (KeyError, TypeError, ValueError) as exc:
+            if len(errors) < CSV_MAX_ERROR_SAMPLES:
+                errors.append({"row": first_line + offset, "error": str(exc)})
+            continue
+        payloads.append(indicador_to_payload(indicador))
+        lines.append(first_line + offset)
+    return payloads, lines
 
 
 @app.get("/health")
@@ -75,29 +324,268 @@ def health():
 
 
 @app.post("/ingesta/indicadores")
-def ingesta_indicadores(payload: Indicador):
-    """HU1 / HU2: recibir indicadores y guardarlos en RAW local."""
-    file_path, payload_dict = save_raw_file(payload)
+async def ingesta_indicadores(
+    payload: Indicador,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """
+    HU1 / HU2: recibir indicadores y guardarlos en RAW local.
+
+    Un reintento de una lectura ya ingerida (misma ``Idempotency-Key`` o mismo
+    payload) responde ``duplicate`` sin volver a escribirla.
+    """
+    if INGEST_MODE != "async":
+        file_path, payload_dict = await run_in_threadpool(
+            save_raw_file, payload, idempotency_key
+        )
+        ingest_counters.record_rows("/ingesta/indicadores", 1, 1, 0 if file_path else 1)
+        return {
+            "status": "received" if file_path else "duplicate",
+            "raw_file": str(file_path) if file_path else None,
+            "payload": payload_dict,
+        }
 
+    payload_dict = indicador_to_payload(payload)
+    result = await ingest_queue.submit(
+        [payload_dict], dedup_keys([payload_dict], idempotency_key)
+    )
+    if result is None:
+        ingest_counters.record_rows("/ingesta/indicadores", 1, 1, None)
+        return {"status": "queued", "raw_file": None, "payload": payload_dict}
+
+    written, is_new = result
+    ingest_counters.record_rows("/ingesta/indicadores", 1, 1, 0 if is_new[0] else 1)
+    if not is_new[0]:
+        return {"status": "duplicate", "raw_file": None, "payload": payload_dict}
+
+    folder = partition_path(
+        RAW_PATH, payload.fuente, payload.tipo_indicador, payload.fecha
+    )
     return {
         "status": "received",
-        "raw_file": file_path,
+        "raw_file": str(segment_for_partition(written, folder)),
         "payload": payload_dict,
     }
 
-@app.post("/jobs/etl/run-all")
-def trigger_run_all_etl(background_tasks: BackgroundTasks):
+
+@app.post("/ingesta/indicadores/batch")
+async def ingesta_indicadores_batch(
+    request: Request,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """
+    HU1 / HU2: recibir un lote de indicadores (arreglo JSON o NDJSON).
+
+    Valida el lote completo, devuelve el resultado por fila y escribe las
+    filas aceptadas con una sola escritura por partición fuente/tipo/fecha.
+    Las filas ya ingeridas se marcan ``duplicate`` y no se escriben.
+    """
+    rows = await _read_batch_body(request)
+    accepted, results = validate_batch(rows)
+    positions = [idx for idx, _ in accepted]
+
+    is_new: Optional[List[bool]] = None
+    if INGEST_MODE == "async":
+        payloads = [indicador_to_payload(ind) for _, ind in accepted]
+        result = await ingest_queue.submit(
+            payloads, dedup_keys(payloads, idempotency_key, positions)
+        ) if payloads else ({}, [])
+        written, is_new = result if result is not None else (None, None)
+    else:
+        written, is_new = await run_in_threadpool(
+            save_raw_batch,
+            [indicador for _, indicador in accepted],
+            idempotency_key,
+            positions,
+        )
+
+    duplicates = 0
+    if is_new is not None:
+        for idx, new in zip(positions, is_new):
+            if not new:
+                results[idx]["status"] = "duplicate"
+                duplicates += 1
+    ingest_counters.record_rows(
+        "/ingesta/indicadores/batch",
+        len(rows),
+        len(accepted),
+        duplicates if is_new is not None else None,
+    )
+
+    return {
+        "status": "queued" if written is None else "received",
+        "total": len(rows),
+        "accepted": len(accepted),
+        "rejected": len(rows) - len(accepted),
+        "duplicates": duplicates,
+        "raw_files": [
+            {"raw_file": str(path), "rows": count}
+            for path, count in (written or {}).items()
+        ],
+        "results": results,
+    }
+
+
+@app.post("/ingesta/csv/{fuente}")
+async def ingesta_csv(
+    fuente: str,
+    request: Request,
+    idempotency_key: Optional[str] = Header(default=None),
+):
+    """
+    HU1 / HU2: cargar un CSV de origen completo en un solo request.
+
+    ``fuente`` es el nombre del mapeo (viajes_validados, densidad,
+    temperatura, externo_csv). El CSV se parsea y valida por bloques a medida
+    que llega y cada bloque se escribe directo en los segmentos RAW (sin las
+    filas ya ingeridas en una carga anterior).
+    """
+    mapping = SOURCE_MAPPINGS.get(fuente)
+    if mapping is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Fuente desconocida '{fuente}'. Opciones: {', '.join(SOURCE_MAPPINGS)}",
+        )
+
+    total = accepted = duplicates = 0
+    errors: List[dict] = []
+    raw_files: Dict[Path, int] = {}
+
+    async for block in iter_csv_blocks(_csv_upload_chunks(request)):
+        payloads, lines = await run_in_threadpool(
+            _map_and_validate, block, mapping, total + 1, errors
+        )
+        total += len(block)
+        accepted += len(payloads)
+        if payloads:
+            written, is_new = await run_in_threadpool(
+                append_new,
+                raw_writer,
+                dedup_index,
+                payloads,
+                dedup_keys(payloads, idempotency_key, lines),
+            )
+            duplicates += is_new.count(False)
+            for path, count in written.items():
+                raw_files[path] = raw_files.get(path, 0) + count
+    ingest_counters.record_rows(f"/ingesta/csv/{fuente}", total, accepted, duplicates)
+
+    return {
+        "status": "received",
+        "fuente": fuente,
+        "total": total,
+        "accepted": accepted,
+        "rejected": total - accepted,
+        "duplicates": duplicates,
+        "raw_files": [
+            {"raw_file": str(path), "rows": count} for path, count in raw_files.items()
+        ],
+        "errors": errors,
+    }
+
+
+@app.get("/indicadores")
+def listar_indicadores(
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    tramo_id: Optional[str] = None,
+    servicio_code: Optional[str] = None,
+    id_indicador: Optional[str] = None,
+    status: Optional[str] = None,
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=INDICADORES_MAX_LIMIT),
+):
+    """
+    Consulta la versión actual de los indicadores MCP.
+
+    Se responde desde el índice en memoria (ver indicadores_index.py); el dataset
+    silver solo se vuelve a leer cuando el ETL publica una versión nueva.
+    """
+    index = indicadores_index.index
+    total, items = index.query(
+        fecha_desde=fecha_desde.isoformat() if fecha_desde else None,
+        fecha_hasta=fecha_hasta.isoformat() if fecha_hasta else None,
+        tramo_id=tramo_id,
+        servicio_code=servicio_code,
+        id_indicador=id_indicador,
+        status=status,
+        offset=offset,
+        limit=limit,
+    )
+    return {
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "version_cargada": index.loaded_at.isoformat(timespec="seconds"),
+        "items": items,
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """
+    Métricas en formato de texto de Prometheus: contadores vivos de ingesta,
+    estado de la cola y del índice, y métricas por etapa de la última corrida
+    del cálculo MCP y del pipeline completo.
+    """
+    queue_depth = MetricFamily(
+        "mcp_ingest_queue_depth", "gauge", "Lecturas en la cola de group commit"
+    )
+    queue_depth.add(ingest_queue.depth, mode=INGEST_MODE)
+    index_rows = MetricFamily(
+        "mcp_indicadores_index_rows", "gauge", "Filas del índice de indicadores cargado"
+    )
+    index = indicadores_index.index
+    index_rows.add(index.size)
+    index_loaded = MetricFamily(
+        "mcp_indicadores_index_loaded_timestamp_seconds",
+        "gauge",
+        "Momento en que se cargó el índice de indicadores",
+    )
+    index_loaded.add(index.loaded_at.timestamp())
+
+    body = render_metrics(
+        [
+            *ingest_counters.families(),
+            queue_depth,
+            index_rows,
+            index_loaded,
+            *calc_run_families(CALC_RUN_HISTORY),
+            *etl_run_families(ETL_RUN_HISTORY),
+        ]
+    )
+    return Response(content=body, media_type=METRICS_CONTENT_TYPE)
+
+
+@app.post("/jobs/etl/run-all", status_code=202)
+def trigger_run_all_etl():
     """
     Endpoint para disparar el ETL completo (HU1 + HU2) desde la API.
 
-    - Lanza etl/run_all_etl.py en background.
-    - Devuelve inmediatamente una respuesta de "accepted".
+    - Registra un job y lo ejecuta en un worker acotado (ver jobs.py).
+    - Si ya hay un run-all en cola o corriendo, no lanza otro: devuelve ese
+      mismo job con ``attached: true``.
+    - El avance se consulta en GET /jobs/{job_id}.
     """
-    background_tasks.add_task(_run_all_etl_job)
+    job, created = job_registry.trigger("run_all_etl")
 
     return {
         "status": "accepted",
-        "job": "run_all_etl",
-        "detail": "El ETL HU1 + HU2 se está ejecutando en segundo plano.",
+        "job_id": job.id,
+        "job": job.job_type,
+        "state": job.state,
+        "attached": not created,
+        "detail": "El ETL HU1 + HU2 se está ejecutando en segundo plano."
+        if created
+        else "Ya había un ETL HU1 + HU2 en curso; se devuelve ese job.",
         "script": str(RUN_ALL_ETL_SCRIPT),
     }
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Estado, tiempos, returncode y avance por etapa de un job."""
+    job = job_registry.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job desconocido: {job_id}")
+    return job.to_dict()
@@ -0,0 +1,218 @@
+"""Métricas de la API y del pipeline en formato de texto de Prometheus.
+
+``GET /metrics`` expone:
+
+- contadores vivos de ingesta (requests, segundos y filas por endpoint y
+  resultado), acumulados desde que arrancó la API;
+- estado actual de la cola de group commit y del índice de indicadores;
+- las métricas por etapa de la última corrida del cálculo MCP
+  (``logs/calc_mcp_runs.csv``, columna ``etapas``) y de la última corrida
+  del pipeline completo (``logs/etl_runs.csv``).
+
+Los historiales se releen solo cuando cambian (tamaño + mtime).
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Métricas de la columna ``etapas`` del historial del cálculo MCP
+CALC_STAGE_METRICS = (
+    ("seg", "mcp_calc_stage_duration_seconds", "Duración de la etapa", 1),
+    ("archivos", "mcp_calc_stage_files", "Archivos leídos o escritos por la etapa", 1),
+    ("filas", "mcp_calc_stage_rows", "Filas procesadas por la etapa", 1),
+    ("bytes", "mcp_calc_stage_bytes_read", "Bytes leídos por la etapa", 1),
+    ("archivos_por_seg", "mcp_calc_stage_files_per_second", "Archivos por segundo", 1),
+    ("filas_por_seg", "mcp_calc_stage_rows_per_second", "Filas por segundo", 1),
+    ("rss_max_mb", "mcp_calc_stage_peak_rss_bytes", "Pico de RSS de la etapa", 1024 * 1024),
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + body + "}"
+
+
+class MetricFamily:
+    """Una métrica (HELP + TYPE) con sus muestras por combinación de labels."""
+
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.samples: List[Tuple[Dict[str, str], float]] = []
+
+    def add(self, value: float, **labels: str) -> None:
+        self.samples.append((labels, value))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(
+            f"{self.name}{_labels(labels)} {_format_value(value)}"
+            for labels, value in self.samples
+        )
+        return lines
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    lines: List[str] = []
+    for family in families:
+        if family.samples:
+            lines.extend(family.render())
+    return "\n".join(lines) + "\n"
+
+
+class IngestCounters:
+    """Contadores de ingesta compartidos por los endpoints (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._seconds: Dict[str, float] = defaultdict(float)
+        self._rows: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def observe_request(self, endpoint: str, status_code: int, seconds: float) -> None:
+        with self._lock:
+            self._requests[(endpoint, str(status_code))] += 1
+            self._seconds[endpoint] += seconds
+
+    def record_rows(
+        self, endpoint: str, total: int, accepted: int, duplicates: Optional[int]
+    ) -> None:
+        """
+        Filas de un request: ``duplicates`` es None cuando todavía no se sabe
+        (ingesta asíncrona en modo ``queued``).
+        """
+        with self._lock:
+            self._rows[(endpoint, "rejected")] += total - accepted
+            if duplicates is None:
+                self._rows[(endpoint, "queued")] += accepted
+            else:
+                self._rows[(endpoint, "duplicate")] += duplicates
+                self._rows[(endpoint, "written")] += accepted - duplicates
+
+    def families(self) -> List[MetricFamily]:
+        requests = MetricFamily(
+            "mcp_ingest_requests_total", "counter", "Requests de ingesta por endpoint y código"
+        )
+        seconds = MetricFamily(
+            "mcp_ingest_request_seconds_total", "counter", "Segundos atendiendo requests"
+        )
+        rows = MetricFamily(
+            "mcp_ingest_rows_total", "counter", "Filas de ingesta por endpoint y resultado"
+        )
+        with self._lock:
+            for (endpoint, code), count in sorted(self._requests.items()):
+                requests.add(count, endpoint=endpoint, code=code)
+            for endpoint, total in sorted(self._seconds.items()):
+                seconds.add(total, endpoint=endpoint)
+            for (endpoint, result), count in sorted(self._rows.items()):
+                rows.add(count, endpoint=endpoint, resultado=result)
+        return [requests, seconds, rows]
+
+
+class RunHistoryReader:
+    """Últimas filas de un historial CSV, releído solo si el archivo cambió."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._signature: Optional[Tuple[int, int]] = None
+        self._rows: List[dict] = []
+        self._lock = threading.Lock()
+
+    def rows(self) -> List[dict]:
+        with self._lock:
+            try:
+                stat = self.path.stat()
+            except FileNotFoundError:
+                return []
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature != self._signature:
+                with self.path.open(newline="", encoding="utf-8") as fh:
+                    self._rows = list(csv.DictReader(fh))
+                self._signature = signature
+            return self._rows
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def calc_run_families(history: RunHistoryReader) -> List[MetricFamily]:
+    rows = history.rows()
+    if not rows:
+        return []
+    last = rows[-1]
+    duration = MetricFamily(
+        "mcp_calc_last_run_duration_seconds",
+        "gauge",
+        "Duración de la última corrida del cálculo MCP",
+    )
+    value = _to_float(last.get("duracion_seg"))
+    if value is not None:
+        duration.add(value, run_id=last.get("run_id", ""))
+    runs = MetricFamily("mcp_calc_runs_total", "counter", "Corridas registradas del cálculo MCP")
+    runs.add(len(rows))
+
+    stage_families = [
+        (column, MetricFamily(name, "gauge", f"{help_text} (última corrida)"), scale)
+        for column, name, help_text, scale in CALC_STAGE_METRICS
+    ]
+    try:
+        stages = json.loads(last.get("etapas") or "{}")
+    except ValueError:
+        stages = {}
+    for stage, data in stages.items():
+        for column, family, scale in stage_families:
+            if data.get(column) is not None:
+                value = data[column] * scale
+                family.add(round(value) if scale != 1 else value, stage=stage)
+    return [duration, runs, *(family for _, family, _ in stage_families)]
+
+
+def etl_run_families(history: RunHistoryReader) -> List[MetricFamily]:
+    rows = history.rows()
+    if not rows:
+        return []
+    run_id = rows[-1]["run_id"]
+    duration = MetricFamily(
+        "mcp_etl_stage_duration_seconds", "gauge", "Duración de cada etapa del último pipeline"
+    )
+    peak = MetricFamily(
+        "mcp_etl_stage_peak_rss_bytes", "gauge", "Pico de RSS de cada etapa del último pipeline"
+    )
+    ok = MetricFamily("mcp_etl_stage_ok", "gauge", "1 si la etapa del último pipeline terminó ok")
+    for row in rows:
+        if row["run_id"] != run_id:
+            continue
+        labels = {"stage": row["etapa"], "run_id": run_id}
+        value = _to_float(row.get("duracion_seg"))
+        if value is not None:
+            duration.add(value, **labels)
+        value = _to_float(row.get("rss_max_mb"))
+        if value is not None:
+            peak.add(round(value * 1024 * 1024), **labels)
+        ok.add(1 if row.get("status") == "ok" else 0, **labels)
+    return [duration, peak, ok]
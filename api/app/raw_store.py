@@ -0,0 +1,222 @@
+"""Zona RAW: escritor de segmentos NDJSON append-only por partición.
+
+En lugar de un archivo JSON por lectura, cada partición
+``<fuente>/<tipo>/YYYY=/MM=/DD=`` acumula lecturas en un segmento abierto
+``seg_<timestamp>_<pid>.ndjson.open`` (una lectura compacta por línea). El
+segmento rota por tamaño o antigüedad y se sella renombrándolo de forma
+atómica a ``.ndjson``; un segmento sellado ya no se modifica.
+
+Los lectores (``etl/calculo_mcp_indicadores.py``) leen los segmentos sellados,
+las líneas completas de los abiertos y el formato antiguo de un archivo
+``indicadores_<timestamp>.json`` por lectura.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+SEGMENT_PREFIX = "seg_"
+SEALED_SUFFIX = ".ndjson"
+OPEN_SUFFIX = ".ndjson.open"
+
+DEFAULT_MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_SEGMENT_AGE_SEC = 300.0
+
+
+def partition_path(base_path: Path, fuente: str, tipo: str, fecha: date) -> Path:
+    """Carpeta RAW fuente/tipo/YYYY=/MM=/DD= de una lectura."""
+    return (
+        base_path
+        / (fuente or "desconocido")
+        / (tipo or "sin_tipo")
+        / f"YYYY={fecha.year}"
+        / f"MM={fecha.month:02d}"
+        / f"DD={fecha.day:02d}"
+    )
+
+
+def encode_record(payload: dict) -> bytes:
+    """Una lectura como línea NDJSON compacta (sin indentación)."""
+    return (
+        json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n"
+    ).encode("utf-8")
+
+
+class _OpenSegment:
+    __slots__ = ("open_path", "sealed_path", "fh", "size", "opened_at")
+
+    def __init__(self, folder: Path):
+        folder.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        stem = f"{SEGMENT_PREFIX}{timestamp}_{os.getpid()}"
+        self.sealed_path = folder / f"{stem}{SEALED_SUFFIX}"
+        self.open_path = folder / f"{stem}{OPEN_SUFFIX}"
+        self.fh = open(self.open_path, "ab")
+        self.size = 0
+        self.opened_at = time.monotonic()
+
+
+class SegmentWriter:
+    """
+    Escritor append-only de segmentos NDJSON particionados.
+
+    - Cada llamada a ``append`` hace una sola escritura por partición.
+    - Un segmento rota al superar ``max_segment_bytes`` o ``max_segment_age``
+      segundos desde que se abrió.
+    - Sellar = flush (+ fsync opcional) + rename atómico de ``.ndjson.open``
+      a ``.ndjson``.
+
+    Es seguro usarlo desde varios hilos (endpoints síncronos de FastAPI).
+    """
+
+    def __init__(
+        self,
+        base_path: Path,
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        max_segment_age: float = DEFAULT_MAX_SEGMENT_AGE_SEC,
+        fsync: bool = False,
+    ):
+        self.base_path = Path(base_path)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.fsync = fsync
+        self._segments: Dict[Path, _OpenSegment] = {}
+        self._lock = threading.Lock()
+
+    def append(self, payloads: Iterable[dict]) -> Dict[Path, int]:
+        """
+        Agrega lecturas (dicts con ``fecha`` ISO) a sus segmentos.
+
+        Devuelve {ruta sellada del segmento: filas escritas}. La ruta es la
+        que tendrá el segmento una vez sellado.
+        """
+        partitions: Dict[Path, List[bytes]] = defaultdict(list)
+        for payload in payloads:
+            folder = partition_path(
+                self.base_path,
+                payload.get("fuente"),
+                payload.get("tipo_indicador"),
+                date.fromisoformat(payload["fecha"]),
+            )
+            partitions[folder].append(encode_record(payload))
+
+        written: Dict[Path, int] = {}
+        with self._lock:
+            for folder, lines in partitions.items():
+                segment = self._segment_for(folder)
+                data = b"".join(lines)
+                segment.fh.write(data)
+                segment.fh.flush()
+                segment.size += len(data)
+                written[segment.sealed_path] = len(lines)
+                if segment.size >= self.max_segment_bytes:
+                    self._seal(folder)
+        return written
+
+    def flush(self, fsync: bool | None = None) -> None:
+        """Vacía los buffers de los segmentos abiertos (fsync opcional)."""
+        do_fsync = self.fsync if fsync is None else fsync
+        with self._lock:
+            for segment in self._segments.values():
+                segment.fh.flush()
+                if do_fsync:
+                    os.fsync(segment.fh.fileno())
+
+    def seal_expired(self) -> int:
+        """Sella los segmentos abiertos hace más de ``max_segment_age``."""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                folder
+                for folder, segment in self._segments.items()
+                if now - segment.opened_at >= self.max_segment_age
+            ]
+            for folder in expired:
+                self._seal(folder)
+        return len(expired)
+
+    def close(self) -> None:
+        """Sella todos los segmentos abiertos."""
+        with self._lock:
+            for folder in list(self._segments):
+                self._seal(folder)
+
+    def _segment_for(self, folder: Path) -> _OpenSegment:
+        segment = self._segments.get(folder)
+        if segment is not None and (
+            time.monotonic() - segment.opened_at >= self.max_segment_age
+        ):
+            self._seal(folder)
+            segment = None
+        if segment is None:
+            segment = _OpenSegment(folder)
+            self._segments[folder] = segment
+        return segment
+
+    def _seal(self, folder: Path) -> None:
+        segment = self._segments.pop(folder)
+        segment.fh.flush()
+        if self.fsync:
+            os.fsync(segment.fh.fileno())
+        segment.fh.close()
+        if segment.size == 0:
+            segment.open_path.unlink(missing_ok=True)
+            return
+        os.replace(segment.open_path, segment.sealed_path)
+        logging.info(
+            "Segmento RAW sellado: %s (%s bytes)", segment.sealed_path, segment.size
+        )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover_open_segments(base_path: Path) -> int:
+    """
+    Sella segmentos ``.ndjson.open`` que dejó un proceso que ya no existe.
+
+    Se descarta una posible última línea incompleta (escritura cortada) antes
+    de sellar. Devuelve la cantidad de segmentos recuperados.
+    """
+    base_path = Path(base_path)
+    if not base_path.exists():
+        return 0
+
+    recovered = 0
+    for open_path in base_path.rglob(f"{SEGMENT_PREFIX}*{OPEN_SUFFIX}"):
+        stem = open_path.name[: -len(OPEN_SUFFIX)]
+        try:
+            pid = int(stem.rsplit("_", 1)[1])
+        except (IndexError, ValueError):
+            continue
+        if pid == os.getpid() or _pid_alive(pid):
+            continue
+
+        data = open_path.read_bytes()
+        complete = data[: data.rfind(b"\n") + 1]
+        if len(complete) != len(data):
+            with open(open_path, "r+b") as fh:
+                fh.truncate(len(complete))
+        if not complete:
+            open_path.unlink(missing_ok=True)
+            continue
+        os.replace(open_path, open_path.with_name(stem + SEALED_SUFFIX))
+        recovered += 1
+        logging.warning("Segmento RAW huérfano recuperado: %s", open_path)
+
+    return recovered
@@ -0,0 +1,79 @@
+"""Lectura de segmentos columnares ``.seg``, reutilizable fuera del ETL.
+
+El formato lo escribe ``etl/raw_segments.py`` (compactación RAW y
+particiones del dataset silver); aquí vive solo el lado de lectura para que
+la API lea el dataset silver sin depender de ``etl/``. ``etl/raw_segments.py``
+importa estas funciones en lugar de duplicarlas.
+
+Solo stdlib.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+MAGIC = b"MCPSEG01"
+MISSING = 0xFFFFFFFF
+
+TRAILER = struct.Struct("<I")
+
+
+def read_footer(path: Path) -> dict:
+    """Lee solo el footer de un segmento (ValueError si el archivo no es válido)."""
+    tail = len(MAGIC) + TRAILER.size
+    with path.open("rb") as fh:
+        fh.seek(0, os.SEEK_END)
+        size = fh.tell()
+        if size < len(MAGIC) + tail:
+            raise ValueError(f"Segmento truncado: {path}")
+        fh.seek(size - tail)
+        trailer = fh.read(tail)
+        if trailer[TRAILER.size :] != MAGIC:
+            raise ValueError(f"Segmento sin trailer válido: {path}")
+        (footer_length,) = TRAILER.unpack(trailer[: TRAILER.size])
+        fh.seek(size - tail - footer_length)
+        return json.loads(fh.read(footer_length))
+
+
+def iter_segment(path: Path) -> Iterator[Tuple[dict, Path, int]]:
+    """Reconstruye las lecturas de un segmento: (lectura, archivo, fila)."""
+    data = path.read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"Segmento sin cabecera válida: {path}")
+    footer = read_footer(path)
+    swap = footer.get("byteorder", sys.byteorder) != sys.byteorder
+
+    columns: List[Tuple[str, Optional[array], list]] = []
+    for name, meta in footer["columns"].items():
+        start = meta["offset"]
+        if meta["kind"] in ("int64", "float64"):
+            values = array("q" if meta["kind"] == "int64" else "d")
+            values.frombytes(data[start : start + meta["length"]])
+            if swap:
+                values.byteswap()
+            columns.append((name, None, values.tolist()))
+        else:
+            split = start + meta["codes_length"]
+            codes = array("I")
+            codes.frombytes(data[start:split])
+            if swap:
+                codes.byteswap()
+            dictionary = json.loads(data[split : start + meta["length"]])
+            columns.append((name, codes, dictionary))
+
+    for i in range(footer["rows"]):
+        row = {}
+        for name, codes, values in columns:
+            if codes is None:
+                row[name] = values[i]
+            else:
+                code = codes[i]
+                if code != MISSING:
+                    row[name] = values[code]
+        yield row, path, i + 1
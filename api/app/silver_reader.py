@@ -0,0 +1,116 @@
+"""Lectura del dataset silver de indicadores MCP, reutilizable fuera del ETL.
+
+El dataset lo escribe ``etl/silver_store.py`` (ver su docstring para el
+layout). Aquí vive solo el lado de lectura: seguir el puntero
+``_current.json`` hasta el manifiesto de la versión y reconstruir cada fecha
+desde su checkpoint más los deltas que lista. La API lo usa para el índice
+de ``GET /indicadores`` y ``SilverStore`` lo extiende con la escritura.
+
+Solo stdlib.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .segment_reader import iter_segment
+
+SILVER_DATASET_DIR = Path("data/silver/mcp_indicadores")
+
+# Cada indicador llena tramo_id o servicio_code según su campo de agrupación
+KEY_FIELDS = ("id_indicador", "tramo_id", "servicio_code", "fecha")
+OP_FIELD = "_op"
+
+FIELDS = [
+    "id_indicador",
+    "tramo_id",
+    "servicio_code",
+    "fecha",
+    "valor_calculado",
+    "muestras",
+    "valor_referencia",
+    "delta",
+    "status",
+]
+
+
+def row_key(row: dict) -> Tuple[object, ...]:
+    return tuple(row.get(field) for field in KEY_FIELDS)
+
+
+def apply_delta(rows: List[dict], delta: List[dict]) -> List[dict]:
+    """
+    Aplica un delta: las filas modificadas conservan su posición, las nuevas
+    se agregan al final y las eliminadas se quitan.
+    """
+    by_key = {row_key(row): row for row in rows}
+    for change in delta:
+        key = row_key(change)
+        if change.get(OP_FIELD) == "d":
+            by_key.pop(key, None)
+        else:
+            by_key[key] = {field: change.get(field) for field in FIELDS}
+    return list(by_key.values())
+
+
+class SilverReader:
+    """Versiones publicadas del dataset silver, solo lectura."""
+
+    def __init__(self, root: Path = SILVER_DATASET_DIR):
+        self.root = Path(root)
+        self.current_path = self.root / "_current.json"
+        self.versions_dir = self.root / "versions"
+        self.parts_dir = self.root / "parts"
+
+    def read_pointer(self) -> Optional[dict]:
+        try:
+            return json.loads(self.current_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def load_manifest(self, path: Optional[Path] = None) -> Optional[dict]:
+        """Manifiesto de ``path`` (por defecto el de la versión actual); None si no existe."""
+        if path is None:
+            pointer = self.read_pointer()
+            if pointer is None:
+                return None
+            if "partitions" in pointer:
+                # Formato anterior: _current.json era una copia del manifiesto
+                return pointer
+            path = self.root / pointer["manifest"]
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def version_path(self, version_id: str) -> Path:
+        return self.versions_dir / f"{version_id}.json"
+
+    def current_version(self) -> Optional[str]:
+        pointer = self.read_pointer()
+        return pointer["version_id"] if pointer else None
+
+    def read_fecha(self, fecha: str, manifest: Optional[dict]) -> List[dict]:
+        """Filas de una fecha en la versión ``manifest`` ([] si no la tiene)."""
+        if manifest is None:
+            return []
+        entry = manifest["partitions"].get(fecha)
+        if entry is None:
+            return []
+        rows = self._read_file(entry["path"])
+        for delta_path in entry.get("deltas", []):
+            rows = apply_delta(rows, self._read_file(delta_path))
+        return rows
+
+    def _read_file(self, relative: str) -> List[dict]:
+        return [row for row, _, _ in iter_segment(self.root / relative)]
+
+    def iter_rows(self, manifest: Optional[dict] = None) -> Iterator[dict]:
+        """Todas las filas de una versión (la actual por defecto), por fecha."""
+        manifest = manifest if manifest is not None else self.load_manifest()
+        if manifest is None:
+            return
+        for fecha in sorted(manifest["partitions"]):
+            yield from self.read_fecha(fecha, manifest)
@@ -0,0 +1,375 @@
+"""Benchmarks micro y macro del pipeline MCP sobre datos sintéticos.
+
+Genera (o reutiliza) un árbol de datos con ``generar_datos.py`` en una
+carpeta de trabajo, se ubica en ella (los módulos de ``etl/`` usan rutas
+relativas a ``data/``) y mide:
+
+- ``save_raw_file``: escritura de lecturas de a una por el camino de la API;
+- ``iter_raw_records.<fuente>``: lectura y parseo de RAW;
+- ``aggregate_records.<backend>.<fuente>``: agrupación (sobre lecturas ya
+  cargadas en memoria, para separar el costo de lectura);
+- ``calc_indicator.<indicador>`` y ``attach_reference.<indicador>``;
+- ``write_results``: escritura y publicación de una versión silver completa;
+- ``main.full`` y ``main.incremental``: el cálculo de punta a punta (el
+  incremental sin lecturas nuevas mide el costo fijo de una corrida).
+
+Cada benchmark se repite ``--repeticiones`` veces; se guarda el mínimo y la
+mediana. Los resultados van a un JSON (``--salida``) y se comparan contra
+``bench/baseline.json``: si el mínimo de algún benchmark (menos sensible al
+ruido de la máquina que la mediana) supera al del baseline en más del
+umbral (``umbral`` del baseline, ``umbrales`` por benchmark o
+``--umbral``), el comando sale con código 1. Solo se comparan corridas con
+la misma configuración de datos (escala y semilla). Los benchmarks que
+tardan menos que ``MIN_SECONDS`` no se marcan como regresión (son ruido de
+medición).
+
+Cada corrida mide además una carga fija de CPU (``calibracion_seg``) y los
+tiempos se comparan normalizados por ella, así una máquina más lenta o más
+cargada que la del baseline no aparece como regresión de todo el pipeline
+(``--sin-normalizar`` compara tiempos absolutos).
+
+Uso:
+    python bench/benchmarks.py [--lecturas 2000 --dias 14] [--filtro calc_] [--actualizar-baseline]
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import gc
+import json
+import logging
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Raíz del proyecto en sys.path para importar api/ y etl/
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from bench.generar_datos import GeneratorConfig, config_from_args, generate
+from etl import calculo_mcp_indicadores as calc
+from etl.indicadores_registry import RAW_SOURCES, group_fields_for, indicators_for, needs_sketch
+from etl.reference_cache import ReferenceCache
+
+BASELINE_FILE = BASE_DIR / "bench" / "baseline.json"
+RESULTS_DIR = BASE_DIR / "bench" / "resultados"
+DEFAULT_THRESHOLD = 0.25
+MIN_SECONDS = 0.01
+SAVE_RAW_FILE_ROWS = 2000
+# Configuración con la que se generaron los datos de la carpeta de trabajo
+WORKDIR_MARKER = "bench_config.json"
+
+# (nombre, función a medir, filas procesadas por corrida)
+Benchmark = Tuple[str, Callable[[], object], int]
+
+
+def _time(func: Callable[[], object], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def calibrate(repeat: int = 10) -> float:
+    """Tiempo mínimo de una carga fija en Python puro (dicts, floats, strings)."""
+
+    def workload() -> None:
+        groups: Dict[str, float] = {}
+        for i in range(200_000):
+            key = f"T{i % 97:03d}"
+            groups[key] = groups.get(key, 0.0) + (i % 13) * 0.5
+        sorted(groups.items())
+
+    return min(_time(workload, repeat))
+
+
+def _consume(iterator) -> int:
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+def save_raw_file_benchmarks(workdir: Path) -> List[Benchmark]:
+    """Ingesta de a una lectura por ``save_raw_file`` (requiere las dependencias de la API)."""
+    try:
+        from api.app import main as api_main
+        from api.app.models import Indicador
+        from api.app.raw_store import SegmentWriter
+    except ImportError as exc:
+        logging.warning("save_raw_file no se mide: %s", exc)
+        return []
+
+    fuente, tipo = RAW_SOURCES["densidad"]
+    records = calc.iter_raw_records(fuente, tipo)
+    indicadores = []
+    for record, _, _ in records:
+        indicadores.append(Indicador.model_validate(record))
+        if len(indicadores) >= SAVE_RAW_FILE_ROWS:
+            break
+    # Escribe en una carpeta aparte (vacía en cada corrida) para no alterar el
+    # RAW que leen los demás benchmarks
+    shutil.rmtree(workdir / "bench_ingesta", ignore_errors=True)
+    api_main.raw_writer = SegmentWriter(workdir / "bench_ingesta" / "raw")
+
+    def run() -> None:
+        for indicador in indicadores:
+            api_main.save_raw_file(indicador)
+
+    return [("save_raw_file", run, len(indicadores))]
+
+
+def build_benchmarks(workdir: Path, backends: List[str]) -> List[Benchmark]:
+    benchmarks: List[Benchmark] = list(save_raw_file_benchmarks(workdir))
+    reference_cache = ReferenceCache(calc.REFERENCE_CACHE_DIR)
+    recomputed: Dict[str, List[dict]] = {}
+
+    for name, (fuente, tipo) in calc.RAW_SOURCES.items():
+        records = list(calc.iter_raw_records(fuente, tipo))
+        benchmarks.append(
+            (
+                f"iter_raw_records.{name}",
+                lambda fuente=fuente, tipo=tipo: _consume(calc.iter_raw_records(fuente, tipo)),
+                len(records),
+            )
+        )
+        group_fields = group_fields_for(name)
+        for backend in backends:
+            benchmarks.append(
+                (
+                    f"aggregate_records.{backend}.{name}",
+                    lambda records=records, backend=backend, fields=group_fields, name=name: (
+                        calc.aggregate_records(
+                            records,
+                            backend=backend,
+                            group_fields=fields,
+                            with_sketches=needs_sketch(name),
+                        )
+                    ),
+                    len(records),
+                )
+            )
+
+        field_groups, _ = calc.aggregate_records(
+            records, group_fields=group_fields, with_sketches=needs_sketch(name)
+        )
+        for spec in indicators_for(name):
+            groups = field_groups[spec.group_field]
+            benchmarks.append(
+                (
+                    f"calc_indicator.{spec.indicator_id}",
+                    lambda spec=spec, groups=groups: calc.calc_indicator(spec, groups),
+                    len(groups),
+                )
+            )
+            rows = calc.calc_indicator(spec, groups)
+            benchmarks.append(
+                (
+                    f"attach_reference.{spec.indicator_id}",
+                    lambda spec=spec, rows=rows: calc.attach_reference(
+                        spec, rows, reference_cache
+                    ),
+                    len(rows),
+                )
+            )
+            for row in rows:
+                recomputed.setdefault(row["fecha"], []).append(row)
+
+    total_rows = sum(len(rows) for rows in recomputed.values())
+    benchmarks.append(
+        ("write_results", lambda: calc.write_results(copy.deepcopy(recomputed)), total_rows)
+    )
+    total_readings = sum(rows for name, _, rows in benchmarks if name.startswith("iter_raw"))
+    benchmarks.append(("main.full", lambda: calc.main(full=True), total_readings))
+    benchmarks.append(("main.incremental", lambda: calc.main(), 0))
+    return benchmarks
+
+
+def prepare_workdir(workdir: Path, config: GeneratorConfig, regenerate: bool) -> None:
+    """
+    Reutiliza los datos de ``workdir`` si se generaron con la misma
+    configuración; si no, los regenera. Nunca borra una carpeta que no haya
+    creado este comando (sin marcador).
+    """
+    marker = workdir / WORKDIR_MARKER
+    if marker.exists():
+        if not regenerate and json.loads(marker.read_text()) == asdict(config):
+            return
+        for name in ("data", "logs", "bench_ingesta"):
+            shutil.rmtree(workdir / name, ignore_errors=True)
+        marker.unlink()
+    elif (workdir / "data").exists():
+        raise SystemExit(f"{workdir} ya tiene un data/ que no generó el benchmark")
+    logging.warning("Generando datos sintéticos en %s", workdir)
+    generate(workdir, config)
+    marker.write_text(json.dumps(asdict(config)), encoding="utf-8")
+
+
+def run_suite(
+    workdir: Path,
+    config: GeneratorConfig,
+    repeat: int,
+    pattern: Optional[str] = None,
+    regenerate: bool = False,
+) -> dict:
+    prepare_workdir(workdir, config, regenerate)
+    os.chdir(workdir)
+
+    backends = ["python"]
+    if calc.resolve_backend("numpy") == "numpy":
+        backends.append("numpy")
+    selected = re.compile(pattern) if pattern else None
+
+    # Se calibra antes y después de la suite y se toma el mínimo: un pico de
+    # carga puntual en la calibración sesgaría todas las comparaciones
+    calibration = calibrate()
+    results: Dict[str, dict] = {}
+    for name, func, rows in build_benchmarks(workdir, backends):
+        if selected is not None and not selected.search(name):
+            continue
+        timings = _time(func, repeat)
+        median = statistics.median(timings)
+        results[name] = {
+            "seg_min": round(min(timings), 6),
+            "seg_mediana": round(median, 6),
+            "repeticiones": repeat,
+            "filas": rows,
+            "filas_por_seg": round(rows / median, 1) if median > 0 else None,
+        }
+        logging.warning(
+            "%-40s %10.4fs  %12s filas/s", name, median, results[name]["filas_por_seg"]
+        )
+    calibration = min(calibration, calibrate())
+
+    return {
+        "creado": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPU",
+        "config": asdict(config),
+        "calibracion_seg": round(calibration, 6),
+        "resultados": results,
+    }
+
+
+def compare(
+    report: dict, baseline: dict, threshold: Optional[float], normalize: bool = True
+) -> List[str]:
+    """Benchmarks que empeoraron más que su umbral respecto del baseline."""
+    default = threshold if threshold is not None else baseline.get("umbral", DEFAULT_THRESHOLD)
+    overrides = baseline.get("umbrales", {})
+    # Factor de velocidad de esta máquina respecto de la del baseline
+    speed = 1.0
+    if normalize and report.get("calibracion_seg") and baseline.get("calibracion_seg"):
+        speed = report["calibracion_seg"] / baseline["calibracion_seg"]
+        print(f"  (calibración: esta corrida es x{speed:.2f} respecto del baseline)")
+    regressions = []
+    for name, result in sorted(report["resultados"].items()):
+        base = baseline["resultados"].get(name)
+        if base is None:
+            print(f"  {name:<40} (sin baseline)")
+            continue
+        limit = overrides.get(name, default)
+        current, previous = result["seg_min"], base["seg_min"] * speed
+        ratio = current / previous if previous > 0 else float("inf")
+        regressed = ratio > 1 + limit and current - previous > MIN_SECONDS
+        print(
+            f"  {name:<40} {previous:>10.4f}s -> {current:>10.4f}s  "
+            f"{(ratio - 1) * 100:+7.1f}% (umbral {limit * 100:.0f}%)"
+            f"{'  REGRESIÓN' if regressed else ''}"
+        )
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline MCP")
+    parser.add_argument("--workdir", type=Path, help="Carpeta de datos (por defecto, temporal).")
+    parser.add_argument("--regenerar", action="store_true", help="Vuelve a generar los datos.")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--filtro", help="Regex: solo los benchmarks cuyo nombre coincide.")
+    parser.add_argument("--salida", type=Path, help="JSON de resultados.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument(
+        "--umbral", type=float, help="Regresión tolerada (0.25 = 25%%) para todos los benchmarks."
+    )
+    parser.add_argument(
+        "--sin-normalizar",
+        action="store_true",
+        help="Compara tiempos absolutos, sin normalizar por la calibración.",
+    )
+    parser.add_argument(
+        "--actualizar-baseline",
+        action="store_true",
+        help="Guarda los resultados como baseline (conserva los umbrales).",
+    )
+    for name in ("seed", "lecturas", "tramos", "servicios", "dias"):
+        parser.add_argument(f"--{name}", type=int, default=getattr(defaults, name))
+    parser.add_argument("--desde", default=defaults.desde)
+    parser.add_argument("--duplicados", type=float, default=defaults.duplicados)
+    parser.add_argument("--invalidos", type=float, default=defaults.invalidos)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    # WARNING para silenciar el log INFO del cálculo; el progreso sale como WARNING
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    config = config_from_args(args)
+    workdir = (args.workdir or Path(tempfile.mkdtemp(prefix="mcp_bench_"))).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    report = run_suite(workdir, config, args.repeticiones, args.filtro, args.regenerar)
+
+    output = args.salida or RESULTS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output = output if output.is_absolute() else BASE_DIR / output
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Resultados en {output}")
+
+    if args.actualizar_baseline:
+        previous = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        report["umbral"] = previous.get("umbral", DEFAULT_THRESHOLD)
+        report["umbrales"] = previous.get("umbrales", {})
+        args.baseline.write_text(
+            json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8"
+        )
+        print(f"Baseline actualizado: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"Sin baseline en {args.baseline}: usar --actualizar-baseline para crearlo")
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("config") != report["config"]:
+        print(
+            "La configuración de datos no coincide con la del baseline "
+            f"({baseline.get('config')}): no se compara"
+        )
+        return 2
+    print(f"Comparación contra {args.baseline}:")
+    regressions = compare(report, baseline, args.umbral, normalize=not args.sin_normalizar)
+    if regressions:
+        print(f"Regresiones: {', '.join(regressions)}")
+        return 1
+    print("Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
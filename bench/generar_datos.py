@@ -0,0 +1,307 @@
+"""Generador de datos sintéticos para medir el pipeline MCP a escala.
+
+Genera, a partir de una semilla (misma semilla + parámetros = mismos datos):
+
+- ``data/input/*.csv``: los CSV de origen que leen las ingestas internas y
+  la externa, con una fracción de filas duplicadas (``--duplicados``) e
+  inválidas (``--invalidos``: valor no numérico, fecha mal formada o código
+  de filial vacío), que las ingestas informan como error por fila;
+- ``data/raw/<fuente>/<tipo>/YYYY=/MM=/DD=``: lo que dejaría la ingesta con
+  deduplicación (sin duplicados ni inválidos), en segmentos NDJSON sellados
+  escritos con el mismo ``SegmentWriter`` que usa la API;
+- ``data/reference/mcp_reference_<indicador>.csv``: referencias para cada
+  indicador registrado que tiene dataset de referencia, cubriendo una
+  fracción de los grupos (``cobertura_referencias``), con una fracción
+  ``desvios`` desviada.
+
+Los valores siguen patrones plausibles: densidad con menos carga el fin de
+semana, temperatura con estacionalidad (hemisferio sur) y offset por tramo,
+y viajes validados enteros por servicio.
+
+Uso:
+    python bench/generar_datos.py --salida /tmp/mcp_bench --lecturas 10000 --tramos 50 --dias 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import random
+import sys
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+# Raíz del proyecto en sys.path para importar api/ y etl/
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from api.app.raw_store import SegmentWriter
+from etl.indicadores_registry import INDICATORS, RAW_SOURCES
+
+FILIALES = ("VA", "BI", "FE", "TM")
+TIPOS_EXTERNOS = ("puntualidad", "ocupacion")
+
+# Columnas de cada CSV de origen (las que leen los scripts de etl/internal y etl/external)
+_BASE_COLUMNS = ("fecha", "filial_code", "servicio_code")
+INPUT_FILES = {
+    "viajes": ("viajes_validados.csv", (*_BASE_COLUMNS, "viajes_validados")),
+    "densidad": ("densidad.csv", (*_BASE_COLUMNS, "tramo_id", "densidad")),
+    "temperatura": ("temperatura.csv", (*_BASE_COLUMNS, "tramo_id", "temperatura")),
+    "externo": ("external.csv", (*_BASE_COLUMNS, "tipo_indicador", "valor")),
+}
+VALUE_COLUMN = {
+    "viajes": "viajes_validados",
+    "densidad": "densidad",
+    "temperatura": "temperatura",
+    "externo": "valor",
+}
+
+
+@dataclass(frozen=True)
+class GeneratorConfig:
+    seed: int = 42
+    lecturas: int = 2000  # lecturas por fuente y día
+    tramos: int = 50
+    servicios: int = 10
+    dias: int = 14
+    desde: str = "2025-01-01"
+    duplicados: float = 0.01
+    invalidos: float = 0.005
+    cobertura_referencias: float = 0.9
+    desvios: float = 0.2
+
+
+class _Network:
+    """Tramos y servicios con su nivel base, fijos para una semilla."""
+
+    def __init__(self, rng: random.Random, config: GeneratorConfig):
+        self.tramos = [f"T{i:03d}" for i in range(1, config.tramos + 1)]
+        self.servicios = [f"{i:02d}" for i in range(1, config.servicios + 1)]
+        self.servicio_de = {tramo: rng.choice(self.servicios) for tramo in self.tramos}
+        self.filial_de = {servicio: rng.choice(FILIALES) for servicio in self.servicios}
+        self.densidad_base = {tramo: rng.uniform(5, 35) for tramo in self.tramos}
+        self.temp_offset = {tramo: rng.gauss(0, 2.5) for tramo in self.tramos}
+        self.viajes_base = {servicio: rng.uniform(20, 200) for servicio in self.servicios}
+
+
+def _weekday_factor(fecha: date) -> float:
+    return 0.6 if fecha.weekday() >= 5 else 1.0
+
+
+def _seasonal_temp(fecha: date) -> float:
+    # Máximo a mediados de enero, mínimo a mediados de julio
+    day = fecha.timetuple().tm_yday
+    return 17 + 9 * math.cos(2 * math.pi * (day - 15) / 365)
+
+
+def _readings(
+    source: str, fecha: date, rng: random.Random, net: _Network, count: int
+) -> Iterator[dict]:
+    iso = fecha.isoformat()
+    factor = _weekday_factor(fecha)
+    for _ in range(count):
+        if source == "viajes":
+            servicio = rng.choice(net.servicios)
+            value = max(0, round(rng.gauss(net.viajes_base[servicio] * factor, 15)))
+            yield {
+                "fecha": iso,
+                "filial_code": net.filial_de[servicio],
+                "servicio_code": servicio,
+                "valor": float(value),
+            }
+            continue
+        tramo = rng.choice(net.tramos)
+        servicio = net.servicio_de[tramo]
+        if source == "densidad":
+            value = max(0.0, rng.gauss(net.densidad_base[tramo] * factor, 3))
+        elif source == "temperatura":
+            value = rng.gauss(_seasonal_temp(fecha) + net.temp_offset[tramo], 2)
+        else:
+            value = rng.uniform(0, 100)
+        yield {
+            "fecha": iso,
+            "filial_code": net.filial_de[servicio],
+            "servicio_code": servicio,
+            "tramo_id": tramo,
+            "tipo_indicador": rng.choice(TIPOS_EXTERNOS),
+            "valor": round(value, 2),
+        }
+
+
+def _input_row(source: str, reading: dict) -> dict:
+    _, columns = INPUT_FILES[source]
+    row = {column: reading.get(column) for column in columns}
+    value = reading["valor"]
+    row[VALUE_COLUMN[source]] = int(value) if source == "viajes" else value
+    return row
+
+
+def _corrupt(row: dict, source: str, rng: random.Random) -> dict:
+    row = dict(row)
+    kind = rng.randrange(3)
+    if kind == 0:
+        row[VALUE_COLUMN[source]] = "n/a"
+    elif kind == 1:
+        row["fecha"] = row["fecha"].replace("-", "/")
+    else:
+        row["filial_code"] = ""
+    return row
+
+
+def _raw_payload(source: str, reading: dict) -> dict:
+    if source == "externo":
+        fuente, tipo = "externo_csv", reading["tipo_indicador"]
+    else:
+        fuente, tipo = RAW_SOURCES[source]
+    return {
+        "fecha": reading["fecha"],
+        "filial_code": reading["filial_code"],
+        "servicio_code": reading["servicio_code"],
+        "tipo_indicador": tipo,
+        "valor": float(reading["valor"]),
+        "fuente": fuente,
+        "tramo_id": None if source in ("viajes", "externo") else reading.get("tramo_id"),
+    }
+
+
+def generate(
+    out_dir: Path, config: GeneratorConfig, raw: bool = True, inputs: bool = True
+) -> dict:
+    """Escribe el árbol de datos bajo ``out_dir``; devuelve conteos por fuente."""
+    out_dir = Path(out_dir)
+    start = date.fromisoformat(config.desde)
+    fechas = [start + timedelta(days=offset) for offset in range(config.dias)]
+    net = _Network(random.Random(config.seed), config)
+    counts: Dict[str, Dict[str, int]] = {}
+    # [suma, cantidad] por (fuente, clave, fecha) para generar referencias cercanas
+    group_values: Dict[Tuple[str, str, str], List[float]] = {}
+
+    input_dir = out_dir / "data" / "input"
+    input_dir.mkdir(parents=True, exist_ok=True)
+    writer = SegmentWriter(out_dir / "data" / "raw") if raw else None
+    try:
+        for index, source in enumerate(INPUT_FILES):
+            # Una semilla por fuente: cambiar la escala de una no altera las otras
+            rng = random.Random(config.seed * 1009 + index)
+            filename, columns = INPUT_FILES[source]
+            stats = {"lecturas": 0, "filas_csv": 0, "duplicados": 0, "invalidos": 0}
+            fh = None
+            if inputs:
+                fh = (input_dir / filename).open("w", newline="", encoding="utf-8")
+            try:
+                csv_writer = csv.DictWriter(fh, fieldnames=columns) if fh else None
+                if csv_writer:
+                    csv_writer.writeheader()
+                for fecha in fechas:
+                    payloads = []
+                    for reading in _readings(source, fecha, rng, net, config.lecturas):
+                        stats["lecturas"] += 1
+                        payloads.append(_raw_payload(source, reading))
+                        if source in RAW_SOURCES:
+                            key = reading.get("tramo_id") or reading["servicio_code"]
+                            group = (source, key, reading["fecha"])
+                            acc = group_values.setdefault(group, [0.0, 0])
+                            acc[0] += reading["valor"]
+                            acc[1] += 1
+                        if csv_writer is None:
+                            continue
+                        row = _input_row(source, reading)
+                        csv_writer.writerow(row)
+                        stats["filas_csv"] += 1
+                        if rng.random() < config.duplicados:
+                            csv_writer.writerow(row)
+                            stats["filas_csv"] += 1
+                            stats["duplicados"] += 1
+                        if rng.random() < config.invalidos:
+                            csv_writer.writerow(_corrupt(row, source, rng))
+                            stats["filas_csv"] += 1
+                            stats["invalidos"] += 1
+                    if writer is not None:
+                        writer.append(payloads)
+            finally:
+                if fh:
+                    fh.close()
+            counts[source] = stats
+    finally:
+        if writer is not None:
+            writer.close()
+
+    counts["referencias"] = _write_references(out_dir, config, group_values)
+    return counts
+
+
+def _write_references(
+    out_dir: Path,
+    config: GeneratorConfig,
+    group_values: Dict[Tuple[str, str, str], List[float]],
+) -> int:
+    rng = random.Random(config.seed * 7919)
+    ref_dir = out_dir / "data" / "reference"
+    ref_dir.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for spec in INDICATORS:
+        if spec.reference_file is None:
+            continue
+        with (ref_dir / spec.reference_file).open("w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow([spec.group_field, "fecha", "valor_ref"])
+            for (source, key, fecha), (total, count) in sorted(group_values.items()):
+                if source != spec.source or rng.random() >= config.cobertura_referencias:
+                    continue
+                value = total if spec.reducer == "sum" else total / count
+                # Para media y suma la referencia coincide con el cálculo (status
+                # ok) salvo en una fracción ``desvios``; el resto siempre se desvía
+                if spec.reducer not in ("sum", "mean") or rng.random() < config.desvios:
+                    value = round(value * rng.uniform(0.9, 1.1), 4)
+                writer.writerow([key, fecha, value])
+                written += 1
+    return written
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = GeneratorConfig()
+    parser = argparse.ArgumentParser(description="Datos sintéticos para el pipeline MCP")
+    parser.add_argument(
+        "--salida", type=Path, required=True, help="Carpeta raíz del árbol data/."
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument(
+        "--lecturas", type=int, default=defaults.lecturas, help="Lecturas por fuente y día."
+    )
+    parser.add_argument("--tramos", type=int, default=defaults.tramos)
+    parser.add_argument("--servicios", type=int, default=defaults.servicios)
+    parser.add_argument("--dias", type=int, default=defaults.dias)
+    parser.add_argument("--desde", default=defaults.desde, help="Primera fecha (YYYY-MM-DD).")
+    parser.add_argument(
+        "--duplicados",
+        type=float,
+        default=defaults.duplicados,
+        help="Fracción de filas repetidas en data/input.",
+    )
+    parser.add_argument(
+        "--invalidos",
+        type=float,
+        default=defaults.invalidos,
+        help="Fracción de filas inválidas en data/input.",
+    )
+    parser.add_argument("--sin-raw", action="store_true", help="Solo genera data/input.")
+    parser.add_argument("--sin-input", action="store_true", help="Solo genera data/raw.")
+    return parser.parse_args()
+
+
+def config_from_args(args: argparse.Namespace) -> GeneratorConfig:
+    fields = GeneratorConfig.__dataclass_fields__
+    return GeneratorConfig(**{name: getattr(args, name) for name in fields if hasattr(args, name)})
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = config_from_args(args)
+    counts = generate(args.salida, config, raw=not args.sin_raw, inputs=not args.sin_input)
+    print(f"Datos generados en {args.salida} con {asdict(config)}")
+    for source, stats in counts.items():
+        print(f"  {source}: {stats}")
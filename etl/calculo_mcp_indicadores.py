@@ -1,62 +1,133 @@
 """Calculo de indicadores MCP a partir de lecturas RAW.
 
-Lee los archivos JSON generados por la API en data/raw/<fuente>/<tipo>/YYYY=... y
+Lee los segmentos NDJSON (y los JSON de una lectura del formato antiguo)
+generados por la API en data/raw/<fuente>/<tipo>/YYYY=... y
 agrega las métricas necesarias (densidad promedio, temperatura máxima, rango
-térmico). Luego compara con los datasets de referencia ubicados en
-data/reference y genera un CSV de salida en data/silver/ con el resultado y la
-validación.
+térmico) en una sola pasada por fuente, con acumuladores por (tramo, fecha).
+Luego compara con los datasets de referencia ubicados en data/reference y publica el resultado y la
+validación como nueva versión del dataset silver particionado por fecha
+(data/silver/mcp_indicadores/, ver silver_store.py).
 """
 
 from __future__ import annotations
 
+import argparse
 import csv
 import json
 import logging
-import shutil  # nuevo import
+import math
+import os
+import sys
 from collections import defaultdict
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
+# Raíz del proyecto en sys.path para importar los módulos de etl/
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
 
 RAW_PATH = Path("data/raw")
+# Particiones compactadas y archivadas por la retención (mismo layout que RAW)
+ARCHIVE_RAW_PATH = Path("data/archive/raw")
+RAW_ROOTS = (RAW_PATH, ARCHIVE_RAW_PATH)
 REFERENCE_DIR = Path("data/reference")
 OUTPUT_DIR = Path("data/silver")
 LOG_DIR = Path("logs")
 RUN_HISTORY_FILE = LOG_DIR / "calc_mcp_runs.csv"
 
+from etl.indicadores_registry import (
+    GROUP_FIELDS,
+    INDICATOR_SOURCE,
+    INDICATORS,
+    REDUCERS,
+    IndicatorSpec,
+    active_sources,
+    group_fields_for,
+    indicators_for,
+    needs_sketch,
+)
+from etl.pipeline_lock import pipeline_lock
+from etl.process_pool import pool_context
+from etl.quantile_sketch import QuantileSketch
+from etl.raw_segments import (
+    RAW_PATTERNS,
+    SEGMENT_SUFFIX,
+    iter_segment,
+    live_raw_files,
+    read_footer,
+    segment_may_match,
+)
+from etl.reference_cache import ReferenceCache, ReferenceTable, join_reference
+from etl.run_metrics import RunMetrics
+from etl.silver_store import SilverStore
+from etl.version_catalog import VersionCatalog
+
+# Etapas medidas en cada corrida (ver run_metrics.py); group y calc se
+# desglosan por fuente e indicador en la columna ``etapas`` del historial.
+# register publica la versión (catálogo + puntero current) y manifest guarda
+# el manifiesto incremental y los sketches de la corrida
+RUN_STAGES = ("load", "group", "calc", "attach_reference", "write", "register", "manifest")
+
+# Columnas del historial: lecturas por fuente e indicadores salen del registro
 RUN_HISTORY_FIELDS = [
     "run_id",
     "inicio",
     "fin",
     "duracion_seg",
-    "lecturas_densidad",
-    "lecturas_temperatura",
-    "indicadores_densidad",
-    "indicadores_temp_max",
-    "indicadores_temp_rango",
+    *(f"lecturas_{name}" for name in active_sources()),
+    *(spec.history_column for spec in INDICATORS),
     "total_indicadores",
     "status_ok",
     "status_desvio",
     "status_sin_referencia",
+    "status_sin_referencia_definida",
     "status_otro",
+    "referencias_cache_hits",
+    "referencias_cache_misses",
+    *(f"etapa_{stage}_seg" for stage in RUN_STAGES),
+    "bytes_leidos",
+    "filas_por_seg",
+    "rss_max_mb",
+    "etapas",
     "log_file",
     "resultado_csv",
 ]
 
 # Catálogo de versiones de datasets (HU5)
 METADATA_DIR = Path("data/metadata")
-VERSION_CATALOG = METADATA_DIR / "dataset_versions.csv"
-
-VERSION_CATALOG_FIELDS = [
-    "dataset",
-    "version_id",
-    "created_at",
-    "file_path",
-    "is_current",
-]
+VERSION_CATALOG = METADATA_DIR / "dataset_versions.sqlite"
+# Catálogo CSV anterior: se importa al SQLite la primera vez
+LEGACY_VERSION_CATALOG = METADATA_DIR / "dataset_versions.csv"
 
 REFERENCE_TOLERANCE = 1e-6
+# Status de las filas de indicadores sin dataset de referencia (reference=None)
+NO_REFERENCE_STATUS = "sin_referencia_definida"
+
+# Backends de agregación: "python" (referencia) o "numpy" (columnar)
+BACKENDS = ("python", "numpy")
+
+# Dataset silver particionado por fecha (ver silver_store.py); el CSV plano
+# current solo se genera a pedido (--export-csv)
+SILVER_STORE = SilverStore(OUTPUT_DIR / "mcp_indicadores")
+CURRENT_FILE = OUTPUT_DIR / "mcp_indicadores_current.csv"
+
+# Snapshots binarios de los CSV de referencia (ver reference_cache.py)
+REFERENCE_CACHE_DIR = METADATA_DIR / "reference_cache"
+
+# Sketches de cuantiles por partición: <fuente>/<fecha>.json
+SKETCH_DIR = METADATA_DIR / "sketches"
+
+# Cálculo incremental: archivos RAW ya consumidos (ruta -> [tamaño, mtime_ns]).
+# La versión 2 separa servicio_code de tramo_id en el silver: un manifiesto
+# anterior fuerza un cálculo completo que reescribe las filas de viajes
+MANIFEST_FILE = METADATA_DIR / "calc_mcp_manifest.json"
+MANIFEST_VERSION = 2
+
+# Fuentes RAW que se recorren: las que tienen indicadores registrados
+RAW_SOURCES = active_sources()
 
 
 def setup_logging() -> Path:
@@ -75,219 +146,605 @@ def setup_logging() -> Path:
     return log_file
 
 
-def load_raw_records(fuente: str, tipo: str) -> List[dict]:
-    base_path = RAW_PATH / fuente / tipo
+def list_partitions(base_path: Path) -> List[Path]:
+    """Carpetas YYYY=/MM=/DD= con archivos RAW, en orden."""
+    folders = {
+        raw_file.parent
+        for pattern in RAW_PATTERNS
+        for raw_file in base_path.rglob(pattern)
+    }
+    return sorted(folders)
+
+
+def _partition_value(folder: Path, name: str) -> Optional[int]:
+    key, _, value = folder.name.partition("=")
+    if key != name:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def prune_partitions(
+    base_path: Path, desde: Optional[date] = None, hasta: Optional[date] = None
+) -> List[Path]:
+    """
+    Carpetas YYYY=/MM=/DD= dentro de [desde, hasta], en orden.
+
+    Se baja nivel por nivel descartando años y meses fuera del rango, así que
+    solo se listan los directorios que pueden tener lecturas del rango.
+    """
+    lo = desde or date.min
+    hi = hasta or date.max
+    folders: List[Path] = []
     if not base_path.exists():
-        logging.warning("No se encontraron lecturas RAW en %s", base_path)
-        return []
+        return folders
+
+    for year_dir in sorted(base_path.glob("YYYY=*")):
+        year = _partition_value(year_dir, "YYYY")
+        if year is None or not lo.year <= year <= hi.year:
+            continue
+        for month_dir in sorted(year_dir.glob("MM=*")):
+            month = _partition_value(month_dir, "MM")
+            if month is None or not (lo.year, lo.month) <= (year, month) <= (hi.year, hi.month):
+                continue
+            for day_dir in sorted(month_dir.glob("DD=*")):
+                day = _partition_value(day_dir, "DD")
+                try:
+                    fecha = date(year, month, day or 0)
+                except ValueError:
+                    continue
+                if lo <= fecha <= hi:
+                    folders.append(day_dir)
+    return folders
+
+
+def raw_bases(fuente: str, tipo: str) -> List[Path]:
+    """Carpetas ``<fuente>/<tipo>`` existentes en RAW y en el archivo."""
+    return [root / fuente / tipo for root in RAW_ROOTS if (root / fuente / tipo).exists()]
 
-    records: List[dict] = []
-    for json_file in base_path.rglob("*.json"):
+
+def _iter_raw_files(bases: List[Path], partitions: Optional[Iterable[Path]] = None):
+    """
+    Archivos RAW de una fuente (en RAW y en el archivo); con ``partitions``
+    solo los de esas carpetas.
+
+    El orden es determinista (partición, patrón, nombre) para que el
+    recorrido serial y el paralelo sumen cada grupo en el mismo orden. Los
+    archivos ya reemplazados por un segmento compactado no se entregan.
+    """
+    if partitions is None:
+        partitions = [folder for base in bases for folder in list_partitions(base)]
+    for folder in sorted(partitions):
+        yield from live_raw_files(folder)
+
+
+def iter_raw_records(
+    fuente: str,
+    tipo: str,
+    partitions: Optional[Iterable[Path]] = None,
+    match: Optional[Dict[str, Set[str]]] = None,
+) -> Iterator[Tuple[dict, Path, Optional[int]]]:
+    """
+    Recorre las lecturas RAW de ``<fuente>/<tipo>`` de a una, sin cargarlas en
+    memoria: segmentos compactados, JSON de una lectura (formato antiguo) y
+    segmentos NDJSON sellados y abiertos. Entrega (lectura, archivo, línea).
+    Con ``partitions`` se leen solo esas particiones YYYY=/MM=/DD= (cálculo
+    incremental). Con ``match`` ({campo: valores}) se saltan los segmentos
+    compactados cuyo footer (mínimo/máximo por columna) descarta esos valores.
+    """
+    bases = raw_bases(fuente, tipo)
+    if not bases:
+        logging.warning("No se encontraron lecturas RAW en %s", RAW_PATH / fuente / tipo)
+        return
+
+    for raw_file in _iter_raw_files(bases, partitions):
         try:
-            with json_file.open(encoding="utf-8") as fh:
-                data = json.load(fh)
-                data["_file"] = str(json_file)
-                records.append(data)
+            if raw_file.suffix == SEGMENT_SUFFIX:
+                if match is not None and not segment_may_match(read_footer(raw_file), match):
+                    logging.info("Segmento descartado por estadísticas: %s", raw_file)
+                    continue
+                yield from iter_segment(raw_file)
+            elif raw_file.suffix == ".json":
+                with raw_file.open(encoding="utf-8") as fh:
+                    data = json.load(fh)
+                yield data, raw_file, None
+            else:
+                yield from _iter_ndjson(raw_file)
+        except FileNotFoundError:
+            # Segmento .open sellado (renombrado) mientras se leía la carpeta
+            sealed = raw_file.with_name(raw_file.name[: -len(".open")])
+            if raw_file.name.endswith(".open") and sealed.exists():
+                yield from _iter_ndjson(sealed)
+            else:
+                logging.error("No se pudo leer %s: ya no existe", raw_file)
         except Exception as exc:  # pragma: no cover (solo logs)
-            logging.error("No se pudo leer %s: %s", json_file, exc)
+            logging.error("No se pudo leer %s: %s", raw_file, exc)
 
-    logging.info(
-        "Lecturas RAW cargadas para %s/%s: %s archivos",
-        fuente,
-        tipo,
-        len(records),
-    )
-    return records
 
+def _iter_ndjson(path: Path) -> Iterator[Tuple[dict, Path, int]]:
+    """
+    Lee un segmento NDJSON línea a línea. En segmentos abiertos
+    (``.ndjson.open``) se ignora una posible última línea incompleta que aún
+    se está escribiendo.
+    """
+    is_open = path.name.endswith(".open")
+    with path.open("rb") as fh:
+        for lineno, line in enumerate(fh, start=1):
+            if is_open and not line.endswith(b"\n"):
+                break
+            if not line.strip():
+                continue
+            yield json.loads(line), path, lineno
+
+
+class GroupStats:
+    """
+    Acumulador en línea (cantidad, suma, mínimo, máximo) de un grupo, más un
+    sketch de cuantiles si la fuente tiene indicadores P50/P95/P99.
+    """
 
-def _group_values(records: Iterable[dict]) -> Dict[Tuple[str, str], List[float]]:
-    groups: Dict[Tuple[str, str], List[float]] = defaultdict(list)
-    for row in records:
-        tramo = row.get("tramo_id")
+    __slots__ = ("count", "total", "min", "max", "sketch")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch: Optional[QuantileSketch] = None
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+
+Groups = Dict[Tuple[str, str], GroupStats]
+# Acumuladores por campo de agrupación: {campo: {(valor, fecha): GroupStats}}
+FieldGroups = Dict[str, Groups]
+
+DEFAULT_GROUP_FIELDS = ("tramo_id",)
+
+
+def _valid_readings(
+    records: Iterable[Tuple[dict, Path, Optional[int]]],
+    counter: Dict[str, int],
+    group_fields: Tuple[str, ...] = DEFAULT_GROUP_FIELDS,
+    tramos: Optional[Set[str]] = None,
+) -> Iterator[Tuple[Tuple[Optional[str], ...], str, float]]:
+    """
+    Filtra lecturas sin campo de agrupación/fecha o con valor no numérico
+    (con warning) y, si se indica ``tramos``, las de otros tramos (el filtro
+    solo aplica al campo ``tramo_id``: con él activo, los demás campos de
+    agrupación no acumulan). Entrega (valor de cada campo de agrupación o
+    None, fecha, valor).
+    """
+    for row, path, lineno in records:
+        counter["readings"] += 1
         fecha = row.get("fecha")
         valor = row.get("valor")
+        keys = tuple(row.get(field) or None for field in group_fields)
 
-        if not tramo or not fecha:
+        if not fecha or None in keys:
+            missing = [field for field, key in zip(group_fields, keys) if key is None]
+            origin = path if lineno is None else f"{path}:{lineno}"
             logging.warning(
-                "Fila sin tramo/fecha. Archivo=%s", row.get("_file", "desconocido")
+                "Fila sin %s/fecha. Archivo=%s", "/".join(missing) or "fecha", origin
             )
-            continue
+            if not fecha or len(missing) == len(keys):
+                continue
+
+        if tramos is not None:
+            keys = tuple(
+                key if field == "tramo_id" and key in tramos else None
+                for field, key in zip(group_fields, keys)
+            )
+            if not any(keys):
+                continue
 
         try:
             valor_float = float(valor)
         except (TypeError, ValueError):
-            logging.warning(
-                "Valor inválido (%s) en archivo=%s", valor, row.get("_file")
-            )
+            origin = path if lineno is None else f"{path}:{lineno}"
+            logging.warning("Valor inválido (%s) en archivo=%s", valor, origin)
             continue
 
-        groups[(tramo, fecha)].append(valor_float)
+        yield keys, fecha, valor_float
 
-    return groups
 
+def _aggregate_numpy(
+    readings: Iterable[Tuple[Tuple[Optional[str], ...], str, float]],
+    group_fields: Tuple[str, ...],
+) -> FieldGroups:
+    # Importación diferida: numpy solo se necesita con --backend numpy
+    from etl.columnar_agg import grouped_reductions
 
-def calc_densidad_promedio(records: List[dict]) -> List[dict]:
-    indicator_id = "MCP_DENS_PROM"
-    groups = _group_values(records)
-    results = []
-    for (tramo, fecha), values in groups.items():
-        promedio = sum(values) / len(values)
-        results.append(
-            {
-                "id_indicador": indicator_id,
-                "tramo_id": tramo,
-                "fecha": fecha,
-                "valor_calculado": promedio,
-                "muestras": len(values),
-            }
+    if len(group_fields) > 1:
+        # Una reducción por campo: las lecturas válidas se recorren varias veces
+        readings = list(readings)
+
+    field_groups: FieldGroups = {}
+    for pos, field in enumerate(group_fields):
+        groups: Groups = {}
+        column = (
+            (keys[pos], fecha, valor)
+            for keys, fecha, valor in readings
+            if keys[pos] is not None
         )
-    logging.info(
-        "Calculadas %s filas para %s", len(results), indicator_id
+        for key, count, total, minimum, maximum in grouped_reductions(column):
+            stats = groups[key] = GroupStats()
+            stats.count, stats.total, stats.min, stats.max = count, total, minimum, maximum
+        field_groups[field] = groups
+    return field_groups
+
+
+def _feed_sketches(
+    readings: Iterable[Tuple[Tuple[Optional[str], ...], str, float]],
+    sketches: List[Dict[Tuple[str, str], QuantileSketch]],
+) -> Iterator[Tuple[Tuple[Optional[str], ...], str, float]]:
+    """Alimenta los sketches de cuantiles al paso, sin retener las lecturas."""
+    for keys, fecha, valor in readings:
+        for field_sketches, key in zip(sketches, keys):
+            if key is None:
+                continue
+            sketch = field_sketches.get((key, fecha))
+            if sketch is None:
+                sketch = field_sketches[(key, fecha)] = QuantileSketch()
+            sketch.add(valor)
+        yield keys, fecha, valor
+
+
+def aggregate_records(
+    records: Iterable[Tuple[dict, Path, Optional[int]]],
+    backend: str = "python",
+    tramos: Optional[Set[str]] = None,
+    group_fields: Tuple[str, ...] = DEFAULT_GROUP_FIELDS,
+    with_sketches: bool = False,
+) -> Tuple[FieldGroups, int]:
+    """
+    Agrega en una pasada las lecturas por (campo, fecha) para cada campo de
+    ``group_fields``.
+
+    Con ``backend="python"`` la memoria es proporcional a la cantidad de
+    grupos, no de lecturas; ``"numpy"`` carga las lecturas válidas en
+    arreglos y reduce en bloque (mismo resultado, ver etl/columnar_agg.py).
+    Devuelve (acumuladores por campo y grupo, lecturas recorridas).
+    """
+    counter = {"readings": 0}
+    readings = _valid_readings(records, counter, group_fields, tramos)
+    sketches: List[Dict[Tuple[str, str], QuantileSketch]] = []
+    if with_sketches:
+        sketches = [{} for _ in group_fields]
+        readings = _feed_sketches(readings, sketches)
+
+    if backend == "numpy":
+        field_groups = _aggregate_numpy(readings, group_fields)
+    else:
+        per_field: List[Groups] = [{} for _ in group_fields]
+        for keys, fecha, valor in readings:
+            for groups, key in zip(per_field, keys):
+                if key is None:
+                    continue
+                stats = groups.get((key, fecha))
+                if stats is None:
+                    stats = groups[(key, fecha)] = GroupStats()
+                stats.add(valor)
+        field_groups = dict(zip(group_fields, per_field))
+
+    for field, field_sketches in zip(group_fields, sketches):
+        for key, stats in field_groups[field].items():
+            stats.sketch = field_sketches.get(key)
+
+    return field_groups, counter["readings"]
+
+
+def merge_groups(into: FieldGroups, partial: FieldGroups) -> None:
+    """Combina acumuladores parciales (de otra partición) en ``into``."""
+    for field, groups in partial.items():
+        target = into.setdefault(field, {})
+        for key, stats in groups.items():
+            current = target.get(key)
+            if current is None:
+                target[key] = stats
+                continue
+            current.count += stats.count
+            current.total += stats.total
+            current.min = min(current.min, stats.min)
+            current.max = max(current.max, stats.max)
+            if current.sketch is None:
+                current.sketch = stats.sketch
+            elif stats.sketch is not None:
+                current.sketch.merge(stats.sketch)
+
+
+def _segment_match(
+    tramos: Optional[Set[str]], group_fields: Tuple[str, ...]
+) -> Optional[Dict[str, Set[str]]]:
+    """
+    Filtro para descartar segmentos por tramo. Si la fuente no se agrupa por
+    ``tramo_id``, el filtro vacío descarta todos los segmentos: ninguna de
+    sus lecturas se recalcula con ``--tramo``.
+    """
+    if tramos is None:
+        return None
+    return {"tramo_id": tramos} if "tramo_id" in group_fields else {}
+
+
+def _scan_partition(
+    args: Tuple[str, str, Path, str, Optional[Set[str]], Tuple[str, ...], bool]
+) -> Tuple[FieldGroups, int]:
+    """Worker del escaneo paralelo: agrega una partición y devuelve parciales."""
+    fuente, tipo, folder, backend, tramos, group_fields, with_sketches = args
+    return aggregate_records(
+        iter_raw_records(fuente, tipo, [folder], _segment_match(tramos, group_fields)),
+        backend=backend,
+        tramos=tramos,
+        group_fields=group_fields,
+        with_sketches=with_sketches,
     )
-    return results
 
 
-def calc_temperatura_max(records: List[dict]) -> List[dict]:
-    indicator_id = "MCP_TEMP_MAX"
-    groups = _group_values(records)
-    results = []
-    for (tramo, fecha), values in groups.items():
-        results.append(
-            {
-                "id_indicador": indicator_id,
-                "tramo_id": tramo,
-                "fecha": fecha,
-                "valor_calculado": max(values),
-                "muestras": len(values),
-            }
+def _aggregate_parallel(
+    fuente: str,
+    tipo: str,
+    partitions: List[Path],
+    backend: str,
+    workers: int,
+    tramos: Optional[Set[str]] = None,
+    group_fields: Tuple[str, ...] = DEFAULT_GROUP_FIELDS,
+    with_sketches: bool = False,
+) -> Tuple[FieldGroups, int]:
+    """
+    Reparte las particiones entre un pool de procesos y fusiona los
+    acumuladores parciales en el orden de las particiones, así el orden de
+    los grupos y las sumas coinciden con el recorrido serial.
+    """
+    field_groups: FieldGroups = {field: {} for field in group_fields}
+    readings = 0
+    ctx = pool_context()
+    tasks = [
+        (fuente, tipo, folder, backend, tramos, group_fields, with_sketches)
+        for folder in partitions
+    ]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        for partial, count in pool.map(_scan_partition, tasks):
+            merge_groups(field_groups, partial)
+            readings += count
+    return field_groups, readings
+
+
+def aggregate_raw(
+    fuente: str,
+    tipo: str,
+    partitions: Optional[Iterable[Path]] = None,
+    backend: str = "python",
+    workers: int = 1,
+    tramos: Optional[Set[str]] = None,
+    group_fields: Tuple[str, ...] = DEFAULT_GROUP_FIELDS,
+    with_sketches: bool = False,
+) -> Tuple[FieldGroups, int]:
+    """
+    Un único recorrido de la fuente alimenta todos sus indicadores.
+
+    Con ``workers > 1`` el recorrido se reparte por partición YYYY=/MM=/DD=
+    entre procesos (ver ``_aggregate_parallel``).
+    """
+    bases = raw_bases(fuente, tipo)
+    folders: Optional[List[Path]] = None
+    if workers > 1 and bases:
+        if partitions is None:
+            partitions = [folder for base in bases for folder in list_partitions(base)]
+        folders = sorted(partitions)
+
+    if folders is not None and len(folders) > 1:
+        field_groups, readings = _aggregate_parallel(
+            fuente,
+            tipo,
+            folders,
+            backend,
+            min(workers, len(folders)),
+            tramos,
+            group_fields,
+            with_sketches,
+        )
+    else:
+        field_groups, readings = aggregate_records(
+            iter_raw_records(
+                fuente, tipo, partitions, _segment_match(tramos, group_fields)
+            ),
+            backend=backend,
+            tramos=tramos,
+            group_fields=group_fields,
+            with_sketches=with_sketches,
         )
     logging.info(
-        "Calculadas %s filas para %s", len(results), indicator_id
+        "Lecturas RAW cargadas para %s/%s: %s lecturas en %s grupos%s",
+        fuente,
+        tipo,
+        readings,
+        sum(len(groups) for groups in field_groups.values()),
+        "" if partitions is None else f" ({len(list(partitions))} particiones)",
     )
-    return results
+    return field_groups, readings
 
 
-def calc_temperatura_rango(records: List[dict]) -> List[dict]:
-    indicator_id = "MCP_TEMP_RANGO"
-    groups = _group_values(records)
-    results = []
-    for (tramo, fecha), values in groups.items():
-        rango = max(values) - min(values)
-        results.append(
-            {
-                "id_indicador": indicator_id,
-                "tramo_id": tramo,
-                "fecha": fecha,
-                "valor_calculado": rango,
-                "muestras": len(values),
-            }
-        )
+def calc_indicator(spec: IndicatorSpec, groups: Groups) -> List[dict]:
+    """
+    Filas de un indicador registrado a partir de los acumuladores de su
+    fuente: la clave del grupo va en la columna de ``spec.group_field`` y las
+    demás columnas de agrupación quedan vacías.
+    """
+    reducer = REDUCERS[spec.reducer]
+    results = [
+        {
+            "id_indicador": spec.indicator_id,
+            **{field: key if field == spec.group_field else None for field in GROUP_FIELDS},
+            "fecha": fecha,
+            "valor_calculado": reducer(stats),
+            "muestras": stats.count,
+        }
+        for (key, fecha), stats in groups.items()
+    ]
     logging.info(
-        "Calculadas %s filas para %s", len(results), indicator_id
+        "Calculadas %s filas para %s", len(results), spec.indicator_id
     )
     return results
 
 
-def load_reference_map(indicator_id: str) -> Dict[Tuple[str, str], float]:
-    filename = REFERENCE_DIR / f"mcp_reference_{indicator_id}.csv"
+def save_partition_sketches(
+    source: str,
+    field_groups: FieldGroups,
+    fechas: Optional[Set[str]] = None,
+    partial: bool = False,
+) -> None:
+    """
+    Guarda los sketches de cada fecha (partición) recalculada en
+    ``SKETCH_DIR/<fuente>/<fecha>.json``.
+
+    ``fechas=None`` indica un cálculo completo (se borran las fechas que ya
+    no tienen lecturas). Con ``partial`` (filtro de tramo) solo se
+    reemplazan los grupos recalculados dentro de cada archivo.
+    """
+    by_fecha: Dict[str, Dict[str, Dict[str, dict]]] = {}
+    for field, groups in field_groups.items():
+        for (key, fecha), stats in groups.items():
+            if stats.sketch is not None:
+                by_fecha.setdefault(fecha, {}).setdefault(field, {})[key] = stats.sketch.to_dict()
+
+    folder = SKETCH_DIR / source
+    folder.mkdir(parents=True, exist_ok=True)
+    if not partial:
+        stale = (
+            {path.stem for path in folder.glob("*.json")} if fechas is None else fechas
+        )
+        for fecha in stale - by_fecha.keys():
+            (folder / f"{fecha}.json").unlink(missing_ok=True)
+
+    for fecha, data in by_fecha.items():
+        path = folder / f"{fecha}.json"
+        if partial and path.exists():
+            existing = json.loads(path.read_text(encoding="utf-8"))
+            for field, sketches in data.items():
+                existing.setdefault(field, {}).update(sketches)
+            data = existing
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+def load_partition_sketches(
+    source: str, fechas: Iterable[str], field: str = "tramo_id"
+) -> Dict[str, QuantileSketch]:
+    """
+    Combina los sketches guardados de varias fechas por valor de grupo (p. ej.
+    el P95 semanal por tramo) sin volver a leer RAW.
+    """
+    merged: Dict[str, QuantileSketch] = {}
+    for fecha in fechas:
+        path = SKETCH_DIR / source / f"{fecha}.json"
+        if not path.exists():
+            continue
+        data = json.loads(path.read_text(encoding="utf-8"))
+        for key, sketch_data in data.get(field, {}).items():
+            sketch = QuantileSketch.from_dict(sketch_data)
+            if key in merged:
+                merged[key].merge(sketch)
+            else:
+                merged[key] = sketch
+    return merged
+
+
+def load_reference_table(
+    spec: IndicatorSpec, cache: Optional[ReferenceCache] = None
+) -> ReferenceTable:
+    """Referencias de un indicador ordenadas por (valor de su campo de agrupación, fecha)."""
+    filename = REFERENCE_DIR / spec.reference_file
     if not filename.exists():
         logging.warning("No existe dataset de referencia: %s", filename)
-        return {}
+        return ReferenceTable.empty()
 
-    ref_map: Dict[Tuple[str, str], float] = {}
-    with filename.open(encoding="utf-8") as fh:
-        reader = csv.DictReader(fh)
-        value_col = reader.fieldnames[-1] if reader.fieldnames else None
-        for row in reader:
-            tramo = row.get("tramo_id")
-            fecha = row.get("fecha")
-            valor = row.get(value_col) if value_col else None
-            if not tramo or not fecha or valor is None:
-                continue
-            try:
-                ref_map[(tramo, fecha)] = float(valor)
-            except ValueError:
-                logging.warning(
-                    "Valor de referencia inválido en %s (tramo=%s fecha=%s)",
-                    filename,
-                    tramo,
-                    fecha,
-                )
+    cache = cache or ReferenceCache(REFERENCE_CACHE_DIR)
+    table = cache.load(filename, spec.group_field)
     logging.info(
         "Referencias cargadas para %s: %s filas",
-        indicator_id,
-        len(ref_map),
+        spec.indicator_id,
+        len(table),
     )
-    return ref_map
-
-
-def attach_reference(indicator_id: str, rows: List[dict]) -> None:
-    ref_map = load_reference_map(indicator_id)
-    for row in rows:
-        key = (row["tramo_id"], row["fecha"])
-        ref_val = ref_map.get(key)
-        row["valor_referencia"] = ref_val
-        if ref_val is None:
-            row["delta"] = None
-            row["status"] = "sin_referencia"
-        else:
-            delta = row["valor_calculado"] - ref_val
-            row["delta"] = delta
-            row["status"] = (
-                "ok" if abs(delta) <= REFERENCE_TOLERANCE else "desvio"
-            )
+    return table
+
+
+def attach_reference(
+    spec: IndicatorSpec,
+    rows: List[dict],
+    cache: Optional[ReferenceCache] = None,
+    backend: str = "python",
+) -> None:
+    if spec.reference_file is None:
+        # Indicador sin dataset de referencia: no hay nada que cruzar
+        for row in rows:
+            row.update(valor_referencia=None, delta=None, status=NO_REFERENCE_STATUS)
+        return
+    table = load_reference_table(spec, cache)
+    join_reference(rows, table, REFERENCE_TOLERANCE, spec.group_field, backend)
+
+
+def open_version_catalog() -> VersionCatalog:
+    return VersionCatalog(VERSION_CATALOG, legacy_csv=LEGACY_VERSION_CATALOG)
+
 
 def register_dataset_version(dataset: str, file_path: Path, mark_current: bool = True) -> None:
     """
     HU5: registra una nueva versión de un dataset en el catálogo de versiones
-    y opcionalmente actualiza el archivo 'current'.
+    y opcionalmente la publica como 'current' (cambio atómico del puntero).
 
     - dataset: nombre lógico del dataset (ej: 'mcp_indicadores')
-    - file_path: ruta al CSV generado (con timestamp)
+    - file_path: ruta al manifiesto de la versión (``versions/<id>.json``)
     """
-    METADATA_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = SILVER_STORE.load_manifest(file_path) or {}
+    version_id = file_path.stem
+
+    with open_version_catalog() as catalog:
+        catalog.register(
+            dataset,
+            version_id,
+            file_path,
+            created_at=manifest.get("created_at")
+            or datetime.now().isoformat(timespec="seconds"),
+            rows=manifest.get("rows"),
+            parent=manifest.get("parent"),
+        )
 
-    version_id = datetime.now().strftime("%Y%m%d_%H%M%S")
-    created_at = datetime.now().isoformat(timespec="seconds")
+    if mark_current:
+        SILVER_STORE.publish(file_path)
+        logging.info(
+            "Versión %s registrada como actual en %s", version_id, SILVER_STORE.current_path
+        )
 
-    is_new = not VERSION_CATALOG.exists()
-    with VERSION_CATALOG.open("a", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=VERSION_CATALOG_FIELDS)
-        if is_new:
-            writer.writeheader()
 
-        row = {
-            "dataset": dataset,
-            "version_id": version_id,
-            "created_at": created_at,
-            "file_path": str(file_path),
-            "is_current": "true" if mark_current else "false",
-        }
-        writer.writerow(row)
+def list_versions(dataset: str, limit: Optional[int] = None) -> List[dict]:
+    """Versiones registradas (más recientes primero), marcando la actual."""
+    current = SILVER_STORE.current_version()
+    with open_version_catalog() as catalog:
+        versions = catalog.list(dataset, limit)
+    for version in versions:
+        version["is_current"] = version["version_id"] == current
+    return versions
 
-    if mark_current:
-        # Copiamos la versión como "current"
-        current_file = OUTPUT_DIR / f"{dataset}_current.csv"
-        shutil.copy2(file_path, current_file)
-        logging.info("Versión %s registrada como actual en %s", version_id, current_file)
 
 def rollback_dataset_version(dataset: str, version_id: str) -> Path:
     """
     HU5: permite revertir a una versión anterior de un dataset.
 
-    - Busca en dataset_versions.csv la fila que coincide con dataset + version_id
-    - Copia ese archivo como <dataset>_current.csv en la carpeta SILVER
+    - Busca la versión en el catálogo (por clave primaria)
+    - Apunta el puntero current a su manifiesto (las versiones antiguas en
+      CSV plano se importan primero al dataset particionado)
     """
-    if not VERSION_CATALOG.exists():
-        raise FileNotFoundError(f"No existe catálogo de versiones: {VERSION_CATALOG}")
-
-    selected_row = None
-    with VERSION_CATALOG.open(encoding="utf-8") as fh:
-        reader = csv.DictReader(fh)
-        for row in reader:
-            if row["dataset"] == dataset and row["version_id"] == version_id:
-                selected_row = row
-                break
+    with open_version_catalog() as catalog:
+        selected_row = catalog.get(dataset, version_id)
 
     if not selected_row:
         raise ValueError(f"No se encontró versión {version_id} para dataset {dataset}")
@@ -296,51 +753,46 @@ def rollback_dataset_version(dataset: str, version_id: str) -> Path:
     if not src.exists():
         raise FileNotFoundError(f"No existe el archivo de la versión: {src}")
 
-    dst = OUTPUT_DIR / f"{dataset}_current.csv"
-    shutil.copy2(src, dst)
+    if src.suffix == ".csv":
+        src = SILVER_STORE.import_csv(src)
+        register_dataset_version(dataset, src, mark_current=False)
+    SILVER_STORE.publish(src)
     logging.info(
         "Rollback realizado: dataset=%s version_id=%s -> %s",
         dataset,
         version_id,
-        dst,
+        SILVER_STORE.current_path,
     )
-    return dst
-
-
-def write_results(rows: List[dict]) -> Path:
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_file = OUTPUT_DIR / f"mcp_indicadores_{timestamp}.csv"
-
-    fieldnames = [
-        "id_indicador",
-        "tramo_id",
-        "fecha",
-        "valor_calculado",
-        "muestras",
-        "valor_referencia",
-        "delta",
-        "status",
-    ]
-
-    with out_file.open("w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in rows:
-            writer.writerow(row)
-
-    logging.info("Resultados escritos en %s (%s filas)", out_file, len(rows))
-    # 👇 NUEVO: registrar versión en catálogo (HU5)
-    register_dataset_version("mcp_indicadores", out_file, mark_current=True)
-    return out_file
+    return SILVER_STORE.current_path
 
 
-def summarize_status(rows: List[dict]) -> Dict[str, int]:
-    summary: Dict[str, int] = defaultdict(int)
-    for row in rows:
-        status = row.get("status") or "sin_estado"
-        summary[status] += 1
-    return summary
+def write_results(
+    partitions: Dict[str, List[dict]],
+    base: Optional[dict] = None,
+    metrics: Optional[RunMetrics] = None,
+) -> Optional[Path]:
+    """
+    Escribe las fechas de ``partitions`` como versión nueva del dataset silver
+    (el resto de las fechas se toma de ``base``) y la publica como current.
+    """
+    metrics = metrics or RunMetrics()
+    with metrics.stage("write") as stage:
+        manifest_path = SILVER_STORE.write_version(partitions, base)
+        stage.add(
+            files=len(partitions), rows=sum(len(rows) for rows in partitions.values())
+        )
+    if manifest_path is None:
+        logging.info("Las fechas recalculadas no cambiaron: la versión actual sigue vigente")
+        return None
+    logging.info(
+        "Resultados escritos en %s (%s fechas reescritas, %s filas)",
+        manifest_path,
+        len(partitions),
+        sum(len(rows) for rows in partitions.values()),
+    )
+    with metrics.stage("register"):
+        register_dataset_version("mcp_indicadores", manifest_path, mark_current=True)
+    return manifest_path
 
 
 def record_run_history(
@@ -351,12 +803,16 @@ def record_run_history(
     raw_counts: Dict[str, int],
     calc_counts: Dict[str, int],
     status_summary: Dict[str, int],
+    reference_cache: Optional[Dict[str, int]] = None,
+    metrics: Optional[RunMetrics] = None,
 ) -> None:
     LOG_DIR.mkdir(parents=True, exist_ok=True)
     RUN_HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
 
     duration = (end_time - start_time).total_seconds()
-    known_statuses = {"ok", "desvio", "sin_referencia"}
+    metrics = metrics or RunMetrics()
+    peak_rss = metrics.peak_rss_mb()
+    known_statuses = {"ok", "desvio", "sin_referencia", NO_REFERENCE_STATUS}
     other_status = sum(
         count
         for status, count in status_summary.items()
@@ -368,78 +824,550 @@ def record_run_history(
         "inicio": start_time.isoformat(timespec="seconds"),
         "fin": end_time.isoformat(timespec="seconds"),
         "duracion_seg": f"{duration:.3f}",
-        "lecturas_densidad": raw_counts.get("densidad", 0),
-        "lecturas_temperatura": raw_counts.get("temperatura", 0),
-        "indicadores_densidad": calc_counts.get("MCP_DENS_PROM", 0),
-        "indicadores_temp_max": calc_counts.get("MCP_TEMP_MAX", 0),
-        "indicadores_temp_rango": calc_counts.get("MCP_TEMP_RANGO", 0),
+        **{f"lecturas_{name}": raw_counts.get(name, 0) for name in RAW_SOURCES},
+        **{
+            spec.history_column: calc_counts.get(spec.indicator_id, 0)
+            for spec in INDICATORS
+        },
         "total_indicadores": sum(calc_counts.values()),
         "status_ok": status_summary.get("ok", 0),
         "status_desvio": status_summary.get("desvio", 0),
         "status_sin_referencia": status_summary.get("sin_referencia", 0),
+        "status_sin_referencia_definida": status_summary.get(NO_REFERENCE_STATUS, 0),
         "status_otro": other_status,
+        "referencias_cache_hits": (reference_cache or {}).get("hits", 0),
+        "referencias_cache_misses": (reference_cache or {}).get("misses", 0),
+        **{
+            f"etapa_{stage}_seg": f"{metrics.total(stage).seconds:.3f}"
+            for stage in RUN_STAGES
+        },
+        "bytes_leidos": metrics.total("group").bytes_read,
+        "filas_por_seg": metrics.total("group").to_dict()["filas_por_seg"],
+        "rss_max_mb": round(peak_rss, 1) if peak_rss is not None else "",
+        "etapas": metrics.to_json(),
         "log_file": str(log_file),
         "resultado_csv": str(output_file) if output_file else "",
     }
 
+    fieldnames = _ensure_history_header(RUN_HISTORY_FIELDS)
     is_new = not RUN_HISTORY_FILE.exists()
     with RUN_HISTORY_FILE.open("a", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=RUN_HISTORY_FIELDS)
+        writer = csv.DictWriter(fh, fieldnames=fieldnames, restval="")
         if is_new:
             writer.writeheader()
         writer.writerow(row)
 
 
-def main() -> None:
-    start_time = datetime.now()
-    log_file = setup_logging()
-    logging.info("===== Inicio cálculo MCP =====")
+def _ensure_history_header(fields: List[str]) -> List[str]:
+    """
+    Si el registro de indicadores cambió, reescribe el historial con el
+    encabezado nuevo (las corridas anteriores quedan vacías en las columnas
+    nuevas y se conservan las columnas que ya no se usan). Devuelve las
+    columnas con las que hay que agregar filas.
+    """
+    if not RUN_HISTORY_FILE.exists():
+        return fields
+
+    with RUN_HISTORY_FILE.open(newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        header = reader.fieldnames or []
+        if header == fields:
+            return fields
+        rows = list(reader)
+
+    merged = fields + [column for column in header if column not in fields]
+    if merged == header:
+        return header
+
+    tmp = RUN_HISTORY_FILE.with_name(f".{RUN_HISTORY_FILE.name}.tmp")
+    with tmp.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=merged, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, RUN_HISTORY_FILE)
+    logging.info("Historial de runs migrado a las columnas del registro: %s", RUN_HISTORY_FILE)
+    return merged
+
+
+def _file_signature(path: Path) -> Optional[List[int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def scan_raw_files(
+    fuente: str, tipo: str, partitions: Optional[Iterable[Path]] = None
+) -> Dict[str, List[int]]:
+    """Firma (tamaño, mtime) de cada archivo RAW de la fuente (o de esas particiones)."""
+    files: Dict[str, List[int]] = {}
+    for raw_file in _iter_raw_files(raw_bases(fuente, tipo), partitions):
+        signature = _file_signature(raw_file)
+        if signature is not None:
+            files[str(raw_file)] = signature
+    return files
+
+
+def raw_volume(
+    files: Dict[str, List[int]], partitions: Optional[Iterable[Path]] = None
+) -> Tuple[int, int]:
+    """Cantidad y bytes de los archivos de ``files`` (o solo los de esas particiones)."""
+    if partitions is not None:
+        folders = {str(folder) for folder in partitions}
+        files = {path: sig for path, sig in files.items() if str(Path(path).parent) in folders}
+    return len(files), sum(size for size, _ in files.values())
+
+
+def reference_signatures() -> Dict[str, List[int]]:
+    signatures: Dict[str, List[int]] = {}
+    ref_files = set(REFERENCE_DIR.glob("mcp_reference_*.csv"))
+    ref_files.update(
+        REFERENCE_DIR / spec.reference_file for spec in INDICATORS if spec.reference_file
+    )
+    for ref_file in sorted(ref_files):
+        signature = _file_signature(ref_file)
+        if signature is not None:
+            signatures[ref_file.name] = signature
+    return signatures
+
+
+def load_manifest() -> Optional[dict]:
+    if not MANIFEST_FILE.exists():
+        return None
+    try:
+        manifest = json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        logging.warning("Manifiesto incremental ilegible (%s): %s", MANIFEST_FILE, exc)
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(files: Dict[str, Dict[str, List[int]]], references: Dict[str, List[int]]) -> None:
+    """Guarda (de forma atómica) los archivos consumidos por la versión publicada."""
+    METADATA_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "current": SILVER_STORE.current_version(),
+        "references": references,
+        "files": files,
+    }
+    tmp = MANIFEST_FILE.with_name(f".{MANIFEST_FILE.name}.tmp")
+    tmp.write_text(json.dumps(manifest), encoding="utf-8")
+    os.replace(tmp, MANIFEST_FILE)
+
+
+def changed_partitions(
+    previous: Dict[str, List[int]], current: Dict[str, List[int]]
+) -> Set[Path]:
+    """Carpetas de partición con archivos nuevos, modificados o eliminados."""
+    partitions: Set[Path] = set()
+    for path, signature in current.items():
+        if previous.get(path) != signature:
+            partitions.add(Path(path).parent)
+    for path in previous.keys() - current.keys():
+        partitions.add(Path(path).parent)
+    return partitions
+
 
-    results: List[dict] = []
+def with_root_twins(folders: Set[Path]) -> Set[Path]:
+    """
+    Agrega a cada partición su gemela (misma ``<fuente>/<tipo>/YYYY=/MM=/DD=``)
+    en las demás raíces de ``RAW_ROOTS``. Una fecha archivada por la
+    retención puede recibir lecturas tardías en ``data/raw``: recalcular esa
+    fecha exige leer las dos carpetas, porque la versión nueva reemplaza
+    todas sus filas.
+    """
+    expanded = set(folders)
+    for folder in folders:
+        root = next((root for root in RAW_ROOTS if root in folder.parents), None)
+        if root is None:
+            continue
+        relative = folder.relative_to(root)
+        expanded.update(
+            other / relative for other in RAW_ROOTS if (other / relative).is_dir()
+        )
+    return expanded
+
+
+def partition_fecha(folder: Path) -> Optional[str]:
+    """``.../YYYY=2025/MM=03/DD=05`` -> ``2025-03-05`` (None si no sigue el layout)."""
+    try:
+        parts = dict(part.split("=", 1) for part in folder.parts[-3:])
+        return f"{int(parts['YYYY']):04d}-{int(parts['MM']):02d}-{int(parts['DD']):02d}"
+    except (KeyError, ValueError):
+        return None
+
+
+def merge_results(
+    previous: List[dict], recomputed: List[dict], replaced: Callable[[dict], bool]
+) -> List[dict]:
+    """
+    Versión nueva = filas anteriores que no cumplen ``replaced`` + grupos
+    recalculados. Una partición siempre contiene todas las lecturas de su
+    fecha, así que recalcular fechas completas reemplaza (o elimina) cada
+    grupo (tramo_id, fecha) afectado.
+    """
+    order = {indicator: pos for pos, indicator in enumerate(INDICATOR_SOURCE)}
+    kept = [row for row in previous if not replaced(row)]
+    merged = kept + recomputed
+    merged.sort(
+        key=lambda row: (
+            order.get(row.get("id_indicador"), len(order)),
+            row.get("fecha") or "",
+            row.get("tramo_id") or "",
+            row.get("servicio_code") or "",
+        )
+    )
+    return merged
 
-    densidad_raw = load_raw_records("interno_densidad", "densidad")
-    densidad_rows = calc_densidad_promedio(densidad_raw)
-    attach_reference("MCP_DENS_PROM", densidad_rows)
-    results.extend(densidad_rows)
 
-    temperatura_raw = load_raw_records("interno_temperatura", "temperatura")
-    temp_max_rows = calc_temperatura_max(temperatura_raw)
-    attach_reference("MCP_TEMP_MAX", temp_max_rows)
-    results.extend(temp_max_rows)
+def touched_predicate(touched: Dict[str, Set[str]]) -> Callable[[dict], bool]:
+    """Filas cuya (fuente, fecha) está en una partición recalculada."""
 
-    temp_rng_rows = calc_temperatura_rango(temperatura_raw)
-    attach_reference("MCP_TEMP_RANGO", temp_rng_rows)
-    results.extend(temp_rng_rows)
+    def replaced(row: dict) -> bool:
+        source = INDICATOR_SOURCE.get(row.get("id_indicador"))
+        return source is not None and row.get("fecha") in touched.get(source, ())
 
+    return replaced
+
+
+def range_predicate(
+    desde: Optional[date], hasta: Optional[date], tramos: Optional[Set[str]]
+) -> Callable[[dict], bool]:
+    """Filas de los indicadores MCP dentro del rango de fechas y tramos pedido."""
+    lo = desde.isoformat() if desde else ""
+    hi = hasta.isoformat() if hasta else "9999-12-31"
+
+    def replaced(row: dict) -> bool:
+        if row.get("id_indicador") not in INDICATOR_SOURCE:
+            return False
+        if tramos is not None and row.get("tramo_id") not in tramos:
+            return False
+        return lo <= (row.get("fecha") or "") <= hi
+
+    return replaced
+
+
+def update_manifest_after_range(
+    manifest: Optional[dict],
+    current_before: Optional[str],
+    raw_files: Dict[str, Dict[str, List[int]]],
+    partitions: Dict[str, List[Path]],
+    files_consumed: bool,
+) -> None:
+    """
+    Tras un recálculo por rango, el manifiesto sigue valiendo para el
+    incremental: se actualiza la versión current y, si se recalcularon las
+    particiones completas (sin filtro de tramo), sus archivos consumidos. Si
+    el manifiesto ya no correspondía al current, se deja como está (el
+    próximo incremental hará un cálculo completo).
+    """
+    if manifest is None or manifest.get("current") != current_before:
+        return
+
+    files = manifest.get("files", {})
+    if files_consumed:
+        for name, folders in partitions.items():
+            folder_names = {str(folder) for folder in folders}
+            source_files = {
+                path: signature
+                for path, signature in files.get(name, {}).items()
+                if str(Path(path).parent) not in folder_names
+            }
+            source_files.update(raw_files.get(name, {}))
+            files[name] = source_files
+    save_manifest(files, manifest.get("references", {}))
+
+
+def plan_incremental(
+    raw_files: Dict[str, Dict[str, List[int]]], references: Dict[str, List[int]]
+) -> Optional[Dict[str, Set[Path]]]:
+    """
+    Decide qué particiones recalcular a partir del manifiesto.
+
+    Devuelve las particiones por fuente, o None si hay que recalcular todo:
+    sin manifiesto, sin versión current, referencias modificadas, o el
+    current ya no es el que se publicó (p. ej. tras un rollback).
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        logging.info("Sin manifiesto incremental: cálculo completo")
+        return None
+    if manifest.get("references") != references:
+        logging.info("Cambiaron los datasets de referencia: cálculo completo")
+        return None
+    current = SILVER_STORE.current_version()
+    if current is None or manifest.get("current") != current:
+        logging.info("La versión actual no es la del manifiesto: cálculo completo")
+        return None
+
+    partitions = {
+        name: with_root_twins(changed_partitions(manifest["files"].get(name, {}), files))
+        for name, files in raw_files.items()
+    }
+    for folders in partitions.values():
+        if any(partition_fecha(folder) is None for folder in folders):
+            logging.info("Partición RAW fuera del layout YYYY=/MM=/DD=: cálculo completo")
+            return None
+    return partitions
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cálculo de indicadores MCP")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Recalcula todo el historial RAW en vez de solo las particiones nuevas.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="python",
+        help="Motor de agregación: python (referencia) o numpy (columnar).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos para escanear RAW en paralelo por partición (1 = serial).",
+    )
+    parser.add_argument(
+        "--desde",
+        type=date.fromisoformat,
+        help="Recalcula solo desde esta fecha (YYYY-MM-DD) y la fusiona con el current.",
+    )
+    parser.add_argument(
+        "--hasta",
+        type=date.fromisoformat,
+        help="Recalcula solo hasta esta fecha (YYYY-MM-DD), inclusive.",
+    )
+    parser.add_argument(
+        "--export-csv",
+        action="store_true",
+        help="Exporta además la versión actual a data/silver/mcp_indicadores_current.csv.",
+    )
+    parser.add_argument(
+        "--tramo",
+        dest="tramos",
+        action="append",
+        help="Recalcula solo este tramo_id (se puede repetir).",
+    )
+    args = parser.parse_args()
+    if args.desde and args.hasta and args.desde > args.hasta:
+        parser.error("--desde debe ser anterior o igual a --hasta")
+    if args.full and (args.desde or args.hasta or args.tramos):
+        parser.error("--full no se combina con --desde/--hasta/--tramo")
+    return args
+
+
+def resolve_backend(backend: str) -> str:
+    if backend == "numpy":
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            logging.warning("numpy no está instalado: se usa el backend python")
+            return "python"
+    return backend
+
+
+def main(
+    full: bool = False,
+    backend: str = "python",
+    workers: int = 1,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    tramos: Optional[List[str]] = None,
+    export_csv: bool = False,
+) -> None:
+    start_time = datetime.now()
+    metrics = RunMetrics()
+    log_file = setup_logging()
+    logging.info("===== Inicio cálculo MCP =====")
+    backend = resolve_backend(backend)
+    tramo_filter = set(tramos) if tramos else None
+    ranged = desde is not None or hasta is not None or tramo_filter is not None
+
+    references = reference_signatures()
+    reference_cache = ReferenceCache(REFERENCE_CACHE_DIR)
     output_file: Path | None = None
-    if results:
-        output_file = write_results(results)
+    replaced: Optional[Callable[[dict], bool]] = None
+    # Fechas del silver que la corrida puede reescribir (None = todas)
+    affected: Optional[Set[str]] = None
+    base = SILVER_STORE.load_manifest()
+
+    with metrics.stage("load") as load:
+        if ranged:
+            # Recálculo por rango: solo se listan y abren las particiones del rango
+            manifest = load_manifest()
+            current_before = SILVER_STORE.current_version()
+            partitions = {
+                name: sorted(
+                    folder
+                    for base in raw_bases(fuente, tipo)
+                    for folder in prune_partitions(base, desde, hasta)
+                )
+                for name, (fuente, tipo) in RAW_SOURCES.items()
+            }
+            raw_files = {
+                name: scan_raw_files(*RAW_SOURCES[name], partitions=folders)
+                for name, folders in partitions.items()
+            }
+            if base is None:
+                logging.warning("No existe versión actual: la nueva solo tendrá el rango pedido")
+            lo = desde.isoformat() if desde else ""
+            hi = hasta.isoformat() if hasta else "9999-12-31"
+            affected = {
+                fecha for fecha in (base or {}).get("partitions", {}) if lo <= fecha <= hi
+            }
+            replaced = range_predicate(desde, hasta, tramo_filter)
+            logging.info(
+                "Recálculo por rango: desde=%s hasta=%s tramos=%s (%s)",
+                desde or "-",
+                hasta or "-",
+                ", ".join(sorted(tramo_filter)) if tramo_filter else "todos",
+                ", ".join(
+                    f"{name}={len(folders)} particiones" for name, folders in partitions.items()
+                ),
+            )
+        else:
+            # Firmas antes de leer: si un archivo cambia durante la lectura, la
+            # próxima corrida lo vuelve a considerar modificado
+            raw_files = {name: scan_raw_files(*source) for name, source in RAW_SOURCES.items()}
+            partitions = None if full else plan_incremental(raw_files, references)
+            if partitions is not None:
+                touched = {
+                    name: {partition_fecha(folder) for folder in folders}
+                    for name, folders in partitions.items()
+                }
+                affected = set().union(*touched.values())
+                replaced = touched_predicate(touched)
+                logging.info(
+                    "Cálculo incremental: %s",
+                    ", ".join(f"{name}={len(fechas)} fechas" for name, fechas in touched.items()),
+                )
+        load.add(files=sum(len(files) for files in raw_files.values()))
+
+    lecturas: Dict[str, int] = {name: 0 for name in RAW_SOURCES}
+    # Filas recalculadas en esta corrida (no los totales de la versión publicada)
+    calc_counts: Dict[str, int] = {}
+    status_summary: Dict[str, int] = defaultdict(int)
+    if replaced is not None and not ranged and not any(partitions.values()):
+        logging.info("Sin lecturas RAW nuevas: la versión actual sigue vigente")
     else:
-        logging.warning("No se generaron indicadores MCP (sin lecturas RAW)")
+        # Un único recorrido por fuente alimenta todos sus indicadores
+        sketch_updates: List[Tuple[str, FieldGroups]] = []
+        rows_by_indicator: Dict[str, List[dict]] = {}
+        for name, (fuente, tipo) in RAW_SOURCES.items():
+            source_partitions = partitions[name] if partitions is not None else None
+            # Lectura y agrupación son un único recorrido en streaming: la
+            # etapa group incluye abrir y parsear los archivos RAW
+            with metrics.stage(f"group.{name}") as group:
+                field_groups, lecturas[name] = aggregate_raw(
+                    fuente,
+                    tipo,
+                    partitions=source_partitions,
+                    backend=backend,
+                    workers=workers,
+                    tramos=tramo_filter,
+                    group_fields=group_fields_for(name),
+                    with_sketches=needs_sketch(name),
+                )
+                files, size = raw_volume(raw_files[name], source_partitions)
+                group.add(files=files, rows=lecturas[name], bytes_read=size)
+            if needs_sketch(name):
+                sketch_updates.append((name, field_groups))
+            for spec in indicators_for(name):
+                with metrics.stage(f"calc.{spec.indicator_id}") as calc:
+                    rows = calc_indicator(spec, field_groups[spec.group_field])
+                    calc.add(rows=len(rows))
+                with metrics.stage("attach_reference") as join:
+                    attach_reference(spec, rows, reference_cache, backend)
+                    join.add(rows=len(rows))
+                rows_by_indicator[spec.indicator_id] = rows
+                calc_counts[spec.indicator_id] = len(rows)
+                for row in rows:
+                    status_summary[row["status"]] += 1
+
+        recomputed: Dict[str, List[dict]] = defaultdict(list)
+        for spec in INDICATORS:
+            for row in rows_by_indicator[spec.indicator_id]:
+                recomputed[row["fecha"]].append(row)
+
+        # Solo se reescriben las fechas afectadas: las demás particiones del
+        # silver siguen apuntando a los archivos de la versión anterior (y las
+        # afectadas se guardan como delta sobre ella, ver silver_store.py)
+        if replaced is None:
+            # Cálculo completo: las fechas que ya no tienen lecturas se eliminan
+            changed = {fecha: [] for fecha in (base or {}).get("partitions", {})}
+            changed.update(recomputed)
+        else:
+            changed = {
+                fecha: merge_results(
+                    SILVER_STORE.read_fecha(fecha, base), recomputed.get(fecha, []), replaced
+                )
+                for fecha in sorted(affected | recomputed.keys())
+            }
+
+        if changed:
+            output_file = write_results(changed, base, metrics)
+            with metrics.stage("manifest"):
+                if ranged:
+                    update_manifest_after_range(
+                        manifest, current_before, raw_files, partitions, tramo_filter is None
+                    )
+                else:
+                    save_manifest(raw_files, references)
+                for name, field_groups in sketch_updates:
+                    if partitions is None:
+                        fechas = None
+                    else:
+                        fechas = {partition_fecha(folder) for folder in partitions[name]}
+                    save_partition_sketches(
+                        name, field_groups, fechas, partial=tramo_filter is not None
+                    )
+        else:
+            logging.warning("No se generaron indicadores MCP (sin lecturas RAW)")
+
+    if export_csv:
+        exported = SILVER_STORE.export_csv(CURRENT_FILE)
+        logging.info("Versión actual exportada a %s (%s filas)", CURRENT_FILE, exported)
 
     end_time = datetime.now()
-    calc_counts = {
-        "MCP_DENS_PROM": len(densidad_rows),
-        "MCP_TEMP_MAX": len(temp_max_rows),
-        "MCP_TEMP_RANGO": len(temp_rng_rows),
-    }
-    raw_counts = {
-        "densidad": len(densidad_raw),
-        "temperatura": len(temperatura_raw),
-    }
-    status_summary = summarize_status(results)
     record_run_history(
         start_time,
         end_time,
         log_file,
         output_file,
-        raw_counts,
+        lecturas,
         calc_counts,
         status_summary,
+        reference_cache.counters(),
+        metrics,
+    )
+    metrics.log_summary()
+    logging.info(
+        "Caché de referencias: %s hits, %s misses",
+        reference_cache.hits,
+        reference_cache.misses,
     )
 
     logging.info("===== Fin cálculo MCP =====")
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    # Exclusión mutua con la compactación y la retención (ver pipeline_lock.py)
+    with pipeline_lock():
+        main(
+            full=args.full,
+            backend=args.backend,
+            workers=args.workers,
+            desde=args.desde,
+            hasta=args.hasta,
+            tramos=args.tramos,
+            export_csv=args.export_csv,
+        )
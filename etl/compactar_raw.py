@@ -0,0 +1,229 @@
+"""Compactación de particiones RAW cerradas en segmentos columnares.
+
+Años de historia quedaron como un archivo JSON por lectura (y muchos
+segmentos NDJSON chicos) en ``data/raw``. Este comando reescribe cada
+partición ``YYYY=/MM=/DD=`` cerrada en un único segmento ``compact_*.seg``
+(ver ``etl/raw_segments.py``) y después borra los originales.
+
+Una partición está cerrada si su fecha tiene al menos ``--min-age-days`` días
+y no tiene segmentos ``.ndjson.open``. Si a una partición ya compactada le
+llegan lecturas tardías, la próxima compactación las funde con el segmento
+existente en uno nuevo.
+
+Si la lectura de algún archivo falla, la partición no se toca (no se
+retira nada que no haya quedado en el segmento). El cálculo MCP detecta los
+archivos cambiados por su manifiesto y recalcula una vez las fechas
+compactadas.
+
+Uso:
+    python etl/compactar_raw.py [--fuente interno_densidad] [--min-age-days 1] [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+# Raíz del proyecto en sys.path para importar los módulos de etl/
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from etl.calculo_mcp_indicadores import RAW_PATH, partition_fecha, prune_partitions
+from etl.pipeline_lock import pipeline_lock
+from etl.raw_segments import (
+    SEGMENT_PREFIX,
+    SEGMENT_SUFFIX,
+    iter_segment,
+    live_raw_files,
+    read_footer,
+    write_segment,
+)
+
+LOG_DIR = Path("logs")
+# Segmentos que la API todavía está escribiendo (ver api/app/raw_store.py)
+OPEN_SUFFIX = ".ndjson.open"
+
+
+@dataclass
+class CompactionResult:
+    folder: Path
+    files: int
+    rows: int
+    bytes_before: int
+    bytes_after: int
+
+
+def setup_logging() -> Path:
+    LOG_DIR.mkdir(exist_ok=True, parents=True)
+    log_file = LOG_DIR / f"compactar_raw_{datetime.now():%Y%m%d_%H%M%S}.log"
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+        handlers=[
+            logging.FileHandler(log_file, encoding="utf-8"),
+            logging.StreamHandler(),
+        ],
+    )
+    return log_file
+
+
+def is_closed(folder: Path, cutoff: date) -> bool:
+    fecha = partition_fecha(folder)
+    if fecha is None or date.fromisoformat(fecha) > cutoff:
+        return False
+    return not any(folder.glob(f"*{OPEN_SUFFIX}"))
+
+
+def read_rows_strict(path: Path) -> List[dict]:
+    """Lecturas de un archivo RAW; cualquier error se propaga (no se compacta)."""
+    if path.suffix == SEGMENT_SUFFIX:
+        rows = [row for row, _, _ in iter_segment(path)]
+    elif path.suffix == ".json":
+        rows = [json.loads(path.read_text(encoding="utf-8"))]
+    else:
+        with path.open("rb") as fh:
+            rows = [json.loads(line) for line in fh if line.strip()]
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError(f"Lectura que no es un objeto JSON en {path}")
+    return rows
+
+
+def compact_partition(folder: Path, dry_run: bool = False) -> Optional[CompactionResult]:
+    """
+    Compacta una partición; None si ya estaba compactada o no tiene archivos.
+
+    Los segmentos ``.ndjson.open`` nunca entran al segmento compactado ni a
+    sus ``sources``: ``is_closed`` se comprobó antes, pero una carga tardía
+    de la API puede abrir uno en el medio. Ese segmento sigue vigente y lo
+    funde la próxima compactación.
+    """
+    files = [path for path in live_raw_files(folder) if not path.name.endswith(OPEN_SUFFIX)]
+    if not files or (len(files) == 1 and files[0].suffix == SEGMENT_SUFFIX):
+        return None
+
+    rows: List[dict] = []
+    for path in files:
+        rows.extend(read_rows_strict(path))
+
+    # Los originales de segmentos anteriores siguen listados por si quedaron
+    # restos de una compactación interrumpida
+    sources = {path.name for path in files}
+    for path in files:
+        if path.suffix == SEGMENT_SUFFIX:
+            sources.update(read_footer(path).get("sources", []))
+
+    bytes_before = sum(path.stat().st_size for path in files)
+    if dry_run:
+        return CompactionResult(folder, len(files), len(rows), bytes_before, 0)
+
+    segment = folder / f"{SEGMENT_PREFIX}{datetime.now():%Y%m%d_%H%M%S_%f}{SEGMENT_SUFFIX}"
+    write_segment(segment, rows, sorted(sources))
+
+    # Desde aquí los lectores ya ignoran los originales: borrarlos es limpieza
+    for name in sources:
+        (folder / name).unlink(missing_ok=True)
+
+    return CompactionResult(
+        folder, len(files), len(rows), bytes_before, segment.stat().st_size
+    )
+
+
+def source_dirs(fuentes: Optional[List[str]]) -> List[Path]:
+    """Carpetas <fuente>/<tipo> de data/raw (todas o las de las fuentes pedidas)."""
+    if not RAW_PATH.exists():
+        return []
+    return [
+        tipo_dir
+        for fuente_dir in sorted(RAW_PATH.iterdir())
+        if fuente_dir.is_dir() and (not fuentes or fuente_dir.name in fuentes)
+        for tipo_dir in sorted(fuente_dir.iterdir())
+        if tipo_dir.is_dir()
+    ]
+
+
+def main(
+    fuentes: Optional[List[str]] = None,
+    min_age_days: int = 1,
+    dry_run: bool = False,
+) -> int:
+    setup_logging()
+    cutoff = date.today() - timedelta(days=min_age_days)
+    logging.info(
+        "===== Inicio compactación RAW (particiones hasta %s%s) =====",
+        cutoff,
+        ", dry-run" if dry_run else "",
+    )
+
+    compacted: List[CompactionResult] = []
+    failed = 0
+    for base_path in source_dirs(fuentes):
+        for folder in prune_partitions(base_path, hasta=cutoff):
+            if not is_closed(folder, cutoff):
+                continue
+            try:
+                result = compact_partition(folder, dry_run)
+            except (OSError, ValueError) as exc:
+                failed += 1
+                logging.error("No se compactó %s: %s", folder, exc)
+                continue
+            if result is not None:
+                compacted.append(result)
+                logging.info(
+                    "%s: %s archivos, %s lecturas, %s -> %s bytes",
+                    folder,
+                    result.files,
+                    result.rows,
+                    result.bytes_before,
+                    result.bytes_after,
+                )
+
+    logging.info(
+        "Particiones compactadas: %s (%s archivos, %s lecturas), con error: %s",
+        len(compacted),
+        sum(result.files for result in compacted),
+        sum(result.rows for result in compacted),
+        failed,
+    )
+    logging.info("===== Fin compactación RAW =====")
+    return 1 if failed else 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compactación de particiones RAW")
+    parser.add_argument(
+        "--fuente",
+        action="append",
+        dest="fuentes",
+        help="Fuente de data/raw a compactar (repetible; por defecto todas).",
+    )
+    parser.add_argument(
+        "--min-age-days",
+        type=int,
+        default=1,
+        help="Solo compacta particiones con al menos esta antigüedad en días.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Muestra qué se compactaría sin escribir ni borrar archivos.",
+    )
+    args = parser.parse_args()
+    if args.min_age_days < 0:
+        parser.error("--min-age-days no puede ser negativo")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with pipeline_lock():
+        sys.exit(
+            main(fuentes=args.fuentes, min_age_days=args.min_age_days, dry_run=args.dry_run)
+        )
@@ -0,0 +1,266 @@
+"""Ejecutor DAG mínimo para las etapas del pipeline MCP.
+
+Cada etapa es un script del proyecto que se ejecuta *en proceso* dentro de un
+worker de un pool de procesos (``runpy.run_path`` con ``__name__ ==
+"__main__"``), en vez de lanzar un intérprete nuevo con ``subprocess.run``.
+Las etapas cuyas dependencias ya terminaron corren en paralelo.
+
+- stdout/stderr de cada etapa se reenvían línea a línea al log del padre
+  mientras la etapa corre (no al final).
+- Si una etapa falla, sus dependientes quedan ``skipped`` salvo que se pida
+  ``continue_on_error`` (p. ej. calcular sobre RAW parcial).
+- Se mide el tiempo de pared de cada etapa y el pico de memoria (RSS) del
+  worker mientras la corre (ver ``run_metrics.py``).
+- Si un worker muere (OOM, segfault en una extensión) el pool queda roto: la
+  etapa que corría, y las que se intenten lanzar después, quedan ``failed``
+  con returncode -1 y sus dependientes ``skipped``, sin cortar la corrida.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import runpy
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from etl.process_pool import pool_context
+from etl.run_metrics import peak_rss_mb, reset_peak_rss
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+STATUS_SKIPPED = "skipped"
+
+
+@dataclass
+class Stage:
+    name: str
+    script: Path
+    deps: List[str] = field(default_factory=list)
+    args: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StageResult:
+    status: str
+    duration: float = 0.0
+    returncode: Optional[int] = None
+    peak_rss_mb: Optional[float] = None
+
+
+class _QueueWriter(io.TextIOBase):
+    """Reemplazo de stdout/stderr que envía cada línea completa a una cola."""
+
+    def __init__(self, queue, stage: str, stream: str):
+        self._queue = queue
+        self._stage = stage
+        self._stream = stream
+        self._buffer = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            self._queue.put((self._stage, self._stream, line))
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._queue.put((self._stage, self._stream, self._buffer))
+            self._buffer = ""
+
+
+# Cola de salida heredada por los workers (se fija en el initializer del pool)
+_output_queue = None
+
+
+def _init_worker(queue) -> None:
+    global _output_queue
+    _output_queue = queue
+
+
+def _run_stage(stage: Stage) -> Tuple[int, Optional[float]]:
+    """
+    Ejecuta el script de una etapa dentro del worker; devuelve el returncode
+    y el pico de RSS del worker durante la etapa (MB).
+    """
+    queue = _output_queue
+    stdout = _QueueWriter(queue, stage.name, "stdout")
+    stderr = _QueueWriter(queue, stage.name, "stderr")
+    old_argv, old_path = sys.argv, list(sys.path)
+    sys.stdout, sys.stderr = stdout, stderr
+
+    # Los workers se reutilizan: cada etapa arranca sin handlers de logging
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    sys.argv = [str(stage.script), *stage.args]
+    sys.path.insert(0, str(Path(stage.script).parent))
+    # Los workers se reutilizan: el pico de memoria se mide desde aquí
+    reset_peak_rss()
+    returncode = 0
+    try:
+        runpy.run_path(str(stage.script), run_name="__main__")
+    except SystemExit as exc:
+        if isinstance(exc.code, int):
+            returncode = exc.code
+        elif exc.code is not None:
+            print(exc.code, file=sys.stderr)
+            returncode = 1
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        logging.shutdown()
+        stdout.flush()
+        stderr.flush()
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        sys.argv, sys.path[:] = old_argv, old_path
+    return returncode, peak_rss_mb()
+
+
+def _forward_output(queue, log: Callable[[str], None]) -> None:
+    while True:
+        item = queue.get()
+        if item is None:
+            return
+        stage, stream, line = item
+        prefix = f"[{stage}]" if stream == "stdout" else f"[{stage}] STDERR:"
+        log(f"{prefix} {line}")
+
+
+def run_dag(
+    stages: List[Stage],
+    log: Callable[[str], None],
+    max_workers: int = 4,
+    continue_on_error: bool = False,
+    on_stage_change: Optional[Callable[[str, str, Optional[StageResult]], None]] = None,
+) -> Dict[str, StageResult]:
+    """
+    Ejecuta las etapas respetando sus dependencias.
+
+    ``on_stage_change(nombre, estado, resultado)`` se llama al iniciar
+    (``running``) y al terminar cada etapa. Devuelve los resultados en el
+    orden de ``stages``.
+    """
+    max_workers = max(1, max_workers)
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"Etapa {stage.name}: dependencias desconocidas {missing}")
+
+    results: Dict[str, StageResult] = {}
+    pending = list(stages)
+    running: Dict[Future, tuple] = {}
+
+    def notify(name: str, status: str, result: Optional[StageResult] = None) -> None:
+        if on_stage_change is not None:
+            on_stage_change(name, status, result)
+
+    def finish(stage: Stage, result: StageResult) -> None:
+        results[stage.name] = result
+        if result.status == STATUS_OK:
+            log(f"[OK] Etapa completada: {stage.name} ({result.duration:.2f}s)")
+        else:
+            log(
+                f"[ERROR] Etapa falló: {stage.name} "
+                f"(code={result.returncode}, {result.duration:.2f}s)"
+            )
+        notify(stage.name, result.status, result)
+
+    ctx = pool_context()
+    queue = ctx.Queue()
+    forwarder = threading.Thread(target=_forward_output, args=(queue, log), daemon=True)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(queue,),
+        ) as pool:
+            # Con fork los workers se crean en el primer submit: se fuerzan
+            # antes de arrancar el hilo reenviador para que ningún hijo herede
+            # un hilo vivo con locks de la cola o del log tomados
+            pool.submit(int).result()
+            forwarder.start()
+            while pending or running:
+                for stage in list(pending):
+                    # Solo se envía cuando hay un worker libre, así el tiempo
+                    # medido es el de ejecución y no el de espera en cola
+                    if len(running) >= max_workers:
+                        break
+                    dep_results = [results.get(dep) for dep in stage.deps]
+                    if any(result is None for result in dep_results):
+                        continue
+                    pending.remove(stage)
+
+                    failed = [
+                        dep
+                        for dep, result in zip(stage.deps, dep_results)
+                        if result.status != STATUS_OK
+                    ]
+                    if failed and not continue_on_error:
+                        results[stage.name] = StageResult(STATUS_SKIPPED)
+                        log(
+                            f"[SKIP] Etapa {stage.name}: fallaron sus dependencias "
+                            f"{', '.join(failed)}"
+                        )
+                        notify(stage.name, STATUS_SKIPPED, results[stage.name])
+                        continue
+                    if failed:
+                        log(
+                            f"[WARNING] Etapa {stage.name} corre con dependencias "
+                            f"fallidas: {', '.join(failed)}"
+                        )
+
+                    log(f"Inicio etapa: {stage.name} ({stage.script})")
+                    notify(stage.name, "running")
+                    try:
+                        future = pool.submit(_run_stage, stage)
+                    except BrokenProcessPool as exc:
+                        log(f"[ERROR] Etapa {stage.name}: pool de workers roto ({exc})")
+                        finish(stage, StageResult(STATUS_FAILED, returncode=-1))
+                        continue
+                    running[future] = (stage, time.monotonic())
+
+                if not running:
+                    if pending:
+                        names = ", ".join(stage.name for stage in pending)
+                        raise ValueError(f"Dependencias circulares entre: {names}")
+                    continue
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, started = running.pop(future)
+                    duration = time.monotonic() - started
+                    peak_rss = None
+                    try:
+                        returncode, peak_rss = future.result()
+                    except BrokenProcessPool as exc:  # el worker murió
+                        log(f"[ERROR] Etapa {stage.name}: worker caído ({exc})")
+                        returncode = -1
+                    except Exception as exc:
+                        log(f"[ERROR] Etapa {stage.name}: error en el worker ({exc!r})")
+                        returncode = -1
+
+                    status = STATUS_OK if returncode == 0 else STATUS_FAILED
+                    finish(stage, StageResult(status, duration, returncode, peak_rss))
+    finally:
+        if forwarder.is_alive():
+            queue.put(None)
+            forwarder.join()
+
+    return {stage.name: results[stage.name] for stage in stages}
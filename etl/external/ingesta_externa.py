@@ -1,13 +1,23 @@
+import argparse
 import csv
-import time
+import sys
 from pathlib import Path
 from datetime import datetime
 import logging
-import requests
+
+# Raíz del proyecto en sys.path para importar el cliente compartido
+BASE_DIR = Path(__file__).resolve().parents[2]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from api.app.csv_mappings import SOURCE_MAPPINGS
+from etl.ingest_client import open_ingest_sink, send_csv_rows
 
 API_URL = "http://127.0.0.1:8000/ingesta/indicadores"  # tu API FastAPI interna
 CSV_PATH = Path("data/input/external.csv")
 MAX_RETRIES = 3
+BATCH_SIZE = 500
+CONCURRENCY = 4
 
 LOG_DIR = Path("data/logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -35,22 +45,12 @@ def setup_logging():
     logger.addHandler(ch)
 
 
-def row_to_indicador(row: dict) -> dict:
-    """
-    Mapea una fila del CSV externo al modelo Indicador
-    que recibe la API (/ingesta/indicadores).
-    """
-    return {
-        "fecha": row["fecha"],
-        "filial_code": row["filial_code"],
-        "servicio_code": row["servicio_code"],
-        "tipo_indicador": row["tipo_indicador"],
-        "valor": float(row["valor"]),
-        "fuente": "externo_csv",  # marcamos que viene de fuente externa
-    }
+# Mapeo fila del CSV externo -> modelo Indicador que recibe la API
+# (compartido con POST /ingesta/csv/externo_csv)
+row_to_indicador = SOURCE_MAPPINGS["externo_csv"]
 
 
-def run():
+def run(direct: bool = False):
     logger = logging.getLogger(__name__)
     logger.info("=== Iniciando HU2 - Ingesta externa desde external.csv ===")
 
@@ -58,45 +58,43 @@ def run():
         logger.error(f"No se encontró el archivo {CSV_PATH}")
         return {"status": "error", "message": "CSV no encontrado"}
 
-    with CSV_PATH.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+    def on_ok(idx: int, payload: dict):
+        logger.info(
+            f"[OK] fila {idx}: fecha={payload['fecha']} "
+            f"filial={payload['filial_code']} "
+            f"servicio={payload['servicio_code']} "
+            f"tipo={payload['tipo_indicador']} "
+            f"valor={payload['valor']}"
+        )
 
-        filas = 0
-        for idx, row in enumerate(reader, start=1):
-            filas += 1
-            payload = row_to_indicador(row)
-
-            for attempt in range(MAX_RETRIES):
-                try:
-                    resp = requests.post(API_URL, json=payload, timeout=10)
-                    resp.raise_for_status()
-
-                    logger.info(
-                        f"[OK] fila {idx}: fecha={payload['fecha']} "
-                        f"filial={payload['filial_code']} "
-                        f"servicio={payload['servicio_code']} "
-                        f"tipo={payload['tipo_indicador']} "
-                        f"valor={payload['valor']}"
-                    )
-                    break
-
-                except Exception as e:
-                    logger.warning(
-                        f"[HU2] intento {attempt+1}/{MAX_RETRIES} fallido "
-                        f"para fila {idx}: {e}"
-                    )
-                    if attempt < MAX_RETRIES - 1:
-                        time.sleep(2 ** attempt)
-                    else:
-                        logger.error(
-                            f"[HU2] fila {idx} descartada tras "
-                            f"{MAX_RETRIES} intentos"
-                        )
+    def on_error(idx: int, payload: dict, reason: str):
+        logger.error(f"[HU2] fila {idx} descartada: {reason}")
 
+    with CSV_PATH.open(newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        with open_ingest_sink(
+            API_URL,
+            direct=direct,
+            batch_size=BATCH_SIZE,
+            concurrency=CONCURRENCY,
+            max_retries=MAX_RETRIES,
+            logger=logger,
+        ) as client:
+            summary = send_csv_rows(client, reader, row_to_indicador, on_ok, on_error)
+
+    filas = summary["rows"]
     logger.info(f"HU2 finalizada. Filas leídas desde external.csv: {filas}")
     return {"status": "success", "rows": filas}
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help="Escribe en RAW en el mismo proceso, sin pasar por la API HTTP.",
+    )
+    args = parser.parse_args()
+
     setup_logging()
-    run()
+    run(direct=args.direct)
@@ -0,0 +1,131 @@
+"""Registro declarativo de los indicadores MCP.
+
+Cada indicador declara de qué fuente RAW sale, por qué campo se agrupa (junto
+con la fecha), con qué reductor se calcula, contra qué archivo de referencia
+se valida (si tiene) y en qué columna del historial de runs se cuenta. El cálculo
+(``calculo_mcp_indicadores.py``) planifica un único recorrido por fuente que
+alimenta todos los indicadores registrados sobre ella, así que agregar un
+indicador es agregar una entrada en ``INDICATORS``.
+
+El valor del campo de agrupación va en la columna homónima del dataset
+silver (``tramo_id`` o ``servicio_code``, ver ``GROUP_FIELDS``) y la otra
+queda vacía: los viajes validados, que no se miden por tramo, no mezclan
+códigos de servicio con tramos en los filtros por ``tramo_id`` ni en el join
+con las referencias.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Fuentes RAW: nombre lógico -> (fuente, tipo) en data/raw/<fuente>/<tipo>
+RAW_SOURCES: Dict[str, Tuple[str, str]] = {
+    "densidad": ("interno_densidad", "densidad"),
+    "temperatura": ("interno_temperatura", "temperatura"),
+    "viajes": ("interno_viajes", "viajes_validados"),
+}
+
+# Campos de agrupación admitidos: cada uno es una columna del dataset silver
+GROUP_FIELDS = ("tramo_id", "servicio_code")
+
+# Reductores sobre los acumuladores (count, total, min, max) de cada grupo
+REDUCERS = {
+    "mean": lambda stats: stats.total / stats.count,
+    "sum": lambda stats: stats.total,
+    "count": lambda stats: stats.count,
+    "max": lambda stats: stats.max,
+    "min": lambda stats: stats.min,
+    "range": lambda stats: stats.max - stats.min,
+}
+
+# Reductores de cuantil: usan el sketch del grupo (ver quantile_sketch.py),
+# con error relativo acotado en vez de guardar todas las lecturas
+QUANTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+REDUCERS.update(
+    {name: (lambda stats, q=q: stats.sketch.quantile(q)) for name, q in QUANTILES.items()}
+)
+
+
+# Archivo de referencia por defecto (en data/reference); ``reference=None``
+# declara un indicador sin dataset de referencia
+DEFAULT_REFERENCE = "mcp_reference_{indicator_id}.csv"
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    indicator_id: str
+    source: str
+    reducer: str
+    history_column: str
+    group_field: str = "tramo_id"
+    reference: Optional[str] = DEFAULT_REFERENCE
+
+    @property
+    def reference_file(self) -> Optional[str]:
+        """CSV de referencia del indicador, o None si no tiene."""
+        if self.reference is None:
+            return None
+        return self.reference.format(indicator_id=self.indicator_id)
+
+
+INDICATORS: List[IndicatorSpec] = [
+    IndicatorSpec("MCP_DENS_PROM", "densidad", "mean", "indicadores_densidad"),
+    IndicatorSpec("MCP_TEMP_MAX", "temperatura", "max", "indicadores_temp_max"),
+    IndicatorSpec("MCP_TEMP_RANGO", "temperatura", "range", "indicadores_temp_rango"),
+    # Los cuantiles no tienen dataset de referencia: status sin_referencia_definida
+    IndicatorSpec("MCP_DENS_P50", "densidad", "p50", "indicadores_densidad_p50", reference=None),
+    IndicatorSpec("MCP_DENS_P95", "densidad", "p95", "indicadores_densidad_p95", reference=None),
+    IndicatorSpec("MCP_DENS_P99", "densidad", "p99", "indicadores_densidad_p99", reference=None),
+    IndicatorSpec("MCP_TEMP_P50", "temperatura", "p50", "indicadores_temp_p50", reference=None),
+    IndicatorSpec("MCP_TEMP_P95", "temperatura", "p95", "indicadores_temp_p95", reference=None),
+    IndicatorSpec("MCP_TEMP_P99", "temperatura", "p99", "indicadores_temp_p99", reference=None),
+    IndicatorSpec(
+        "MCP_VIAJES_TOTAL",
+        "viajes",
+        "sum",
+        "indicadores_viajes_total",
+        group_field="servicio_code",
+    ),
+]
+
+
+def indicators_for(source: str) -> List[IndicatorSpec]:
+    return [spec for spec in INDICATORS if spec.source == source]
+
+
+def group_fields_for(source: str) -> Tuple[str, ...]:
+    """Campos de agrupación distintos de los indicadores de una fuente, en orden."""
+    return tuple(dict.fromkeys(spec.group_field for spec in indicators_for(source)))
+
+
+def needs_sketch(source: str) -> bool:
+    """True si algún indicador de la fuente es un cuantil."""
+    return any(spec.reducer in QUANTILES for spec in indicators_for(source))
+
+
+def active_sources() -> Dict[str, Tuple[str, str]]:
+    """Fuentes con al menos un indicador registrado (las que se recorren)."""
+    return {name: source for name, source in RAW_SOURCES.items() if indicators_for(name)}
+
+
+INDICATOR_SOURCE: Dict[str, str] = {spec.indicator_id: spec.source for spec in INDICATORS}
+
+
+def validate_registry() -> None:
+    seen = set()
+    for spec in INDICATORS:
+        if spec.indicator_id in seen:
+            raise ValueError(f"Indicador duplicado en el registro: {spec.indicator_id}")
+        seen.add(spec.indicator_id)
+        if spec.source not in RAW_SOURCES:
+            raise ValueError(f"{spec.indicator_id}: fuente desconocida {spec.source}")
+        if spec.reducer not in REDUCERS:
+            raise ValueError(f"{spec.indicator_id}: reductor desconocido {spec.reducer}")
+        if spec.group_field not in GROUP_FIELDS:
+            raise ValueError(
+                f"{spec.indicator_id}: campo de agrupación desconocido {spec.group_field}"
+            )
+
+
+validate_registry()
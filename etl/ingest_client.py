@@ -0,0 +1,238 @@
+"""Cliente de ingesta compartido por los scripts de etl/internal y etl/external.
+
+Reemplaza el ``requests.post`` por fila por envíos en lote a
+``/ingesta/indicadores/batch``:
+
+- una ``requests.Session`` con pool de conexiones keep-alive,
+- ``concurrency`` lotes en vuelo a la vez (ThreadPoolExecutor),
+- el mismo reintento con espera exponencial (1s, 2s, 4s...) aplicado por lote,
+- una ``Idempotency-Key`` por lote que se repite en cada reintento, para que
+  un reintento tras un timeout no duplique lecturas en RAW.
+
+Los resultados se entregan en el orden de las filas del CSV, así los logs por
+fila quedan igual de ordenados que antes.
+
+Con ``direct=True`` (``--direct`` en los scripts) ``open_ingest_sink``
+devuelve en cambio un ``api.app.landing.DirectLander``, que valida y escribe
+las particiones RAW en el mismo proceso, sin HTTP ni API levantada.
+
+``send_csv_rows`` mapea las filas del CSV antes de enviarlas: una fila que no
+se puede mapear (p. ej. un valor ``n/a``) se informa con ``on_error`` y cuenta
+como error, igual que una fila rechazada por validación, sin cortar la carga.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_TIMEOUT = 30
+
+# (número de fila, payload Indicador)
+Row = Tuple[int, dict]
+
+
+def batch_url(api_url: str) -> str:
+    """URL del endpoint batch a partir de la de /ingesta/indicadores."""
+    api_url = api_url.rstrip("/")
+    return api_url if api_url.endswith("/batch") else f"{api_url}/batch"
+
+
+class IngestClient:
+    """Envía filas en lotes concurrentes con reintentos por lote."""
+
+    def __init__(
+        self,
+        api_url: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        timeout: float = DEFAULT_TIMEOUT,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.url = batch_url(api_url)
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.concurrency, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "IngestClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def send(
+        self,
+        rows: Iterable[Row],
+        on_ok: Callable[[int, dict], None],
+        on_error: Callable[[int, dict, str], None],
+    ) -> dict:
+        """
+        Envía todas las filas y llama ``on_ok``/``on_error`` por fila, en orden.
+
+        Devuelve un resumen {"rows", "ok", "errors", "duplicates"}.
+        """
+        summary = {"rows": 0, "ok": 0, "errors": 0, "duplicates": 0}
+        in_flight: deque[Tuple[List[Row], Future]] = deque()
+
+        def drain_oldest() -> None:
+            batch, future = in_flight.popleft()
+            self._report(batch, future.result(), on_ok, on_error, summary)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for batch in self._batches(rows):
+                summary["rows"] += len(batch)
+                # Ventana acotada: nunca más de 2x concurrency lotes en memoria
+                while len(in_flight) >= self.concurrency * 2:
+                    drain_oldest()
+                in_flight.append((batch, pool.submit(self._post_batch, batch)))
+
+            while in_flight:
+                drain_oldest()
+
+        return summary
+
+    def _batches(self, rows: Iterable[Row]) -> Iterable[List[Row]]:
+        batch: List[Row] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _post_batch(self, batch: List[Row]) -> Optional[dict]:
+        """POST de un lote con reintentos; None si se agotaron los intentos."""
+        first, last = batch[0][0], batch[-1][0]
+        headers = {"Idempotency-Key": uuid.uuid4().hex}
+        body = [payload for _, payload in batch]
+
+        for attempt in range(self.max_retries):
+            try:
+                response = self.session.post(
+                    self.url, json=body, headers=headers, timeout=self.timeout
+                )
+                response.raise_for_status()
+                return response.json()
+            except Exception as e:
+                self.logger.warning(
+                    f"[WARNING] Intento {attempt+1}/{self.max_retries} falló "
+                    f"para filas {first}-{last}: {e}"
+                )
+                if attempt < self.max_retries - 1:
+                    # Espera incremental: 1s, 2s, 4s...
+                    time.sleep(2 ** attempt)
+
+        self.logger.error(
+            f"[ERROR] Filas {first}-{last} NO procesadas después de "
+            f"{self.max_retries} intentos."
+        )
+        return None
+
+    @staticmethod
+    def _report(
+        batch: List[Row],
+        response: Optional[dict],
+        on_ok: Callable[[int, dict], None],
+        on_error: Callable[[int, dict, str], None],
+        summary: dict,
+    ) -> None:
+        if response is None:
+            for idx, payload in batch:
+                summary["errors"] += 1
+                on_error(idx, payload, "lote no procesado")
+            return
+
+        results = response.get("results", [])
+        for (idx, payload), result in zip(batch, results):
+            status = result.get("status")
+            if status == "rejected":
+                summary["errors"] += 1
+                on_error(idx, payload, f"rechazada por la API: {result.get('errors')}")
+                continue
+            if status == "duplicate":
+                summary["duplicates"] += 1
+            summary["ok"] += 1
+            on_ok(idx, payload)
+
+
+def open_ingest_sink(
+    api_url: str,
+    direct: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    logger: Optional[logging.Logger] = None,
+):
+    """
+    Destino de ingesta con interfaz ``send(rows, on_ok, on_error)``:
+    ``IngestClient`` vía HTTP o ``DirectLander`` en proceso.
+    """
+    if direct:
+        # Importación diferida: solo el modo directo necesita pydantic
+        from api.app.landing import DirectLander
+
+        return DirectLander(logger=logger)
+
+    return IngestClient(
+        api_url,
+        batch_size=batch_size,
+        concurrency=concurrency,
+        max_retries=max_retries,
+        logger=logger,
+    )
+
+
+def send_csv_rows(
+    sink,
+    reader: Iterable[dict],
+    row_to_indicador: Callable[[dict], dict],
+    on_ok: Callable[[int, dict], None],
+    on_error: Callable[[int, dict, str], None],
+) -> dict:
+    """
+    Mapea las filas de ``reader`` (numeradas desde 1) y las envía a ``sink``.
+
+    Devuelve el resumen de ``sink.send`` con las filas no mapeables sumadas a
+    ``rows`` y ``errors``.
+    """
+    unmapped = 0
+
+    def mapped() -> Iterator[Row]:
+        nonlocal unmapped
+        for idx, row in enumerate(reader, start=1):
+            try:
+                payload = row_to_indicador(row)
+            except (KeyError, TypeError, ValueError) as exc:
+                unmapped += 1
+                on_error(idx, row, f"fila no mapeable: {exc!r}")
+                continue
+            yield idx, payload
+
+    summary = sink.send(mapped(), on_ok, on_error)
+    summary["rows"] += unmapped
+    summary["errors"] += unmapped
+    return summary
@@ -1,10 +1,17 @@
+import argparse
 import csv
+import sys
 from pathlib import Path
-import time
 import logging
 from datetime import datetime
 
-import requests
+# Raíz del proyecto en sys.path para importar el cliente compartido
+BASE_DIR = Path(__file__).resolve().parents[2]
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from api.app.csv_mappings import SOURCE_MAPPINGS
+from etl.ingest_client import open_ingest_sink, send_csv_rows
 
 API_URL = "http://127.0.0.1:8000/ingesta/indicadores"
 
@@ -13,6 +20,10 @@ CSV_PATH = Path("data/input/viajes_validados.csv")
 
 MAX_RETRIES = 3
 
+# Filas por POST a /ingesta/indicadores/batch y lotes en vuelo a la vez
+BATCH_SIZE = 500
+CONCURRENCY = 4
+
 # Carpeta y archivo de logs
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
@@ -47,63 +58,61 @@ def setup_logging():
     logger.addHandler(fh)
     logger.addHandler(ch)
 
-def row_to_indicador(row: dict) -> dict:
-    """
-    HU1: transformar una fila del CSV interno al formato estándar MCP.
-    """
-    return {
-        "fecha": row["fecha"],                  # "2025-11-01"
-        "filial_code": row["filial_code"],      # "VA"
-        "servicio_code": row["servicio_code"],  # "01"
-        "tipo_indicador": "viajes_validados",
-        "valor": float(row["viajes_validados"]),
-        "fuente": "interno_viajes",
-    }
+# HU1: mapeo fila del CSV interno -> formato estándar MCP
+# (compartido con POST /ingesta/csv/viajes_validados)
+row_to_indicador = SOURCE_MAPPINGS["viajes_validados"]
 
 
-def process_csv(path: Path):
+def process_csv(path: Path, direct: bool = False):
+    """
+    Envía el CSV a la API en lotes o, con ``direct``, lo valida y escribe en
+    RAW en el mismo proceso.
+    """
     logger = logging.getLogger(__name__)
 
     if not path.exists():
         raise FileNotFoundError(f"No se encontró el archivo CSV: {path}")
 
+    def on_ok(idx: int, payload: dict):
+        logger.info(
+            f"[OK] Fila {idx}: fecha={payload['fecha']} "
+            f"filial={payload['filial_code']} servicio={payload['servicio_code']} "
+            f"densidad={payload['valor']}"
+        )
+
+    def on_error(idx: int, payload: dict, reason: str):
+        logger.error(f"[ERROR] Fila {idx} NO procesada: {reason}")
+
     with path.open(newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
-        for idx, row in enumerate(reader, start=1):
-            payload = row_to_indicador(row)
-
-            for attempt in range(MAX_RETRIES):
-                try:
-                    response = requests.post(API_URL, json=payload, timeout=10)
-                    response.raise_for_status()
-
-                    logger.info(
-                        f"[OK] Fila {idx}: fecha={payload['fecha']} "
-                        f"filial={payload['filial_code']} servicio={payload['servicio_code']} "
-                        f"densidad={payload['valor']}"
-                    )
-                    break  # éxito, dejamos de reintentar
-
-                except Exception as e:
-                    logger.warning(
-                        f"[WARNING] Intento {attempt+1}/{MAX_RETRIES} falló "
-                        f"para fila {idx}: {e}"
-                    )
-
-                    if attempt < MAX_RETRIES - 1:
-                        # Espera incremental: 1s, 2s, 4s...
-                        time.sleep(2 ** attempt)
-                    else:
-                        logger.error(
-                            f"[ERROR] Fila {idx} NO procesada después de "
-                            f"{MAX_RETRIES} intentos."
-                        )
-
+        with open_ingest_sink(
+            API_URL,
+            direct=direct,
+            batch_size=BATCH_SIZE,
+            concurrency=CONCURRENCY,
+            max_retries=MAX_RETRIES,
+            logger=logger,
+        ) as client:
+            summary = send_csv_rows(client, reader, row_to_indicador, on_ok, on_error)
+
+    logger.info(
+        f"Filas enviadas: {summary['rows']} (ok={summary['ok']}, "
+        f"errores={summary['errors']}, duplicadas={summary['duplicates']})"
+    )
+    return summary
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help="Escribe en RAW en el mismo proceso, sin pasar por la API HTTP.",
+    )
+    args = parser.parse_args()
+
     setup_logging()
     logger = logging.getLogger(__name__)
     logger.info(f"Procesando archivo de viajes: {CSV_PATH}")
-    process_csv(CSV_PATH)
+    process_csv(CSV_PATH, direct=args.direct)
     logger.info("Proceso densidad completado.")
\ No newline at end of file
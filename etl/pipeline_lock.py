@@ -0,0 +1,58 @@
+"""Lock entre procesos para los pasos que reescriben RAW y silver.
+
+El cálculo MCP (que lanza el scheduler semanal vía ``run_all_etl.py``), la
+compactación RAW y la retención toman el mismo lock exclusivo
+(``flock`` sobre ``data/metadata/pipeline.lock``), así que nunca mueven o
+borran archivos mientras otro los está leyendo o publicando. El sistema
+operativo libera el lock si el proceso muere.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (Windows)
+    fcntl = None
+
+PIPELINE_LOCK_PATH = Path("data/metadata/pipeline.lock")
+
+
+class PipelineBusy(RuntimeError):
+    """Otro proceso tiene el lock del pipeline."""
+
+
+@contextmanager
+def pipeline_lock(
+    path: Path = PIPELINE_LOCK_PATH, timeout: Optional[float] = None
+) -> Iterator[None]:
+    """
+    Toma el lock exclusivo; espera como máximo ``timeout`` segundos (None =
+    sin límite, 0 = no esperar) y lanza ``PipelineBusy`` si no lo consigue.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is None:
+            logging.warning("Sin fcntl: el lock del pipeline no está disponible")
+        else:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise PipelineBusy(f"El pipeline está en uso ({path})")
+                    time.sleep(0.5)
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode("ascii"))
+        yield
+    finally:
+        os.close(fd)
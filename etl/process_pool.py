@@ -0,0 +1,18 @@
+"""Contexto de multiprocessing para los pools de procesos del ETL.
+
+El ejecutor DAG (``dag.py``) y el escaneo RAW en paralelo del cálculo MCP
+prefieren ``fork``: los workers heredan los módulos ya importados y arrancan
+sin volver a importar el proyecto. Donde ``fork`` no existe (Windows) se usa
+el método por defecto de la plataforma en lugar de fallar con ``ValueError``.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+
+def pool_context() -> BaseContext:
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
@@ -0,0 +1,131 @@
+"""Sketch de cuantiles mergeable con error relativo acotado (estilo DDSketch).
+
+Los percentiles exactos (P50/P95/P99) obligan a guardar todas las lecturas
+de cada grupo. Este sketch guarda solo conteos por bucket logarítmico:
+
+- el valor ``x > 0`` cae en el bucket ``k = ceil(log(x) / log(gamma))`` con
+  ``gamma = (1 + alpha) / (1 - alpha)``; los negativos usan ``-x`` en otro
+  store y los valores con ``|x| < MIN_INDEXABLE`` se cuentan como cero;
+- **cota de error**: el cuantil devuelto ``v`` cumple
+  ``|v - x_q| <= alpha * |x_q|``, donde ``x_q`` es el valor exacto de rango
+  ``floor(q * (n - 1))`` entre las lecturas del grupo (con ``alpha = 1%`` por
+  defecto);
+- la memoria depende del rango dinámico de los valores, no de su cantidad:
+  ``log(max / min) / log(gamma)`` buckets (≈ 460 para cubrir 0.1..1000 con
+  ``alpha = 1%``);
+- dos sketches con el mismo ``alpha`` se combinan sumando conteos, sin
+  perder precisión: sirve para fusionar particiones entre workers o entre
+  corridas incrementales sin volver a leer RAW.
+
+Los valores NaN o infinitos se ignoran (igual que en mínimo/máximo).
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+MIN_INDEXABLE = 1e-9
+
+
+class QuantileSketch:
+    __slots__ = ("alpha", "_log_gamma", "positive", "negative", "zero", "count", "min", "max")
+
+    def __init__(self, alpha: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < alpha < 1:
+            raise ValueError(f"alpha debe estar en (0, 1): {alpha}")
+        self.alpha = alpha
+        self._log_gamma = math.log((1 + alpha) / (1 - alpha))
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, magnitude: float) -> int:
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Punto del bucket (gamma^(k-1), gamma^k] con error relativo <= alpha
+        gamma = math.exp(self._log_gamma)
+        return 2 * gamma**key / (gamma + 1)
+
+    def add(self, value: float) -> None:
+        if not math.isfinite(value):
+            return
+        if value > MIN_INDEXABLE:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + 1
+        elif value < -MIN_INDEXABLE:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + 1
+        else:
+            self.zero += 1
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.alpha != self.alpha:
+            raise ValueError("No se pueden combinar sketches con distinto alpha")
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Cuantil ``q`` en [0, 1]; None si el sketch está vacío."""
+        if self.count == 0:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError(f"q debe estar en [0, 1]: {q}")
+
+        rank = math.floor(q * (self.count - 1))
+        seen = 0
+        # Orden ascendente: negativos de mayor a menor magnitud, cero, positivos
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return self._clamp(-self._value(key))
+        seen += self.zero
+        if seen > rank:
+            return self._clamp(0.0)
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._clamp(self._value(key))
+        return self.max
+
+    def _clamp(self, value: float) -> float:
+        return min(max(value, self.min), self.max)
+
+    def to_dict(self) -> dict:
+        return {
+            "alpha": self.alpha,
+            "count": self.count,
+            "zero": self.zero,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "positive": {str(k): c for k, c in self.positive.items()},
+            "negative": {str(k): c for k, c in self.negative.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data.get("alpha", DEFAULT_RELATIVE_ACCURACY))
+        sketch.count = data.get("count", 0)
+        sketch.zero = data.get("zero", 0)
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        sketch.positive = {int(k): c for k, c in data.get("positive", {}).items()}
+        sketch.negative = {int(k): c for k, c in data.get("negative", {}).items()}
+        return sketch
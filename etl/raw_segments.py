@@ -0,0 +1,193 @@
+"""Segmentos columnares compactados de la zona RAW.
+
+``etl/compactar_raw.py`` reescribe cada partición cerrada
+``<fuente>/<tipo>/YYYY=/MM=/DD=`` (JSON de una lectura y segmentos NDJSON) en
+un único archivo ``compact_<timestamp>.seg`` con este formato (solo stdlib):
+
+- ``MAGIC`` al inicio;
+- un bloque por columna (un campo de las lecturas):
+
+  - ``int64`` / ``float64``: ``array("q")`` / ``array("d")`` con un valor
+    por fila, si el campo está en todas las filas y siempre es entero /
+    numérico (p. ej. ``valor``);
+  - ``dict``: códigos ``array("I")`` por fila (``MISSING`` si la fila no tiene
+    el campo) seguidos de la lista JSON de valores distintos;
+
+- un footer JSON con la cantidad de filas, los archivos de origen que
+  reemplaza y, por columna, su ubicación, cantidad de valores, mínimo y
+  máximo (cuando los valores son comparables);
+- el largo del footer (``uint32``) y ``MAGIC`` al final, para leer el footer
+  sin recorrer el archivo.
+
+Las filas conservan el orden de lectura de los originales, así que las sumas
+por grupo dan el mismo resultado bit a bit.
+
+El reemplazo es atómico desde el punto de vista de los lectores: el segmento
+se publica con ``os.replace`` y a partir de ahí ``live_raw_files`` ignora los
+archivos listados en ``sources`` de cualquier segmento de la carpeta, aunque
+el borrado de los originales no haya terminado (o el proceso se haya caído
+antes).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+# El lado de lectura del formato es compartido con la API (dataset silver)
+from api.app.segment_reader import MAGIC, MISSING, TRAILER, iter_segment, read_footer  # noqa: F401
+
+SEGMENT_PREFIX = "compact_"
+SEGMENT_SUFFIX = ".seg"
+SEGMENT_PATTERN = f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"
+FORMAT_VERSION = 1
+INT64_RANGE = (-(2**63), 2**63 - 1)
+
+# Orden de lectura dentro de una partición: segmentos compactados primero y
+# luego los archivos que llegaron después de la compactación
+RAW_PATTERNS = (SEGMENT_PATTERN, "*.json", "*.ndjson", "*.ndjson.open")
+
+_ABSENT = object()
+
+
+def _is_number(value: object) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_int64(value: object) -> bool:
+    return (
+        isinstance(value, int)
+        and not isinstance(value, bool)
+        and INT64_RANGE[0] <= value <= INT64_RANGE[1]
+    )
+
+
+def _min_max(values: Iterable[object]) -> Tuple[object, object]:
+    """Mínimo y máximo si todos los valores son texto o todos numéricos."""
+    values = list(values)
+    if values and (
+        all(isinstance(v, str) for v in values) or all(_is_number(v) for v in values)
+    ):
+        return min(values), max(values)
+    return None, None
+
+
+def write_segment(path: Path, rows: List[dict], sources: List[str]) -> dict:
+    """
+    Escribe ``rows`` como segmento columnar en ``path`` (vía archivo temporal
+    + fsync + ``os.replace``) y devuelve su footer.
+    """
+    names: Dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+
+    blocks: List[bytes] = []
+    columns: Dict[str, dict] = {}
+    offset = len(MAGIC)
+    for name in names:
+        values = [row.get(name, _ABSENT) for row in rows]
+        present = [v for v in values if v is not _ABSENT]
+        if len(present) == len(rows) and all(_is_int64(v) for v in present):
+            block = array("q", present).tobytes()
+            meta = {"kind": "int64", "offset": offset, "length": len(block)}
+        elif len(present) == len(rows) and all(_is_number(v) for v in present):
+            block = array("d", (float(v) for v in present)).tobytes()
+            meta = {"kind": "float64", "offset": offset, "length": len(block)}
+        else:
+            encoded: Dict[str, int] = {}
+            dictionary: List[object] = []
+            codes = array("I")
+            for value in values:
+                if value is _ABSENT:
+                    codes.append(MISSING)
+                    continue
+                token = json.dumps(value, sort_keys=True)
+                code = encoded.get(token)
+                if code is None:
+                    code = encoded[token] = len(dictionary)
+                    dictionary.append(value)
+                codes.append(code)
+            codes_bytes = codes.tobytes()
+            dict_bytes = json.dumps(dictionary, ensure_ascii=False).encode("utf-8")
+            block = codes_bytes + dict_bytes
+            meta = {
+                "kind": "dict",
+                "offset": offset,
+                "length": len(block),
+                "codes_length": len(codes_bytes),
+                "distinct": len(dictionary),
+            }
+            present = dictionary
+
+        minimum, maximum = _min_max(present)
+        meta.update(
+            count=sum(1 for v in values if v is not _ABSENT), min=minimum, max=maximum
+        )
+        columns[name] = meta
+        blocks.append(block)
+        offset += len(block)
+
+    footer = {
+        "version": FORMAT_VERSION,
+        "rows": len(rows),
+        "byteorder": sys.byteorder,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "sources": sources,
+        "columns": columns,
+    }
+    footer_bytes = json.dumps(footer, ensure_ascii=False).encode("utf-8")
+
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("wb") as fh:
+        fh.write(MAGIC)
+        for block in blocks:
+            fh.write(block)
+        fh.write(footer_bytes)
+        fh.write(TRAILER.pack(len(footer_bytes)))
+        fh.write(MAGIC)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    return footer
+
+
+def segment_may_match(footer: dict, match: Dict[str, Set[str]]) -> bool:
+    """
+    False si las estadísticas del footer garantizan que ninguna fila tiene,
+    en alguno de los campos de ``match``, uno de los valores pedidos.
+    """
+    if not footer.get("rows"):
+        return False
+    for field, wanted in match.items():
+        meta = footer["columns"].get(field)
+        if meta is None or not meta.get("count"):
+            continue
+        low, high = meta.get("min"), meta.get("max")
+        if low is None or high is None:
+            return True
+        if any(isinstance(v, type(low)) and low <= v <= high for v in wanted):
+            return True
+    return False
+
+
+def live_raw_files(folder: Path) -> Iterator[Path]:
+    """
+    Archivos RAW vigentes de una partición, en orden de lectura: se omiten
+    los que ya reemplazó algún segmento compactado de la carpeta.
+    """
+    replaced: Set[str] = set()
+    for segment in folder.glob(SEGMENT_PATTERN):
+        try:
+            replaced.update(read_footer(segment).get("sources", []))
+        except (OSError, ValueError):
+            # Segmento ilegible: sus originales siguen siendo la fuente válida
+            replaced.add(segment.name)
+    for pattern in RAW_PATTERNS:
+        for path in sorted(folder.glob(pattern)):
+            if path.name not in replaced:
+                yield path
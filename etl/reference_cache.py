@@ -0,0 +1,256 @@
+"""Caché de los datasets de referencia MCP y join en bloque por columnas.
+
+Los CSV de ``data/reference/mcp_reference_<id>.csv`` son grandes y casi nunca
+cambian, pero el cálculo los volvía a parsear con ``csv.DictReader`` en cada
+corrida. Aquí:
+
+- cada CSV parseado se guarda como snapshot binario de una
+  ``ReferenceTable``: dos columnas ordenadas por (clave, fecha), donde la
+  clave es la columna del campo de agrupación del indicador (``tramo_id`` o
+  ``servicio_code``), en ``data/metadata/reference_cache/``, junto con la
+  ruta y la firma (tamaño + mtime) del archivo de origen;
+- en la corrida siguiente, si la firma coincide se carga el snapshot (hit);
+  si el CSV cambió, no tiene snapshot o el snapshot no se puede leer, se
+  vuelve a parsear y se reescribe (miss);
+- dentro de una misma corrida cada archivo se carga una sola vez aunque lo
+  usen varios indicadores;
+- ``join_reference`` cruza todas las filas de un indicador con la tabla de
+  una vez: con el backend ``numpy`` es un ``searchsorted`` de las claves de
+  las filas sobre las claves ordenadas de la referencia, y delta y status se
+  calculan sobre arreglos; con ``python`` (referencia, sin dependencias) es
+  un merge de las filas ordenadas por clave contra la tabla, en una sola
+  pasada. Ambos caminos dan el mismo resultado.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import logging
+import os
+import pickle
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 2: el snapshot guarda las columnas ordenadas de ReferenceTable
+CACHE_FORMAT_VERSION = 2
+
+ReferenceMap = Dict[Tuple[str, str], float]
+
+# Separador de la clave compuesta "<clave>\x1f<fecha>": menor que cualquier
+# carácter imprimible, así el orden de las claves compuestas es el de (clave, fecha)
+KEY_SEPARATOR = "\x1f"
+
+
+class ReferenceTable:
+    """Referencias de un archivo como columnas ordenadas por clave compuesta."""
+
+    __slots__ = ("keys", "values", "_key_array")
+
+    def __init__(self, keys: List[str], values: array):
+        self.keys = keys
+        self.values = values
+        self._key_array = None
+
+    @classmethod
+    def from_map(cls, ref_map: ReferenceMap) -> "ReferenceTable":
+        items = sorted(
+            (f"{key}{KEY_SEPARATOR}{fecha}", value) for (key, fecha), value in ref_map.items()
+        )
+        return cls([key for key, _ in items], array("d", (value for _, value in items)))
+
+    @classmethod
+    def empty(cls) -> "ReferenceTable":
+        return cls([], array("d"))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def key_array(self):
+        """Claves como arreglo numpy (se construye una vez por tabla)."""
+        import numpy as np
+
+        if self._key_array is None:
+            self._key_array = np.array(self.keys)
+        return self._key_array
+
+
+def parse_reference_csv(path: Path, key_field: str = "tramo_id") -> ReferenceMap:
+    """Lee un CSV de referencia: ``key_field``, fecha y el valor en la última columna."""
+    ref_map: ReferenceMap = {}
+    with path.open(encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        value_col = reader.fieldnames[-1] if reader.fieldnames else None
+        if reader.fieldnames and key_field not in reader.fieldnames:
+            logging.warning("La referencia %s no tiene la columna %s", path, key_field)
+        for row in reader:
+            key = row.get(key_field)
+            fecha = row.get("fecha")
+            valor = row.get(value_col) if value_col else None
+            if not key or not fecha or valor is None:
+                continue
+            try:
+                ref_map[(key, fecha)] = float(valor)
+            except ValueError:
+                logging.warning(
+                    "Valor de referencia inválido en %s (%s=%s fecha=%s)",
+                    path,
+                    key_field,
+                    key,
+                    fecha,
+                )
+    return ref_map
+
+
+class ReferenceCache:
+    """Snapshots de referencias validados por firma, con contadores hit/miss."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._loaded: Dict[Tuple[Path, str], ReferenceTable] = {}
+
+    def _snapshot_path(self, path: Path) -> Path:
+        digest = hashlib.sha1(str(path.resolve()).encode("utf-8")).hexdigest()[:12]
+        return self.cache_dir / f"{path.stem}.{digest}.pkl"
+
+    def load(self, path: Path, key_field: str = "tramo_id") -> ReferenceTable:
+        if (path, key_field) in self._loaded:
+            return self._loaded[(path, key_field)]
+
+        stat = path.stat()
+        signature = [stat.st_size, stat.st_mtime_ns]
+        snapshot = self._snapshot_path(path)
+
+        table = self._read_snapshot(snapshot, path, signature, key_field)
+        if table is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            table = ReferenceTable.from_map(parse_reference_csv(path, key_field))
+            self._write_snapshot(snapshot, path, signature, key_field, table)
+
+        self._loaded[(path, key_field)] = table
+        return table
+
+    def _read_snapshot(
+        self, snapshot: Path, path: Path, signature: List[int], key_field: str
+    ) -> Optional[ReferenceTable]:
+        try:
+            with snapshot.open("rb") as fh:
+                payload = pickle.load(fh)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError) as exc:
+            logging.warning("Snapshot de referencia ilegible %s: %s", snapshot, exc)
+            return None
+
+        if (
+            not isinstance(payload, dict)
+            or payload.get("version") != CACHE_FORMAT_VERSION
+            or payload.get("source") != str(path)
+            or payload.get("signature") != signature
+            or payload.get("key_field") != key_field
+        ):
+            return None
+        return ReferenceTable(payload["keys"], payload["values"])
+
+    def _write_snapshot(
+        self,
+        snapshot: Path,
+        path: Path,
+        signature: List[int],
+        key_field: str,
+        table: ReferenceTable,
+    ) -> None:
+        payload = {
+            "version": CACHE_FORMAT_VERSION,
+            "source": str(path),
+            "signature": signature,
+            "key_field": key_field,
+            "keys": table.keys,
+            "values": table.values,
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = snapshot.with_name(f".{snapshot.name}.tmp")
+            with tmp.open("wb") as fh:
+                pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, snapshot)
+        except OSError as exc:
+            # Sin snapshot la corrida sigue: solo se pierde el ahorro la próxima vez
+            logging.warning("No se pudo guardar el snapshot %s: %s", snapshot, exc)
+
+    def counters(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def _merge_lookup(probe: List[str], table: ReferenceTable) -> List[Optional[float]]:
+    """Valor de referencia de cada clave: merge de las claves ordenadas contra la tabla."""
+    refs: List[Optional[float]] = [None] * len(probe)
+    keys, values = table.keys, table.values
+    pos, size = 0, len(keys)
+    for i in sorted(range(len(probe)), key=probe.__getitem__):
+        key = probe[i]
+        while pos < size and keys[pos] < key:
+            pos += 1
+        if pos == size:
+            break
+        if keys[pos] == key:
+            refs[i] = values[pos]
+    return refs
+
+
+def _join_numpy(
+    probe: List[str], calculated: List[float], table: ReferenceTable, tolerance: float
+) -> Tuple[List[Optional[float]], List[Optional[float]], List[str]]:
+    # Importación diferida: numpy solo se necesita con --backend numpy
+    import numpy as np
+
+    ref_keys = table.key_array()
+    keys = np.array(probe)
+    pos = np.minimum(np.searchsorted(ref_keys, keys), len(ref_keys) - 1)
+    found = ref_keys[pos] == keys
+    values = np.frombuffer(table.values, dtype=np.float64)[pos]
+    deltas = np.array(calculated, dtype=np.float64) - values
+    statuses = np.where(
+        found, np.where(np.abs(deltas) <= tolerance, "ok", "desvio"), "sin_referencia"
+    )
+    hits = found.tolist()
+    refs = [value if hit else None for value, hit in zip(values.tolist(), hits)]
+    deltas_out = [delta if hit else None for delta, hit in zip(deltas.tolist(), hits)]
+    return refs, deltas_out, statuses.tolist()
+
+
+def join_reference(
+    rows: List[dict],
+    table: ReferenceTable,
+    tolerance: float,
+    key_field: str = "tramo_id",
+    backend: str = "python",
+) -> None:
+    """Agrega valor_referencia, delta y status a todas las filas de una vez."""
+    probe = [f"{row[key_field]}{KEY_SEPARATOR}{row['fecha']}" for row in rows]
+    if not rows or not table:
+        refs: List[Optional[float]] = [None] * len(rows)
+        deltas: List[Optional[float]] = [None] * len(rows)
+        statuses = ["sin_referencia"] * len(rows)
+    elif backend == "numpy":
+        calculated = [row["valor_calculado"] for row in rows]
+        refs, deltas, statuses = _join_numpy(probe, calculated, table, tolerance)
+    else:
+        refs = _merge_lookup(probe, table)
+        deltas = [
+            None if ref is None else row["valor_calculado"] - ref
+            for row, ref in zip(rows, refs)
+        ]
+        statuses = [
+            "sin_referencia" if delta is None else ("ok" if abs(delta) <= tolerance else "desvio")
+            for delta in deltas
+        ]
+    for row, ref, delta, status in zip(rows, refs, deltas, statuses):
+        row["valor_referencia"] = ref
+        row["delta"] = delta
+        row["status"] = status
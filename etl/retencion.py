@@ -0,0 +1,335 @@
+"""Retención y limpieza de versiones silver, RAW y logs.
+
+Políticas (todas configurables por CLI):
+
+- **versiones silver**: se conservan la versión actual (la del puntero
+  ``_current.json``) y las ``--keep-versions`` más recientes del catálogo.
+  Las demás se quitan del catálogo y se borra su manifiesto (o su CSV, si son
+  versiones del formato anterior). Después se borra todo archivo de
+  ``parts/`` que no esté referenciado (checkpoint o delta) por un manifiesto
+  conservado, y los CSV ``mcp_indicadores_<timestamp>.csv`` que ninguna
+  versión conservada usa;
+- **RAW**: las particiones con más de ``--raw-archive-days`` días que ya
+  están compactadas (solo tienen segmentos ``compact_*.seg`` vigentes) se
+  mueven a ``data/archive/raw`` con el mismo layout; el cálculo MCP también
+  lee ese árbol, así que un cálculo completo sigue viendo esas lecturas. Los
+  archivos que un segmento ya reemplazó (restos de una compactación
+  interrumpida) se borran en cualquier partición. Las particiones sin
+  compactar no se tocan;
+- **logs**: los logs con timestamp en el nombre (``logs/`` y ``data/logs/``)
+  y los archivos de estado de jobs con más de ``--logs-days`` días.
+
+``--dry-run`` informa archivos y bytes que se recuperarían sin tocar nada.
+La retención toma el mismo lock que el cálculo MCP y la compactación (ver
+``pipeline_lock.py``), así que es seguro lanzarla aunque el scheduler esté
+activo: si el pipeline está corriendo, espera hasta ``--lock-timeout``
+segundos y, si no lo consigue, sale sin hacer cambios.
+
+Uso:
+    python etl/retencion.py [--dry-run] [--keep-versions 10] [--raw-archive-days 90] [--logs-days 30]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import shutil
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# Raíz del proyecto en sys.path para importar los módulos de etl/
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from etl.calculo_mcp_indicadores import (
+    ARCHIVE_RAW_PATH,
+    OUTPUT_DIR,
+    RAW_PATH,
+    SILVER_STORE,
+    open_version_catalog,
+    prune_partitions,
+)
+from etl.pipeline_lock import PipelineBusy, pipeline_lock
+from etl.raw_segments import SEGMENT_PATTERN, SEGMENT_SUFFIX, live_raw_files, read_footer
+
+DATASET = "mcp_indicadores"
+LOG_DIRS = (Path("logs"), Path("data/logs"))
+JOBS_STATUS_DIR = Path("data/metadata/jobs")
+
+# Solo archivos con timestamp en el nombre: nunca el log del scheduler
+TIMESTAMPED_LOG = re.compile(r".+_\d{8}_\d{6}\.log$")
+LEGACY_SILVER_CSV = re.compile(rf"^{DATASET}_\d{{8}}_\d{{6}}\.csv$")
+
+
+@dataclass
+class RetentionPlan:
+    """Acciones decididas por las políticas, agrupadas por categoría."""
+
+    dropped_versions: List[str] = field(default_factory=list)
+    deletes: Dict[str, List[Path]] = field(default_factory=lambda: defaultdict(list))
+    archives: List[Path] = field(default_factory=list)
+    pending_compaction: int = 0
+
+    def report(self) -> Dict[str, Dict[str, int]]:
+        summary: Dict[str, Dict[str, int]] = {}
+        for category, paths in self.deletes.items():
+            summary[category] = {"archivos": len(paths), "bytes": _total_size(paths)}
+        if self.archives:
+            summary["raw_archivado"] = {
+                "archivos": len(self.archives),
+                "bytes": _total_size(self.archives),
+            }
+        return summary
+
+
+def _total_size(paths: List[Path]) -> int:
+    total = 0
+    for path in paths:
+        try:
+            total += path.stat().st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+
+def _manifest_files(manifest: dict) -> Set[str]:
+    files: Set[str] = set()
+    for entry in manifest.get("partitions", {}).values():
+        files.add(entry["path"])
+        files.update(entry.get("deltas", []))
+    return files
+
+
+def plan_silver(plan: RetentionPlan, keep_versions: int) -> None:
+    with open_version_catalog() as catalog:
+        versions = catalog.list(DATASET)
+    current = SILVER_STORE.current_version()
+    keep = {version["version_id"] for version in versions[:keep_versions]}
+    if current is not None:
+        keep.add(current)
+
+    kept_paths: Set[Path] = set()
+    for version in versions:
+        path = Path(version["file_path"])
+        if version["version_id"] in keep:
+            kept_paths.add(path)
+        else:
+            plan.dropped_versions.append(version["version_id"])
+            if path.exists():
+                plan.deletes["silver_versiones"].append(path)
+
+    # Archivos de partición referenciados por alguna versión conservada
+    referenced: Set[str] = set()
+    for path in kept_paths:
+        if path.suffix == ".json":
+            manifest = SILVER_STORE.load_manifest(path)
+            if manifest is not None:
+                referenced.update(_manifest_files(manifest))
+    if current is not None:
+        referenced.update(_manifest_files(SILVER_STORE.load_manifest() or {}))
+
+    if SILVER_STORE.versions_dir.exists():
+        for path in sorted(SILVER_STORE.versions_dir.glob("*.json")):
+            if path.stem not in keep and path not in plan.deletes["silver_versiones"]:
+                plan.deletes["silver_versiones"].append(path)
+    if SILVER_STORE.parts_dir.exists():
+        for path in sorted(SILVER_STORE.parts_dir.rglob("*.seg")):
+            if path.relative_to(SILVER_STORE.root).as_posix() not in referenced:
+                plan.deletes["silver_particiones"].append(path)
+    if OUTPUT_DIR.exists():
+        for path in sorted(OUTPUT_DIR.glob(f"{DATASET}_*.csv")):
+            if LEGACY_SILVER_CSV.match(path.name) and path not in kept_paths:
+                plan.deletes["silver_csv"].append(path)
+
+
+def plan_raw(plan: RetentionPlan, archive_days: int) -> None:
+    cutoff = date.today() - timedelta(days=archive_days)
+    if not RAW_PATH.exists():
+        return
+    bases = sorted(path for path in RAW_PATH.glob("*/*") if path.is_dir())
+    for base in bases:
+        for folder in prune_partitions(base):
+            replaced: Set[str] = set()
+            for segment in folder.glob(SEGMENT_PATTERN):
+                try:
+                    replaced.update(read_footer(segment).get("sources", []))
+                except (OSError, ValueError):
+                    continue
+            leftovers = [
+                path for path in sorted(folder.iterdir()) if path.name in replaced
+            ]
+            plan.deletes["raw_reemplazados"].extend(leftovers)
+
+            folder_date = _folder_date(folder)
+            if folder_date is None or folder_date > cutoff:
+                continue
+            live = list(live_raw_files(folder))
+            if live and all(path.suffix == SEGMENT_SUFFIX for path in live):
+                plan.archives.extend(live)
+            elif live:
+                plan.pending_compaction += 1
+
+
+def _folder_date(folder: Path) -> Optional[date]:
+    try:
+        parts = dict(part.split("=", 1) for part in folder.parts[-3:])
+        return date(int(parts["YYYY"]), int(parts["MM"]), int(parts["DD"]))
+    except (KeyError, ValueError):
+        return None
+
+
+def plan_logs(plan: RetentionPlan, logs_days: int) -> None:
+    cutoff = time.time() - logs_days * 86400
+    for log_dir in LOG_DIRS:
+        if not log_dir.exists():
+            continue
+        for path in sorted(log_dir.glob("*.log")):
+            if TIMESTAMPED_LOG.match(path.name) and path.stat().st_mtime < cutoff:
+                plan.deletes["logs"].append(path)
+    if JOBS_STATUS_DIR.exists():
+        for path in sorted(JOBS_STATUS_DIR.glob("*.json")):
+            if path.stat().st_mtime < cutoff:
+                plan.deletes["jobs_estado"].append(path)
+
+
+def apply_plan(plan: RetentionPlan) -> None:
+    # Primero el catálogo: ninguna versión registrada queda apuntando a
+    # archivos borrados
+    if plan.dropped_versions:
+        with open_version_catalog() as catalog:
+            catalog.delete(DATASET, plan.dropped_versions)
+
+    for source in plan.archives:
+        target = ARCHIVE_RAW_PATH / source.relative_to(RAW_PATH)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(source), str(target))
+        _remove_empty_dirs(source.parent, RAW_PATH)
+
+    for paths in plan.deletes.values():
+        for path in paths:
+            path.unlink(missing_ok=True)
+            if RAW_PATH in path.parents:
+                _remove_empty_dirs(path.parent, RAW_PATH)
+            elif SILVER_STORE.parts_dir in path.parents:
+                _remove_empty_dirs(path.parent, SILVER_STORE.parts_dir)
+
+
+def _remove_empty_dirs(folder: Path, stop: Path) -> None:
+    while folder != stop and stop in folder.parents:
+        try:
+            folder.rmdir()
+        except OSError:
+            return
+        folder = folder.parent
+
+
+def setup_logging() -> Path:
+    log_dir = LOG_DIRS[0]
+    log_dir.mkdir(exist_ok=True, parents=True)
+    log_file = log_dir / f"retencion_{datetime.now():%Y%m%d_%H%M%S}.log"
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+        handlers=[
+            logging.FileHandler(log_file, encoding="utf-8"),
+            logging.StreamHandler(),
+        ],
+    )
+    return log_file
+
+
+def main(
+    keep_versions: int = 10,
+    raw_archive_days: int = 90,
+    logs_days: int = 30,
+    dry_run: bool = False,
+    lock_timeout: float = 600,
+) -> int:
+    setup_logging()
+    logging.info("===== Inicio retención%s =====", " (dry-run)" if dry_run else "")
+    try:
+        with pipeline_lock(timeout=lock_timeout):
+            plan = RetentionPlan()
+            plan_silver(plan, keep_versions)
+            plan_raw(plan, raw_archive_days)
+            plan_logs(plan, logs_days)
+            report = plan.report()
+            if not dry_run:
+                apply_plan(plan)
+    except PipelineBusy as exc:
+        logging.error("%s: no se aplicó la retención", exc)
+        return 2
+
+    verb = "se recuperarían" if dry_run else "recuperados"
+    for category, counts in sorted(report.items()):
+        logging.info(
+            "%-20s %6s archivos  %12s bytes %s",
+            category,
+            counts["archivos"],
+            counts["bytes"],
+            "a archivar" if category == "raw_archivado" else verb,
+        )
+    logging.info("Versiones silver eliminadas del catálogo: %s", len(plan.dropped_versions))
+    if plan.pending_compaction:
+        logging.info(
+            "Particiones RAW antiguas sin compactar (no se archivan): %s",
+            plan.pending_compaction,
+        )
+    print(json.dumps({"dry_run": dry_run, "report": report}, ensure_ascii=False))
+    logging.info("===== Fin retención =====")
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Retención de versiones, RAW y logs")
+    parser.add_argument("--dry-run", action="store_true", help="Solo informa, no borra.")
+    parser.add_argument(
+        "--keep-versions",
+        type=int,
+        default=10,
+        help="Versiones silver más recientes a conservar (además de la actual).",
+    )
+    parser.add_argument(
+        "--raw-archive-days",
+        type=int,
+        default=90,
+        help="Archiva las particiones RAW compactadas con más de estos días.",
+    )
+    parser.add_argument(
+        "--logs-days",
+        type=int,
+        default=30,
+        help="Borra logs y estados de jobs con más de estos días.",
+    )
+    parser.add_argument(
+        "--lock-timeout",
+        type=float,
+        default=600,
+        help="Segundos a esperar si el pipeline está corriendo.",
+    )
+    args = parser.parse_args()
+    for name in ("keep_versions", "raw_archive_days", "logs_days"):
+        if getattr(args, name) < 0:
+            parser.error(f"--{name.replace('_', '-')} no puede ser negativo")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(
+        main(
+            keep_versions=args.keep_versions,
+            raw_archive_days=args.raw_archive_days,
+            logs_days=args.logs_days,
+            dry_run=args.dry_run,
+            lock_timeout=args.lock_timeout,
+        )
+    )
@@ -1,10 +1,18 @@
-import subprocess
+import argparse
+import csv
+import json
+import os
 import sys
+import threading
 from pathlib import Path
 from datetime import datetime
 
 # Directorio base del proyecto (carpeta raíz)
 BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from etl.dag import Stage, run_dag
 
 # Scripts ETL internos (HU1: 3 fuentes internas)
 SCRIPTS = [
@@ -15,51 +23,175 @@ SCRIPTS = [
     "etl/calculo_mcp_indicadores.py",
 ]
 
+# Scripts que aceptan --direct (aterrizaje en RAW sin pasar por la API)
+INGEST_SCRIPTS = set(SCRIPTS[:4])
+
 # Carpeta y archivo de log
 LOG_DIR = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
-log_file = LOG_DIR / f"etl_{datetime.now():%Y%m%d_%H%M%S}.log"
+RUN_ID = f"{datetime.now():%Y%m%d_%H%M%S}"
+log_file = LOG_DIR / f"etl_{RUN_ID}.log"
+
+# Historial por etapa de cada corrida (lo lee GET /metrics de la API); el
+# detalle por etapa interna del cálculo MCP está en calc_mcp_runs.csv
+ETL_HISTORY_FILE = LOG_DIR / "etl_runs.csv"
+ETL_HISTORY_FIELDS = [
+    "run_id",
+    "etapa",
+    "status",
+    "returncode",
+    "duracion_seg",
+    "rss_max_mb",
+    "log_file",
+]
+
+
+_log_lock = threading.Lock()
 
 
 def log(msg: str):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     line = f"[{timestamp}] {msg}\n"
-    print(line, end="")
-    with log_file.open("a", encoding="utf-8") as f:
-        f.write(line)
-
+    # La salida de las etapas llega desde un hilo aparte (ver etl/dag.py)
+    with _log_lock:
+        print(line, end="", flush=True)
+        with log_file.open("a", encoding="utf-8") as f:
+            f.write(line)
 
-def run_script(relative_path: str):
-    script_path = BASE_DIR / relative_path
-    log(f"Inicio script: {script_path}")
 
-    result = subprocess.run(
-        [sys.executable, str(script_path)],
-        capture_output=True,
-        text=True,
+def build_stages(direct: bool = False) -> list[Stage]:
+    """Las ingestas son independientes entre sí; el cálculo MCP depende de todas."""
+    ingest_args = ["--direct"] if direct else []
+    stages = [
+        Stage(name=Path(script).stem, script=BASE_DIR / script, args=ingest_args)
+        for script in SCRIPTS
+        if script in INGEST_SCRIPTS
+    ]
+    stages.append(
+        Stage(
+            name="calculo_mcp_indicadores",
+            script=BASE_DIR / "etl/calculo_mcp_indicadores.py",
+            deps=[stage.name for stage in stages],
+        )
     )
+    return stages
 
-    # Guardamos stdout y stderr en el log
-    if result.stdout:
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write(result.stdout + "\n")
 
-    if result.stderr:
-        with log_file.open("a", encoding="utf-8") as f:
-            f.write("STDERR:\n" + result.stderr + "\n")
+class StatusFile:
+    """
+    Progreso del pipeline en un JSON (estado, duración por etapa y log),
+    reescrito de forma atómica en cada cambio. Lo lee el registro de jobs de
+    la API (GET /jobs/{id}).
+    """
+
+    def __init__(self, path: Path, stages: list[Stage]):
+        self.path = path
+        self.data = {
+            "log_file": str(log_file),
+            "stages": {
+                stage.name: {"status": "pending", "duration": None}
+                for stage in stages
+            },
+        }
+        self._lock = threading.Lock()
+        self._write()
+
+    def update(self, name: str, status: str, result=None) -> None:
+        with self._lock:
+            stage = self.data["stages"][name]
+            stage["status"] = status
+            if status == "running":
+                stage["started_at"] = datetime.now().isoformat(timespec="seconds")
+            if result is not None:
+                stage["duration"] = round(result.duration, 3)
+                stage["peak_rss_mb"] = (
+                    round(result.peak_rss_mb, 1) if result.peak_rss_mb is not None else None
+                )
+            self._write()
 
-    if result.returncode != 0:
-        log(f"[ERROR] Script falló: {script_path} (code={result.returncode})")
-    else:
-        log(f"[OK] Script completado: {script_path}")
+    def _write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def record_stage_history(results) -> None:
+    is_new = not ETL_HISTORY_FILE.exists()
+    with ETL_HISTORY_FILE.open("a", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=ETL_HISTORY_FIELDS)
+        if is_new:
+            writer.writeheader()
+        for name, result in results.items():
+            writer.writerow(
+                {
+                    "run_id": RUN_ID,
+                    "etapa": name,
+                    "status": result.status,
+                    "returncode": "" if result.returncode is None else result.returncode,
+                    "duracion_seg": f"{result.duration:.3f}",
+                    "rss_max_mb": (
+                        "" if result.peak_rss_mb is None else f"{result.peak_rss_mb:.1f}"
+                    ),
+                    "log_file": str(log_file),
+                }
+            )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pipeline ETL diario MCP")
+    parser.add_argument(
+        "--direct",
+        action="store_true",
+        help=(
+            "Las ingestas escriben en RAW en el mismo proceso, sin la API HTTP "
+            "(usar cuando el ETL corre en el mismo host que RAW)."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Etapas que pueden correr en paralelo (1 = secuencial).",
+    )
+    parser.add_argument(
+        "--continue-on-error",
+        action="store_true",
+        help=(
+            "Ejecuta el cálculo MCP aunque falle alguna ingesta "
+            "(sobre datos RAW parciales)."
+        ),
+    )
+    parser.add_argument(
+        "--status-file",
+        type=Path,
+        help="JSON donde se publica el progreso por etapa (lo usa la API).",
+    )
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     log("===== INICIO ETL DIARIO MCP =====")
-    for script in SCRIPTS:
-        run_script(script)
+    stages = build_stages(direct=args.direct)
+    status_file = StatusFile(args.status_file, stages) if args.status_file else None
+    results = run_dag(
+        stages,
+        log=log,
+        max_workers=args.workers,
+        continue_on_error=args.continue_on_error,
+        on_stage_change=status_file.update if status_file else None,
+    )
+
+    for name, result in results.items():
+        rss = f", RSS máx {result.peak_rss_mb:.1f} MB" if result.peak_rss_mb is not None else ""
+        log(f"Etapa {name}: {result.status} ({result.duration:.2f}s{rss})")
+    record_stage_history(results)
     log("===== FIN ETL DIARIO MCP =====")
 
+    if any(result.status != "ok" for result in results.values()):
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
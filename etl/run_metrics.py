@@ -0,0 +1,137 @@
+"""Métricas por etapa de una corrida del pipeline.
+
+Cada etapa se mide con ``RunMetrics.stage(nombre)``: tiempo de pared,
+archivos, filas y bytes leídos (los suma la etapa) y pico de memoria (RSS)
+del proceso durante la etapa. En Linux el pico se reinicia al entrar a cada
+etapa (``/proc/self/clear_refs``) y se lee de ``VmHWM``; en otros sistemas
+se usa ``ru_maxrss``, que es el máximo del proceso desde que arrancó.
+
+Una etapa que se repite (p. ej. ``attach_reference`` una vez por indicador)
+acumula tiempo y contadores y conserva el mayor pico de memoria.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover (Windows)
+    resource = None
+
+_PROC_STATUS = Path("/proc/self/status")
+_PROC_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+
+def reset_peak_rss() -> bool:
+    """Reinicia el pico de RSS del proceso (solo Linux); True si se pudo."""
+    try:
+        _PROC_CLEAR_REFS.write_text("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de RSS del proceso en MB (desde el último reinicio, si lo hubo)."""
+    try:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB y macOS bytes
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    seconds: float = 0.0
+    files: int = 0
+    rows: int = 0
+    bytes_read: int = 0
+    peak_rss_mb: Optional[float] = None
+
+    def add(self, files: int = 0, rows: int = 0, bytes_read: int = 0) -> None:
+        self.files += files
+        self.rows += rows
+        self.bytes_read += bytes_read
+
+    def to_dict(self) -> dict:
+        rate = 1 / self.seconds if self.seconds > 0 else 0.0
+        return {
+            "seg": round(self.seconds, 4),
+            "archivos": self.files,
+            "filas": self.rows,
+            "bytes": self.bytes_read,
+            "archivos_por_seg": round(self.files * rate, 1),
+            "filas_por_seg": round(self.rows * rate, 1),
+            "rss_max_mb": None if self.peak_rss_mb is None else round(self.peak_rss_mb, 1),
+        }
+
+
+class RunMetrics:
+    """Etapas medidas de una corrida, en el orden en que empezaron."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageMetrics] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        metrics = self.stages.setdefault(name, StageMetrics(name))
+        reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.seconds += time.perf_counter() - start
+            peak = peak_rss_mb()
+            if peak is not None:
+                metrics.peak_rss_mb = max(peak, metrics.peak_rss_mb or 0.0)
+
+    def total(self, prefix: str) -> StageMetrics:
+        """Suma de las etapas ``prefix`` y ``prefix.*`` (p. ej. ``calc.<indicador>``)."""
+        total = StageMetrics(prefix)
+        for name, metrics in self.stages.items():
+            if name == prefix or name.startswith(f"{prefix}."):
+                total.seconds += metrics.seconds
+                total.add(metrics.files, metrics.rows, metrics.bytes_read)
+                if metrics.peak_rss_mb is not None:
+                    total.peak_rss_mb = max(metrics.peak_rss_mb, total.peak_rss_mb or 0.0)
+        return total
+
+    def peak_rss_mb(self) -> Optional[float]:
+        peaks = [m.peak_rss_mb for m in self.stages.values() if m.peak_rss_mb is not None]
+        return max(peaks) if peaks else None
+
+    def to_dict(self) -> Dict[str, dict]:
+        return {name: metrics.to_dict() for name, metrics in self.stages.items()}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    def log_summary(self) -> None:
+        for name, metrics in self.stages.items():
+            data = metrics.to_dict()
+            logging.info(
+                "Etapa %-24s %8.3fs  %6s archivos  %9s filas  %11s bytes  "
+                "%9s filas/s  RSS máx %s MB",
+                name,
+                metrics.seconds,
+                data["archivos"],
+                data["filas"],
+                data["bytes"],
+                data["filas_por_seg"],
+                data["rss_max_mb"] if data["rss_max_mb"] is not None else "-",
+            )
@@ -0,0 +1,279 @@
+"""Dataset silver de indicadores MCP particionado por fecha.
+
+Antes cada corrida escribía todo el historial en un CSV con timestamp y lo
+copiaba completo a ``mcp_indicadores_current.csv``. Ahora el dataset vive en
+``data/silver/mcp_indicadores/``:
+
+- ``parts/fecha=YYYY-MM-DD/part-<version>.seg``: checkpoint con todas las
+  filas de una fecha en el formato columnar de ``etl/raw_segments.py`` (con
+  estadísticas por columna en el footer);
+- ``parts/fecha=YYYY-MM-DD/delta-<version>.seg``: cambios de una versión
+  sobre la anterior para esa fecha, a nivel de fila con clave
+  (id_indicador, tramo_id, servicio_code, fecha): filas nuevas o
+  modificadas (``_op = "u"``) y claves eliminadas (``_op = "d"``). Una fecha
+  cuyas filas no cambiaron no escribe nada. Cada ``CHECKPOINT_INTERVAL``
+  deltas (o si el delta tendría más de la mitad de las filas) se escribe un
+  checkpoint nuevo, así que reconstruir una fecha en cualquier versión aplica
+  a lo sumo ``CHECKPOINT_INTERVAL`` deltas;
+- los archivos de partición no se modifican nunca: una corrida escribe
+  archivos nuevos solo para las fechas que cambió;
+- ``versions/<version>.json``: manifiesto de una versión, con la lista
+  completa de particiones vigentes (ruta, filas y conteos por indicador y
+  status); cada fecha apunta a su checkpoint y a los deltas que hay que
+  aplicarle en orden. Las fechas que no cambiaron apuntan a los mismos
+  archivos que la versión anterior. ``load_manifest(version_path(id))`` +
+  ``iter_rows`` leen el dataset tal como estaba en cualquier versión;
+- ``_current.json``: puntero a la versión actual (``version_id`` y ruta de su
+  manifiesto), reemplazado con ``os.replace``. Publicar o hacer rollback es
+  cambiar este archivo chico, sin importar el tamaño del dataset. Los
+  lectores (el índice de la API, el cálculo incremental) siguen el puntero
+  al manifiesto y después leen las particiones que lista. El lado de lectura
+  vive en ``api/app/silver_reader.py`` (``SilverStore`` lo extiende), así la
+  API no depende de ``etl/``.
+
+``python etl/silver_store.py export [--out archivo.csv]`` exporta la versión
+actual (o ``--version``) como CSV cuando se necesita el formato plano.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Raíz del proyecto en sys.path para importar los módulos de etl/
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from api.app.silver_reader import (
+    FIELDS,
+    KEY_FIELDS,
+    OP_FIELD,
+    SILVER_DATASET_DIR,
+    SilverReader,
+    row_key,
+)
+from etl.raw_segments import write_segment
+
+MANIFEST_FORMAT = 2
+CHECKPOINT_INTERVAL = 8
+
+FLOAT_FIELDS = ("valor_calculado", "valor_referencia", "delta")
+INT_FIELDS = ("muestras",)
+
+
+def _parse_csv_row(row: dict) -> dict:
+    """Fila de un CSV exportado (todo texto) con los tipos del dataset."""
+    parsed = {}
+    for field in FIELDS:
+        value = row.get(field)
+        if value in (None, ""):
+            parsed[field] = None
+        elif field in FLOAT_FIELDS:
+            parsed[field] = float(value)
+        elif field in INT_FIELDS:
+            parsed[field] = int(float(value))
+        else:
+            parsed[field] = value
+    return parsed
+
+
+def _same_value(field: str, a: object, b: object) -> bool:
+    if a == b:
+        return True
+    # NaN != NaN: dos NaN en un campo float son el mismo valor guardado
+    return (
+        field in FLOAT_FIELDS
+        and isinstance(a, float)
+        and isinstance(b, float)
+        and math.isnan(a)
+        and math.isnan(b)
+    )
+
+
+def _same_row(previous: Optional[dict], row: dict) -> bool:
+    return previous is not None and all(
+        _same_value(field, previous.get(field), row.get(field)) for field in FIELDS
+    )
+
+
+def diff_rows(previous: List[dict], rows: List[dict]) -> List[dict]:
+    """Delta que lleva de ``previous`` a ``rows`` (vacío si son iguales)."""
+    old = {row_key(row): row for row in previous}
+    delta = []
+    for row in rows:
+        key = row_key(row)
+        if not _same_row(old.pop(key, None), row):
+            delta.append({**row, OP_FIELD: "u"})
+    for key in old:
+        delta.append({**dict(zip(KEY_FIELDS, key)), OP_FIELD: "d"})
+    return delta
+
+
+class SilverStore(SilverReader):
+    def __init__(
+        self,
+        root: Path = SILVER_DATASET_DIR,
+        dataset: str = "mcp_indicadores",
+        checkpoint_interval: int = CHECKPOINT_INTERVAL,
+    ):
+        super().__init__(root)
+        self.dataset = dataset
+        self.checkpoint_interval = checkpoint_interval
+
+    def _new_version_id(self) -> str:
+        version_id = base = datetime.now().strftime("%Y%m%d_%H%M%S")
+        suffix = 0
+        while self.version_path(version_id).exists():
+            suffix += 1
+            version_id = f"{base}_{suffix}"
+        return version_id
+
+    def write_version(
+        self, partitions: Dict[str, List[dict]], base: Optional[dict] = None
+    ) -> Optional[Path]:
+        """
+        Escribe una versión nueva: las fechas de ``partitions`` con sus filas
+        (una fecha sin filas se elimina) y el resto de las particiones de
+        ``base`` sin tocar. Las fechas que ya existían en ``base`` se guardan
+        como delta sobre ella, salvo que toque un checkpoint. Devuelve la ruta
+        del manifiesto de la versión, o None si nada cambió respecto de ``base``.
+        """
+        version_id = self._new_version_id()
+        entries = dict(base["partitions"]) if base else {}
+        written = {"checkpoints": 0, "deltas": 0, "removed": 0}
+
+        for fecha, rows in sorted(partitions.items()):
+            if not rows:
+                if entries.pop(fecha, None) is not None:
+                    written["removed"] += 1
+                continue
+            rows = [{field: row.get(field) for field in FIELDS} for row in rows]
+            previous_entry = entries.get(fecha)
+            folder = self.parts_dir / f"fecha={fecha}"
+            folder.mkdir(parents=True, exist_ok=True)
+
+            entry = {
+                "rows": len(rows),
+                "indicadores": dict(Counter(row["id_indicador"] for row in rows)),
+                "status": dict(Counter(row.get("status") or "sin_estado" for row in rows)),
+            }
+            delta = None
+            if previous_entry is not None:
+                delta = diff_rows(self.read_fecha(fecha, base), rows)
+                if not delta:
+                    continue
+            deltas = previous_entry.get("deltas", []) if previous_entry else []
+            if (
+                delta is None
+                or len(deltas) >= self.checkpoint_interval
+                or len(delta) * 2 > len(rows)
+            ):
+                path = folder / f"part-{version_id}.seg"
+                write_segment(path, rows, [])
+                entry.update(path=path.relative_to(self.root).as_posix(), deltas=[])
+                written["checkpoints"] += 1
+            else:
+                path = folder / f"delta-{version_id}.seg"
+                write_segment(path, delta, [])
+                entry.update(
+                    path=previous_entry["path"],
+                    deltas=deltas + [path.relative_to(self.root).as_posix()],
+                )
+                written["deltas"] += 1
+            entries[fecha] = entry
+
+        if base is not None and not any(written.values()):
+            return None
+
+        manifest = {
+            "format": MANIFEST_FORMAT,
+            "dataset": self.dataset,
+            "version_id": version_id,
+            "parent": base["version_id"] if base else None,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "rows": sum(entry["rows"] for entry in entries.values()),
+            "written": written,
+            "partitions": dict(sorted(entries.items())),
+        }
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        path = self.version_path(version_id)
+        _write_json_atomic(path, manifest)
+        return path
+
+    def publish(self, manifest_path: Path) -> None:
+        """Publica una versión como current (reemplazo atómico del puntero)."""
+        manifest_path = Path(manifest_path)
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"No existe el manifiesto de la versión: {manifest_path}")
+        pointer = {
+            "dataset": self.dataset,
+            "version_id": manifest_path.stem,
+            "manifest": manifest_path.resolve().relative_to(self.root.resolve()).as_posix(),
+            "published_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        _write_json_atomic(self.current_path, pointer)
+
+    def import_csv(self, csv_path: Path) -> Path:
+        """Versión completa a partir de un CSV plano (p. ej. versiones antiguas)."""
+        partitions: Dict[str, List[dict]] = {}
+        with csv_path.open(newline="", encoding="utf-8") as fh:
+            for row in csv.DictReader(fh):
+                parsed = _parse_csv_row(row)
+                partitions.setdefault(parsed["fecha"] or "", []).append(parsed)
+        return self.write_version(partitions)
+
+    def export_csv(self, dest: Path, manifest: Optional[dict] = None) -> int:
+        """Exporta una versión (la actual por defecto) como CSV; devuelve las filas."""
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{dest.name}.tmp")
+        count = 0
+        with tmp.open("w", newline="", encoding="utf-8") as fh:
+            writer = csv.DictWriter(fh, fieldnames=FIELDS)
+            writer.writeheader()
+            for row in self.iter_rows(manifest):
+                writer.writerow(row)
+                count += 1
+        os.replace(tmp, dest)
+        return count
+
+
+def _write_json_atomic(path: Path, data: dict) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Dataset silver de indicadores MCP")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Exporta una versión como CSV.")
+    export.add_argument(
+        "--out",
+        type=Path,
+        default=Path("data/silver/mcp_indicadores_current.csv"),
+        help="Archivo CSV de salida.",
+    )
+    export.add_argument("--version", help="Versión a exportar (por defecto la actual).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    store = SilverStore()
+    if args.version:
+        manifest = store.load_manifest(store.version_path(args.version))
+    else:
+        manifest = store.load_manifest()
+    if manifest is None:
+        sys.exit(f"No existe la versión pedida en {store.root}")
+    rows = store.export_csv(args.out, manifest)
+    print(f"{rows} filas exportadas a {args.out} (versión {manifest['version_id']})")
@@ -0,0 +1,120 @@
+"""Catálogo de versiones de datasets en SQLite.
+
+Reemplaza a ``data/metadata/dataset_versions.csv``, que crecía con cada
+corrida y había que recorrer completo para encontrar un ``version_id``:
+
+- una fila por (dataset, version_id) con clave primaria, así que registrar
+  y buscar una versión no depende de cuántas haya;
+- índice por (dataset, created_at) para listar las más recientes;
+- el catálogo no guarda cuál es la versión actual: la única fuente de verdad
+  es el puntero ``_current.json`` del dataset (ver ``silver_store.py``), que
+  se reemplaza de forma atómica al publicar o hacer rollback;
+- la primera vez que se abre, si existe el CSV antiguo, se importan sus
+  filas.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import sqlite3
+from pathlib import Path
+from typing import List, Optional
+
+VERSION_FIELDS = ("dataset", "version_id", "created_at", "file_path", "rows", "parent")
+
+
+class VersionCatalog:
+    def __init__(self, db_path: Path, legacy_csv: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS versions (
+                dataset TEXT NOT NULL,
+                version_id TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                rows INTEGER,
+                parent TEXT,
+                PRIMARY KEY (dataset, version_id)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS versions_by_created ON versions (dataset, created_at)"
+        )
+        if legacy_csv is not None:
+            self._import_legacy_csv(legacy_csv)
+
+    def __enter__(self) -> "VersionCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _import_legacy_csv(self, legacy_csv: Path) -> None:
+        if not legacy_csv.exists():
+            return
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM versions").fetchone()
+        if count:
+            return
+        with legacy_csv.open(newline="", encoding="utf-8") as fh:
+            rows = [
+                (row["dataset"], row["version_id"], row["created_at"], row["file_path"])
+                for row in csv.DictReader(fh)
+            ]
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO versions (dataset, version_id, created_at, file_path)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        logging.info("Catálogo de versiones: %s filas importadas de %s", len(rows), legacy_csv)
+
+    def register(
+        self,
+        dataset: str,
+        version_id: str,
+        file_path: Path,
+        created_at: str,
+        rows: Optional[int] = None,
+        parent: Optional[str] = None,
+    ) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO versions"
+            " (dataset, version_id, created_at, file_path, rows, parent)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (dataset, version_id, created_at, str(file_path), rows, parent),
+        )
+
+    def get(self, dataset: str, version_id: str) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT * FROM versions WHERE dataset = ? AND version_id = ?",
+            (dataset, version_id),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def delete(self, dataset: str, version_ids: List[str]) -> None:
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "DELETE FROM versions WHERE dataset = ? AND version_id = ?",
+                [(dataset, version_id) for version_id in version_ids],
+            )
+
+    def list(self, dataset: str, limit: Optional[int] = None) -> List[dict]:
+        """Versiones del dataset, de la más reciente a la más antigua."""
+        rows = self._conn.execute(
+            "SELECT * FROM versions WHERE dataset = ?"
+            " ORDER BY created_at DESC, version_id DESC LIMIT ?",
+            (dataset, -1 if limit is None else limit),
+        )
+        return [dict(row) for row in rows]
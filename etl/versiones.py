@@ -0,0 +1,71 @@
+"""Consulta y rollback de versiones del dataset de indicadores MCP.
+
+Uso:
+    python etl/versiones.py list [--limit 20]
+    python etl/versiones.py rollback <version_id>
+
+El listado sale del catálogo SQLite (``data/metadata/dataset_versions.sqlite``)
+y marca con ``*`` la versión a la que apunta el current. El rollback solo
+cambia el puntero, sin copiar datos.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Raíz del proyecto en sys.path para importar los módulos de etl/
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from etl.calculo_mcp_indicadores import list_versions, rollback_dataset_version
+
+DEFAULT_DATASET = "mcp_indicadores"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Versiones de datasets MCP")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="Dataset lógico.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    listing = sub.add_parser("list", help="Lista las versiones, de la más reciente a la más antigua.")
+    listing.add_argument("--limit", type=int, default=20, help="Cantidad de versiones a mostrar.")
+
+    rollback = sub.add_parser("rollback", help="Publica una versión anterior como current.")
+    rollback.add_argument("version_id", help="Versión a publicar.")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.command == "list":
+        versions = list_versions(args.dataset, args.limit)
+        if not versions:
+            print(f"Sin versiones registradas para {args.dataset}")
+            return 0
+        print(f"  {'version_id':<20} {'created_at':<20} {'filas':>9}  parent")
+        for version in versions:
+            print(
+                f"{'*' if version['is_current'] else ' '} "
+                f"{version['version_id']:<20} {version['created_at']:<20} "
+                f"{version['rows'] if version['rows'] is not None else '-':>9}  "
+                f"{version['parent'] or '-'}"
+            )
+        return 0
+
+    try:
+        current = rollback_dataset_version(args.dataset, args.version_id)
+    except (ValueError, FileNotFoundError) as exc:
+        logging.error("%s", exc)
+        return 1
+    print(f"{args.dataset}: current -> {args.version_id} ({current})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
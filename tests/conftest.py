@@ -0,0 +1,54 @@
+"""Fixtures compartidas: cada test corre en un árbol ``data/`` vacío propio."""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Iterable
+
+import pytest
+
+# Raíz del proyecto en sys.path para importar api/ y etl/
+BASE_DIR = Path(__file__).resolve().parent.parent
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from api.app.raw_store import SegmentWriter
+
+
+@pytest.fixture
+def workdir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Directorio de trabajo temporal: las rutas ``data/...`` son relativas."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def densidad(fecha: str, tramo: str, valor: float, servicio: str = "01") -> dict:
+    return {
+        "fecha": fecha,
+        "filial_code": "VA",
+        "servicio_code": servicio,
+        "tipo_indicador": "densidad",
+        "valor": valor,
+        "fuente": "interno_densidad",
+        "tramo_id": tramo,
+    }
+
+
+def viajes(fecha: str, servicio: str, valor: float) -> dict:
+    return {
+        "fecha": fecha,
+        "filial_code": "VA",
+        "servicio_code": servicio,
+        "tipo_indicador": "viajes_validados",
+        "valor": valor,
+        "fuente": "interno_viajes",
+        "tramo_id": None,
+    }
+
+
+def write_raw(payloads: Iterable[dict], base: Path = Path("data/raw")) -> None:
+    """Escribe lecturas en RAW como lo haría la API (segmentos sellados)."""
+    writer = SegmentWriter(base)
+    writer.append(payloads)
+    writer.close()
@@ -0,0 +1,73 @@
+"""Respuestas de /ingesta/indicadores/batch: reintentos duplicados y group commit."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.app import main
+
+from conftest import densidad
+
+
+@pytest.fixture
+def client(workdir):
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def post_batch(client: TestClient, rows: list, key: str) -> dict:
+    response = client.post(
+        "/ingesta/indicadores/batch", json=rows, headers={"Idempotency-Key": key}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_reintento_del_lote_responde_duplicate(client):
+    rows = [
+        densidad("2025-01-01", "T001", 1.0),
+        {**densidad("2025-01-01", "T002", 2.0), "filial_code": ""},
+        densidad("2025-01-02", "T001", 3.0),
+    ]
+
+    first = post_batch(client, rows, "lote-1")
+    retry = post_batch(client, rows, "lote-1")
+
+    assert (first["accepted"], first["rejected"], first["duplicates"]) == (2, 1, 0)
+    assert [r["status"] for r in first["results"]] == ["accepted", "rejected", "accepted"]
+    assert sorted(f["rows"] for f in first["raw_files"]) == [1, 1]
+    assert (retry["accepted"], retry["duplicates"], retry["raw_files"]) == (2, 2, [])
+    assert [r["status"] for r in retry["results"]] == ["duplicate", "rejected", "duplicate"]
+
+
+@pytest.fixture
+def async_client(workdir, monkeypatch):
+    monkeypatch.setattr(main, "INGEST_MODE", "async")
+    monkeypatch.setattr(main.ingest_queue, "durability", "flushed")
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def test_group_commit_responde_a_cada_lote_con_sus_filas(async_client):
+    batches = {
+        "a": [densidad("2025-01-01", f"T00{i}", float(i)) for i in range(1, 4)],
+        "b": [densidad("2025-01-02", "T001", 9.0)],
+    }
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = {
+            key: pool.submit(post_batch, async_client, rows, key)
+            for key, rows in batches.items()
+        }
+        responses = {key: future.result() for key, future in futures.items()}
+
+    for key, response in responses.items():
+        assert response["status"] == "received"
+        assert response["accepted"] == len(batches[key]) and response["duplicates"] == 0
+        assert sum(f["rows"] for f in response["raw_files"]) == len(batches[key])
+    assert [f["raw_file"].split("/")[-2] for f in responses["b"]["raw_files"]] == ["DD=02"]
+
+    retry = post_batch(async_client, batches["a"], "a")
+    assert retry["duplicates"] == 3 and retry["raw_files"] == []
@@ -0,0 +1,196 @@
+"""Cálculo MCP: el incremental debe dar el mismo resultado que un cálculo completo."""
+
+from __future__ import annotations
+
+import csv
+import json
+import shutil
+
+from etl import calculo_mcp_indicadores as calc
+from etl import compactar_raw, retencion
+
+from conftest import densidad, viajes, write_raw
+
+
+def silver_rows(fecha: str) -> set:
+    return {
+        (row["id_indicador"], row["tramo_id"], row["valor_calculado"], row["muestras"])
+        for row in calc.SILVER_STORE.iter_rows()
+        if row["fecha"] == fecha
+    }
+
+
+def all_rows() -> set:
+    return {tuple(row.values()) for row in calc.SILVER_STORE.iter_rows()}
+
+
+def test_incremental_igual_a_completo_con_altas_tardias_y_bajas(workdir):
+    calc.REFERENCE_DIR.mkdir(parents=True)
+    (calc.REFERENCE_DIR / "mcp_reference_MCP_DENS_PROM.csv").write_text(
+        "tramo_id,fecha,valor_ref\nT001,2025-01-01,10\nT002,2025-01-02,50\n", encoding="utf-8"
+    )
+    write_raw(
+        densidad(f"2025-01-0{day}", f"T00{tramo}", 10.0 * day + tramo)
+        for day in (1, 2, 3)
+        for tramo in (1, 2)
+    )
+    calc.main()
+
+    # Fecha nueva, lectura tardía en una fecha ya calculada, otra fuente y
+    # una partición RAW eliminada
+    write_raw([densidad("2025-01-04", "T001", 7.0), densidad("2025-01-01", "T001", 1.0)])
+    write_raw([viajes("2025-01-02", "01", 5.0)])
+    shutil.rmtree(calc.RAW_PATH / "interno_densidad/densidad/YYYY=2025/MM=01/DD=03")
+    calc.main()
+    incremental = all_rows()
+    calc.main(full=True)
+
+    assert incremental == all_rows()
+    assert {row[3] for row in incremental} == {"2025-01-01", "2025-01-02", "2025-01-04"}
+
+
+def test_rollback_mueve_el_current_y_el_incremental_siguiente_lo_respeta(workdir):
+    write_raw(densidad("2025-01-01", f"T00{tramo}", float(tramo)) for tramo in (1, 2))
+    calc.main()
+    first_version, first_rows = calc.SILVER_STORE.current_version(), all_rows()
+    write_raw([densidad("2025-01-02", "T001", 5.0)])
+    calc.main()
+    assert calc.SILVER_STORE.current_version() != first_version
+
+    calc.rollback_dataset_version("mcp_indicadores", first_version)
+
+    assert calc.SILVER_STORE.current_version() == first_version
+    assert all_rows() == first_rows
+    [current] = [v for v in calc.list_versions("mcp_indicadores") if v["is_current"]]
+    assert current["version_id"] == first_version
+    # El current ya no es el publicado por el cálculo: el incremental recalcula todo
+    calc.main()
+    after_rollback = all_rows()
+    calc.main(full=True)
+    assert after_rollback == all_rows() != first_rows
+
+
+def test_lectura_tardia_en_fecha_archivada(workdir):
+    fecha = "2025-01-01"
+    write_raw(densidad(fecha, f"T00{i}", 10.0 + i) for i in range(1, 6))
+    calc.main(full=True)
+    assert compactar_raw.main(min_age_days=0) == 0
+    assert retencion.main(raw_archive_days=0) == 0
+    archived = calc.ARCHIVE_RAW_PATH / "interno_densidad" / "densidad"
+    assert list(archived.rglob("compact_*.seg"))
+    assert not list((calc.RAW_PATH / "interno_densidad").rglob("*.seg"))
+    # El incremental siguiente registra los archivos movidos al archivo
+    calc.main()
+
+    # Lectura tardía de la fecha ya archivada: llega a data/raw
+    write_raw([densidad(fecha, "T006", 30.0)])
+    calc.main()
+    incremental = silver_rows(fecha)
+    calc.main(full=True)
+    full = silver_rows(fecha)
+
+    assert incremental == full
+    tramos = {tramo for indicator, tramo, _, _ in incremental if indicator == "MCP_DENS_PROM"}
+    assert tramos == {f"T00{i}" for i in range(1, 7)}
+
+
+def test_viajes_agrupados_por_servicio_no_usan_tramo_id(workdir):
+    fecha = "2025-01-01"
+    write_raw(
+        [
+            densidad(fecha, "T001", 10.0, servicio="01"),
+            viajes(fecha, "01", 5.0),
+            viajes(fecha, "01", 7.0),
+        ]
+    )
+    calc.REFERENCE_DIR.mkdir(parents=True)
+    (calc.REFERENCE_DIR / "mcp_reference_MCP_VIAJES_TOTAL.csv").write_text(
+        f"servicio_code,fecha,valor_ref\n01,{fecha},12\n", encoding="utf-8"
+    )
+    calc.main(full=True)
+
+    rows = list(calc.SILVER_STORE.iter_rows())
+    [viaje] = [row for row in rows if row["id_indicador"] == "MCP_VIAJES_TOTAL"]
+    assert viaje["tramo_id"] is None and viaje["servicio_code"] == "01"
+    assert viaje["valor_calculado"] == 12.0 and viaje["status"] == "ok"
+    assert {row["tramo_id"] for row in rows if row is not viaje} == {"T001"}
+
+    # Un código de servicio pasado como --tramo no recalcula los viajes
+    version = calc.SILVER_STORE.current_version()
+    calc.main(tramos=["01"])
+    assert calc.SILVER_STORE.current_version() == version
+
+
+def test_cuantiles_sin_dataset_de_referencia(workdir, caplog):
+    write_raw(densidad("2025-01-01", "T001", valor) for valor in (10.0, 20.0, 30.0))
+    calc.main(full=True)
+
+    statuses = {
+        row["id_indicador"]: row["status"] for row in calc.SILVER_STORE.iter_rows()
+    }
+    assert statuses["MCP_DENS_P95"] == calc.NO_REFERENCE_STATUS
+    assert statuses["MCP_DENS_PROM"] == "sin_referencia"
+    missing = [
+        record.getMessage()
+        for record in caplog.records
+        if record.getMessage().startswith("No existe dataset de referencia")
+    ]
+    assert missing
+    for quantile in ("MCP_DENS_P50", "MCP_DENS_P95", "MCP_DENS_P99"):
+        assert not any(quantile in message for message in missing)
+
+
+def last_run() -> dict:
+    with calc.RUN_HISTORY_FILE.open(newline="", encoding="utf-8") as fh:
+        return list(csv.DictReader(fh))[-1]
+
+
+def test_historial_cuenta_solo_lo_recalculado_en_la_corrida(workdir):
+    write_raw(densidad(f"2025-01-0{day}", "T001", 10.0) for day in (1, 2, 3))
+    calc.main(full=True)
+    assert last_run()["indicadores_densidad"] == "3"
+
+    write_raw([densidad("2025-01-04", "T001", 10.0)])
+    calc.main()
+    run = last_run()
+    assert run["indicadores_densidad"] == "1"
+    assert run["status_sin_referencia"] == "1"  # MCP_DENS_PROM
+    assert run["status_sin_referencia_definida"] == "3"  # P50/P95/P99
+    stages = json.loads(run["etapas"])
+    assert {"write", "register", "manifest"} <= stages.keys()
+
+    calc.main()
+    assert last_run()["total_indicadores"] == "0"
+
+
+def group_snapshot(field_groups) -> dict:
+    return {
+        field: [
+            (key, stats.count, stats.total, stats.min, stats.max, stats.sketch.quantile(0.95))
+            for key, stats in groups.items()
+        ]
+        for field, groups in field_groups.items()
+    }
+
+
+def test_escaneo_paralelo_igual_al_serial(workdir):
+    for lote in range(2):
+        write_raw(
+            densidad(f"2025-01-0{day}", f"T00{i % 4}", 0.1 * i + lote / 3, servicio=f"0{i % 3}")
+            for day in range(1, 6)
+            for i in range(day * 7)
+        )
+    fields = ("tramo_id", "servicio_code")
+    serial, serial_readings = calc.aggregate_raw(
+        "interno_densidad", "densidad", group_fields=fields, with_sketches=True
+    )
+    for workers in (2, 3):
+        parallel, readings = calc.aggregate_raw(
+            "interno_densidad",
+            "densidad",
+            workers=workers,
+            group_fields=fields,
+            with_sketches=True,
+        )
+        assert readings == serial_readings
+        assert group_snapshot(parallel) == group_snapshot(serial)
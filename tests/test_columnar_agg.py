@@ -0,0 +1,57 @@
+"""Backend numpy: mismas reducciones y mismo orden de grupos que el de python."""
+
+from __future__ import annotations
+
+import math
+import random
+from pathlib import Path
+
+import pytest
+
+from etl import calculo_mcp_indicadores as calc
+
+from conftest import densidad
+
+
+def records() -> list:
+    rng = random.Random(7)
+    rows = []
+    for i in range(400):
+        row = densidad(
+            f"2025-01-0{rng.randint(1, 4)}",
+            f"T00{rng.randint(1, 6)}",
+            rng.uniform(-50, 50),
+            servicio=f"0{rng.randint(1, 3)}",
+        )
+        if i % 17 == 0:
+            row["tramo_id"] = None
+        if i % 23 == 0:
+            row["servicio_code"] = ""
+        if i % 29 == 0:
+            row["valor"] = math.nan
+        if i % 31 == 0:
+            row["valor"] = "n/a"
+        rows.append((row, Path("seg"), i + 1))
+    return rows
+
+
+def snapshot(field_groups) -> dict:
+    # repr: dos NaN en la misma posición comparan iguales
+    return {
+        field: [
+            (key, stats.count, repr(stats.total), repr(stats.min), repr(stats.max))
+            for key, stats in groups.items()
+        ]
+        for field, groups in field_groups.items()
+    }
+
+
+def test_numpy_igual_a_python():
+    pytest.importorskip("numpy")
+    fields = ("tramo_id", "servicio_code")
+    python, python_readings = calc.aggregate_records(records(), "python", group_fields=fields)
+    numpy, numpy_readings = calc.aggregate_records(records(), "numpy", group_fields=fields)
+
+    assert numpy_readings == python_readings == 400
+    assert snapshot(numpy) == snapshot(python)
+    assert any("nan" in total for _, _, total, _, _ in snapshot(python)["tramo_id"])
@@ -0,0 +1,32 @@
+"""Compactación RAW: un segmento abierto nunca entra al segmento compactado."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from api.app.raw_store import SegmentWriter
+from etl.compactar_raw import compact_partition
+from etl.raw_segments import live_raw_files, read_footer
+
+from conftest import densidad, write_raw
+
+
+def test_no_compacta_segmentos_abiertos(workdir):
+    fecha = "2025-01-01"
+    write_raw([densidad(fecha, "T001", 1.0), densidad(fecha, "T002", 2.0)])
+    # Carga tardía de la API: el segmento queda abierto mientras se compacta
+    writer = SegmentWriter(Path("data/raw"))
+    writer.append([densidad(fecha, "T003", 3.0)])
+    try:
+        [folder] = {path.parent for path in Path("data/raw").rglob("*.ndjson*")}
+        [open_segment] = folder.glob("*.ndjson.open")
+
+        result = compact_partition(folder)
+
+        assert result is not None and result.rows == 2
+        [segment] = folder.glob("compact_*.seg")
+        assert open_segment.name not in read_footer(segment)["sources"]
+        assert open_segment.exists()
+        assert list(live_raw_files(folder)) == [segment, open_segment]
+    finally:
+        writer.close()
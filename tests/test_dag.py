@@ -0,0 +1,63 @@
+"""Ejecutor DAG: orden por dependencias y propagación de fallas."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from etl.dag import STATUS_FAILED, STATUS_OK, STATUS_SKIPPED, Stage, run_dag
+
+
+def script(folder: Path, name: str, body: str) -> Path:
+    path = folder / f"{name}.py"
+    path.write_text(body, encoding="utf-8")
+    return path
+
+
+def test_dependientes_corren_despues_y_se_saltan_si_falla_la_dependencia(tmp_path):
+    order = tmp_path / "orden.txt"
+    ok = script(
+        tmp_path,
+        "ok",
+        "import sys\n"
+        f"open({str(order)!r}, 'a').write(sys.argv[1] + '\\n')\n"
+        "print('hecho', sys.argv[1])\n",
+    )
+    failing = script(tmp_path, "falla", "import sys\nsys.exit(3)\n")
+    lines = []
+
+    results = run_dag(
+        [
+            Stage("b", ok, deps=["a"], args=["b"]),
+            Stage("a", ok, args=["a"]),
+            Stage("c", failing),
+            Stage("d", ok, deps=["a", "c"], args=["d"]),
+        ],
+        lines.append,
+        max_workers=2,
+    )
+
+    assert [results[name].status for name in "abcd"] == [
+        STATUS_OK,
+        STATUS_OK,
+        STATUS_FAILED,
+        STATUS_SKIPPED,
+    ]
+    assert results["c"].returncode == 3
+    assert order.read_text().split() == ["a", "b"]
+    assert "[a] hecho a" in lines and "[b] hecho b" in lines
+
+
+def test_worker_caido_marca_la_etapa_fallida_sin_cortar_la_corrida(tmp_path):
+    crash = script(tmp_path, "crash", "import os\nos._exit(1)\n")
+    ok = script(tmp_path, "ok", "print('hecho')\n")
+    lines = []
+
+    results = run_dag(
+        [Stage("crash", crash), Stage("despues", ok, deps=["crash"])],
+        lines.append,
+        max_workers=1,
+    )
+
+    assert results["crash"].status == STATUS_FAILED and results["crash"].returncode == -1
+    assert results["despues"].status == STATUS_SKIPPED
+    assert any("worker caído" in line for line in lines)
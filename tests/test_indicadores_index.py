@@ -0,0 +1,71 @@
+"""Índice de la API sobre el dataset silver, sin depender de ``etl/``."""
+
+from __future__ import annotations
+
+import math
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from api.app import main
+from api.app.indicadores_index import CurrentIndicadoresIndex
+from etl.silver_store import SilverStore
+
+from conftest import BASE_DIR
+
+
+def _row(fecha: str, tramo: str, valor: float) -> dict:
+    return {
+        "id_indicador": "MCP_DENS_PROM",
+        "tramo_id": tramo,
+        "servicio_code": None,
+        "fecha": fecha,
+        "valor_calculado": valor,
+        "muestras": 1,
+        "valor_referencia": None,
+        "delta": None,
+        "status": "sin_referencia",
+    }
+
+
+def test_indice_lee_checkpoint_y_deltas_de_la_version_actual(workdir):
+    store = SilverStore(Path("data/silver/mcp_indicadores"))
+    first = store.write_version(
+        {"2025-01-01": [_row("2025-01-01", f"T00{i}", float(i)) for i in range(1, 6)]}
+    )
+    second = store.write_version(
+        {"2025-01-01": [_row("2025-01-01", f"T00{i}", float(i * (i != 2))) for i in range(1, 6)]},
+        store.load_manifest(first),
+    )
+    store.publish(second)
+    assert store.load_manifest(second)["written"]["deltas"] == 1
+
+    current = CurrentIndicadoresIndex(store.current_path)
+    assert current.refresh()
+    total, rows = current.index.query(tramo_id="T002")
+    assert total == 1 and rows[0]["valor_calculado"] == 0.0
+    assert current.index.size == 5
+
+
+def test_la_api_no_importa_etl():
+    code = (
+        "import sys; sys.modules['etl'] = None; "
+        "import api.app.indicadores_index, api.app.main"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, check=True)
+
+
+def test_listado_con_valor_nan_responde_200(workdir):
+    store = SilverStore(Path("data/silver/mcp_indicadores"))
+    nan_row = {**_row("2025-01-01", "T001", math.nan), "delta": math.inf}
+    store.publish(store.write_version({"2025-01-01": [nan_row, _row("2025-01-01", "T002", 2.0)]}))
+
+    with TestClient(main.app) as client:
+        response = client.get("/indicadores", params={"fecha_desde": "2025-01-01"})
+
+    assert response.status_code == 200
+    items = {item["tramo_id"]: item for item in response.json()["items"]}
+    assert items["T001"]["valor_calculado"] is None and items["T001"]["delta"] is None
+    assert items["T002"]["valor_calculado"] == 2.0
@@ -0,0 +1,33 @@
+"""Ingesta de CSV: una fila no mapeable es un error por fila, no corta la carga."""
+
+from __future__ import annotations
+
+import csv
+import io
+
+from api.app.csv_mappings import SOURCE_MAPPINGS
+from etl.ingest_client import open_ingest_sink, send_csv_rows
+
+
+def test_valor_no_numerico_se_informa_por_fila(workdir):
+    reader = csv.DictReader(
+        io.StringIO(
+            "fecha,filial_code,servicio_code,tramo_id,densidad\n"
+            "2025-01-01,VA,01,T001,1.5\n"
+            "2025-01-01,VA,01,T002,n/a\n"
+            "2025-01-01,,01,T003,2.0\n"
+            "2025-01-02,VA,01,T001,3.0\n"
+        )
+    )
+    ok, errors = [], []
+    with open_ingest_sink("", direct=True) as sink:
+        summary = send_csv_rows(
+            sink,
+            reader,
+            SOURCE_MAPPINGS["densidad"],
+            lambda idx, payload: ok.append(idx),
+            lambda idx, payload, reason: errors.append(idx),
+        )
+
+    assert summary == {"rows": 4, "ok": 2, "errors": 2, "duplicates": 0}
+    assert ok == [1, 4] and sorted(errors) == [2, 3]
@@ -0,0 +1,34 @@
+"""Group commit: cada envío recibe solo sus segmentos y filas."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from api.app.ingest_queue import GroupCommitQueue
+from api.app.raw_store import SegmentWriter
+
+from conftest import densidad
+
+
+def test_envios_concurrentes_reciben_solo_su_parte(workdir):
+    async def scenario():
+        writer = SegmentWriter(Path("data/raw"))
+        queue = GroupCommitQueue(writer, max_delay_ms=200)
+        await queue.start()
+        try:
+            return await asyncio.gather(
+                queue.submit(
+                    [densidad("2025-01-01", "T001", 1.0), densidad("2025-01-01", "T002", 2.0)]
+                ),
+                queue.submit([densidad("2025-01-02", "T001", 3.0)]),
+            )
+        finally:
+            await queue.stop()
+            writer.close()
+
+    (first, first_new), (second, second_new) = asyncio.run(scenario())
+
+    assert first_new == [True, True] and second_new == [True]
+    assert [(path.parent.name, rows) for path, rows in first.items()] == [("DD=01", 2)]
+    assert [(path.parent.name, rows) for path, rows in second.items()] == [("DD=02", 1)]
@@ -0,0 +1,81 @@
+"""Sketch de cuantiles: cota de error relativo, merge y casos borde."""
+
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from etl.quantile_sketch import DEFAULT_RELATIVE_ACCURACY, MIN_INDEXABLE, QuantileSketch
+
+QUANTILES = (0.0, 0.01, 0.25, 0.5, 0.75, 0.95, 0.99, 1.0)
+
+
+def distributions() -> dict:
+    rng = random.Random(42)
+    return {
+        "gauss": [rng.gauss(50, 15) for _ in range(5000)],
+        "negativos": [-rng.uniform(0.5, 500) for _ in range(5000)],
+        "muchos_ceros": [
+            0.0 if rng.random() < 0.6 else rng.uniform(-10, 10) for _ in range(5000)
+        ],
+        "lognormal": [rng.lognormvariate(0, 2) for _ in range(5000)],
+    }
+
+
+def exact(values: list, q: float) -> float:
+    return sorted(values)[math.floor(q * (len(values) - 1))]
+
+
+@pytest.mark.parametrize("name", sorted(distributions()))
+def test_error_relativo_acotado(name):
+    values = distributions()[name]
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+
+    for q in QUANTILES:
+        expected = exact(values, q)
+        bound = DEFAULT_RELATIVE_ACCURACY * abs(expected) + 1e-12
+        assert abs(sketch.quantile(q) - expected) <= bound
+
+
+@pytest.mark.parametrize("name", sorted(distributions()))
+def test_merge_igual_al_sketch_unico(name):
+    values = distributions()[name]
+    single = QuantileSketch()
+    parts = [QuantileSketch() for _ in range(3)]
+    for i, value in enumerate(values):
+        single.add(value)
+        parts[i % 3].add(value)
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    assert merged.to_dict() == single.to_dict()
+    assert [merged.quantile(q) for q in QUANTILES] == [single.quantile(q) for q in QUANTILES]
+    restored = QuantileSketch.from_dict(merged.to_dict())
+    assert [restored.quantile(q) for q in QUANTILES] == [single.quantile(q) for q in QUANTILES]
+
+
+def test_sketch_vacio_devuelve_none():
+    sketch = QuantileSketch()
+    sketch.add(math.nan)
+    sketch.add(math.inf)
+    assert sketch.count == 0 and sketch.quantile(0.5) is None
+
+
+def test_valores_cercanos_a_cero_cuentan_como_cero():
+    sketch = QuantileSketch()
+    for value in (MIN_INDEXABLE / 10, -MIN_INDEXABLE / 2, MIN_INDEXABLE / 5):
+        sketch.add(value)
+
+    assert sketch.zero == 3 and not sketch.positive and not sketch.negative
+    assert [sketch.quantile(q) for q in (0.0, 0.5, 1.0)] == [0.0, 0.0, 0.0]
+
+    # El cero se acota al rango observado: solo positivos nunca devuelve 0
+    positive = QuantileSketch()
+    positive.add(MIN_INDEXABLE / 10)
+    positive.add(MIN_INDEXABLE / 5)
+    assert positive.zero == 2 and positive.quantile(0.5) == MIN_INDEXABLE / 10
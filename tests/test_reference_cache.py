@@ -0,0 +1,66 @@
+"""Join de referencias: el merge python y el searchsorted numpy coinciden."""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import pytest
+
+from etl.reference_cache import ReferenceCache, ReferenceTable, join_reference
+
+
+def _rows() -> list:
+    return [
+        {"tramo_id": "T002", "fecha": "2025-01-02", "valor_calculado": 5.0},
+        {"tramo_id": "T001", "fecha": "2025-01-01", "valor_calculado": 1.05},
+        {"tramo_id": "T009", "fecha": "2025-01-01", "valor_calculado": 3.0},
+        {"tramo_id": "T001", "fecha": "2025-01-03", "valor_calculado": 2.0},
+        {"tramo_id": "T001", "fecha": "2025-01-01", "valor_calculado": 4.0},
+        {"tramo_id": "T002", "fecha": "2025-01-02", "valor_calculado": math.nan},
+        {"tramo_id": "T0", "fecha": "2025-01-01", "valor_calculado": 1.0},
+    ]
+
+
+def test_merge_y_searchsorted_dan_el_mismo_resultado():
+    pytest.importorskip("numpy")
+    table = ReferenceTable.from_map(
+        {
+            ("T001", "2025-01-01"): 1.0,
+            ("T001", "2025-01-02"): 9.0,
+            ("T002", "2025-01-02"): 2.0,
+            ("T010", "2025-01-01"): 7.0,
+        }
+    )
+    by_backend = {}
+    for backend in ("python", "numpy"):
+        rows = _rows()
+        join_reference(rows, table, 0.1, backend=backend)
+        by_backend[backend] = [
+            (row["valor_referencia"], row["status"]) for row in rows
+        ]
+
+    assert by_backend["python"] == by_backend["numpy"]
+    assert [status for _, status in by_backend["python"]] == [
+        "desvio",
+        "ok",
+        "sin_referencia",
+        "sin_referencia",
+        "desvio",
+        "desvio",
+        "sin_referencia",
+    ]
+
+
+def test_snapshot_guarda_la_tabla_ordenada(workdir):
+    csv_path = Path("mcp_reference_X.csv")
+    csv_path.write_text(
+        "tramo_id,fecha,valor\nT002,2025-01-01,2\nT001,2025-01-01,1\n", encoding="utf-8"
+    )
+    first = ReferenceCache(Path("cache")).load(csv_path)
+    second_cache = ReferenceCache(Path("cache"))
+    second = second_cache.load(csv_path)
+
+    assert second_cache.counters() == {"hits": 1, "misses": 0}
+    assert second.keys == first.keys == sorted(first.keys)
+    assert list(second.values) == [1.0, 2.0]
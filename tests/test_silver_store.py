@@ -0,0 +1,36 @@
+"""Deltas del silver: una fila con NaN que no cambió no se reescribe."""
+
+from __future__ import annotations
+
+import math
+
+from etl.silver_store import diff_rows
+
+
+def _row(tramo: str, valor: float, status: str = "desvio") -> dict:
+    return {
+        "id_indicador": "MCP_DENS_PROM",
+        "tramo_id": tramo,
+        "servicio_code": None,
+        "fecha": "2025-01-01",
+        "valor_calculado": valor,
+        "muestras": 3,
+        "valor_referencia": 1.0,
+        "delta": valor - 1.0,
+        "status": status,
+    }
+
+
+def test_nan_sin_cambios_no_genera_delta():
+    previous = [_row("T001", math.nan), _row("T002", 2.0)]
+    rows = [_row("T001", math.nan), _row("T002", 2.0)]
+
+    assert diff_rows(previous, rows) == []
+
+
+def test_nan_que_cambia_a_valor_si_genera_delta():
+    previous = [_row("T001", math.nan), _row("T002", 2.0)]
+    rows = [_row("T001", 1.0, "ok"), _row("T002", 2.0)]
+
+    [change] = diff_rows(previous, rows)
+    assert change["tramo_id"] == "T001" and change["_op"] == "u"